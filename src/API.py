@@ -1,33 +1,237 @@
 from pydantic import BaseModel, Field
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional
-from os import path
+from typing import List, Literal, Optional
+from os import path, getenv, environ, makedirs, remove
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
 import json
-from types import SimpleNamespace
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+from importlib.util import find_spec
 
 from providers.factory import ProviderFactory
+from providers.pool import ProviderPool
+from providers.base import capture_usage, flatten_history
 from config.manager import ConfigManager
-from constants import DEFAULT_SYSTEM_PROMPT
+from constants import (
+    DEFAULT_SYSTEM_PROMPT,
+    BATCH_MAX_ITEMS,
+    BATCH_CONCURRENCY_PER_PROVIDER,
+    BATCH_MAX_CONCURRENCY_PER_PROVIDER,
+    METRICS_PUBLISH_INTERVAL,
+    TRANSCRIBE_MAX_UPLOAD_MB,
+    TRANSCRIBE_PROCESS_WORKERS,
+    API_DRAIN_TIMEOUT,
+)
 from utils.error_handler import SecureErrorHandler
+from utils.cache import ResponseCache, _resolve_cache_dir
+from utils.singleflight import SingleFlight
+from utils.admission import AdmissionController, QueueFullError, QueueTimeoutError
+from utils.rate_limit import KeyRateLimiter, RateLimitExceeded, SharedKeyRateLimiter
+from utils.shared_state import SharedStateStore
+from utils import metrics, timing
+from utils.hedging import PRIMARY, hedged_call, hedged_stream
+from utils.router import LatencyRouter
+from utils.jobs import JobManager, JobStore, public_view, webhook_error
+from utils.uploads import UploadError, UploadTooLarge, receive_upload
+from utils.sessions import SessionStore
+from utils.resilience import CircuitOpenError, breakers, retry_after, status_code
 
-app = FastAPI()
+# Estado exposto em /health/ready: pronto após o aquecimento, drenando após o SIGTERM
+prontidao = {"pronto": False, "drenando": False, "providers": [], "conectados": []}
+
+def _providers_para_aquecer() -> List[str]:
+    return config_manager.get_warm_providers()
+
+async def _aquece(nomes: List[str]):
+    """Importa os SDKs, cria os clientes e abre as conexões; só então marca o servidor como pronto."""
+    inicio = time.perf_counter()
+    try:
+        prontos = await asyncio.to_thread(provider_pool.warm, nomes)
+        conectados = await provider_pool.apreconnect(prontos)
+        prontidao.update(providers=prontos, conectados=conectados)
+    except Exception as e:
+        print(f"Aviso: falha no aquecimento dos providers: {e}", file=sys.stderr)
+    prontidao["pronto"] = True
+    print(f"Providers aquecidos: {', '.join(prontidao['providers']) or 'nenhum'} "
+          f"(conectados: {', '.join(prontidao['conectados']) or 'nenhum'}, {time.perf_counter() - inicio:.2f}s)",
+          file=sys.stderr)
+
+def _instala_drenagem():
+    """Marca o servidor como drenando no SIGTERM/SIGINT e repassa o sinal ao uvicorn.
+
+    O uvicorn para de aceitar conexões e espera as requisições em andamento
+    (até timeout_graceful_shutdown); o lifespan só termina depois disso.
+    Devolve a função que restaura os handlers anteriores.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return lambda: None
+    anteriores = {}
+
+    def ao_sinal(sig, frame):
+        prontidao["drenando"] = True
+        anterior = anteriores.get(sig)
+        if callable(anterior):
+            anterior(sig, frame)
+        elif anterior == signal.SIG_DFL:
+            signal.signal(sig, signal.SIG_DFL)
+            signal.raise_signal(sig)
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        anteriores[sig] = signal.signal(sig, ao_sinal)
+
+    def restaura():
+        for sig, handler in anteriores.items():
+            signal.signal(sig, handler)
+    return restaura
+
+def _drain_timeout() -> float:
+    return float(getenv("MINHAIA_DRAIN_TIMEOUT", API_DRAIN_TIMEOUT))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Aquece os providers em background e, no desligamento, drena jobs e fecha as conexões."""
+    prontidao.update(pronto=False, drenando=False, providers=[], conectados=[])
+    restaura_sinais = _instala_drenagem()
+    aquecimento = asyncio.create_task(_aquece(_providers_para_aquecer()))
+    publicador = asyncio.create_task(_publica_metricas()) if shared_state else None
+    await job_manager.start()
+    yield
+    prontidao["drenando"] = True
+    aquecimento.cancel()
+    await asyncio.gather(aquecimento, return_exceptions=True)
+    await job_manager.stop(timeout=_drain_timeout())
+    if audio_pool is not None:
+        audio_pool.shutdown(wait=False, cancel_futures=True)
+    if publicador:
+        publicador.cancel()
+        await asyncio.to_thread(metrics.registry.publish)
+    await provider_pool.aclose()
+    session_store.close()
+    restaura_sinais()
+
+async def _publica_metricas():
+    """Com vários workers, grava as métricas deste processo no estado compartilhado (numa thread, fora do loop)."""
+    while True:
+        await asyncio.sleep(METRICS_PUBLISH_INTERVAL)
+        try:
+            await asyncio.to_thread(metrics.registry.publish)
+        except Exception as e:
+            print(f"Aviso: falha ao publicar métricas: {e}", file=sys.stderr)
+
+class ServerTimingMiddleware:
+    """Mede as etapas de cada requisição e as devolve no header Server-Timing.
+
+    Middleware ASGI puro (sem BaseHTTPMiddleware) para não interferir no
+    streaming. Em respostas em streaming o header sai com as etapas
+    concluídas até o início do corpo; /chat/stream repete tudo no `done`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with timing.capture_timings() as timings:
+            async def envia(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+            await self.app(scope, receive, envia)
+
+app = FastAPI(lifespan=lifespan)
+if getenv("MINHAIA_SERVER_TIMING", "1") != "0":
+    app.add_middleware(ServerTimingMiddleware)
 security = HTTPBearer(auto_error=False)
-AUTH_ENABLED = False
+# Os workers do modo --workers herdam a configuração por variáveis de ambiente
+AUTH_ENABLED = getenv("MINHAIA_API_SECURE") == "1"
+shared_state = SharedStateStore(getenv("MINHAIA_SHARED_STATE")) if getenv("MINHAIA_SHARED_STATE") else None
 
 class MessageRequest(BaseModel):
     texto: str = Field(..., description="Texto da mensagem")
-    provider: str = Field('groq', description="Nome do provider", example="groq")
+    provider: str = Field('groq', description="Nome do provider, ou 'auto' para o mais rápido do pool", example="groq")
     persona: Optional[str] = Field(None, description="Persona a ser usada")
     capacidade: Optional[str] = Field(
         'fast',
         description="Capacidade do modelo: fast, cheap, smart, smartest, absurdo"
     )
+    cache: Optional[bool] = Field(
+        None,
+        description="true usa o cache mesmo com temperature > 0; false ignora o cache"
+    )
+    hedge: Optional[bool] = Field(
+        None,
+        description="true dispara o provider secundário de 'hedge' (models.json) se o primário demorar"
+    )
 
 class MessageResponse(BaseModel):
     resposta: str
     modelo: str
 
+class JobRequest(MessageRequest):
+    webhook: Optional[str] = Field(
+        None,
+        description="URL (http/https) que recebe um POST com o job quando ele terminar"
+    )
+
+class JobResponse(BaseModel):
+    id: str
+    status: str
+    resposta: Optional[str] = None
+    modelo: Optional[str] = None
+    erro: Optional[str] = None
+    criado_em: float
+    atualizado_em: float
+
+class TTSRequest(BaseModel):
+    texto: str
+    engine: Literal["openai", "groq", "polly"] = "openai"
+    voz: Optional[str] = Field(None, description="Voz do engine (padrão: a mesma do --voz/--polly)")
+    modelo: Optional[str] = Field(
+        None,
+        description="Modelo TTS (openai/groq) ou engine do Polly ('neural' ou 'standard')"
+    )
+
+class TranscriptionResponse(BaseModel):
+    transcricao: str
+    modelo: str
+    backend: str
+
+class SessionResponse(BaseModel):
+    id: str
+    provider: Optional[str] = None
+    capacidade: Optional[str] = None
+    mensagens: List[dict]
+    criado_em: float
+    atualizado_em: float
+
+class BatchRequest(BaseModel):
+    itens: List[MessageRequest] = Field(..., description="Mensagens a processar")
+    max_concorrencia: Optional[int] = Field(
+        None,
+        description="Máximo de chamadas simultâneas por provider dentro do lote"
+    )
+
+class BatchItemResponse(BaseModel):
+    indice: int
+    resposta: Optional[str] = None
+    modelo: Optional[str] = None
+    erro: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    resultados: List[BatchItemResponse]
+
 def get_api_keys():
     """Carrega as chaves de API de um arquivo JSON."""
     keys_file = path.join(path.dirname(__file__), 'api.key.json')
@@ -39,6 +243,12 @@ def get_api_keys():
 api_keys = get_api_keys()
 VALID_OWNER = api_keys.get("nome")
 VALID_KEYS = api_keys.get("chaves", [])
+if shared_state:
+    rate_limiter = SharedKeyRateLimiter(shared_state, api_keys.get("limites"), api_keys.get("limite_padrao"))
+    metrics.registry.attach_store(shared_state)
+    breakers.attach_store(shared_state)
+else:
+    rate_limiter = KeyRateLimiter(api_keys.get("limites"), api_keys.get("limite_padrao"))
 
 def validate_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Valida o token de autenticação."""
@@ -70,62 +280,834 @@ def validate_token(credentials: HTTPAuthorizationCredentials = Depends(security)
         )
     return owner
 
+def client_key(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Autentica a requisição e devolve a chave usada no limite de taxa."""
+    owner = validate_token(credentials)
+    if not AUTH_ENABLED:
+        return owner
+    return credentials.credentials.split(":", 1)[1]
+
+async def enforce_rate_limit(key: str, textos):
+    """Aplica o limite de taxa da chave (modo --secure) antes de tocar nos providers."""
+    if not AUTH_ENABLED:
+        return
+    tokens = sum(KeyRateLimiter.estimate_tokens(texto) for texto in textos)
+    try:
+        await rate_limiter.acheck(key, requests=len(textos), tokens=tokens)
+    except RateLimitExceeded as e:
+        metrics.record_error("rate_limit", status.HTTP_429_TOO_MANY_REQUESTS)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=SecureErrorHandler.ERROR_MESSAGES["rate_limit"],
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
 config_manager = ConfigManager()
 provider_factory = ProviderFactory()
+provider_pool = ProviderPool(provider_factory)
+response_cache = ResponseCache()
+single_flight = SingleFlight()
+admission = AdmissionController()
+router = LatencyRouter(**config_manager.get_auto_policy(), store=shared_state)
+
+def _coleta_admissao():
+    for chave, estado in admission.snapshot().items():
+        metrics.IN_FLIGHT.set(estado["in_flight"], chave=chave)
+        metrics.QUEUE_WAITING.set(estado["waiting"], chave=chave)
+
+metrics.registry.add_collector(_coleta_admissao)
+
+def _resolve_request(req: MessageRequest):
+    """Resolve provider, modelo e parâmetros de geração de uma requisição."""
+    provider_name = config_manager.normalize_provider((req.provider or 'groq').lower())
+    capacidade_args = ConfigManager.capacidade_args(req.capacidade)
+    modelo, max_tokens, is_o_model, temperature = config_manager.get_model_config(capacidade_args, provider_name)
+    print(f"Modelo: {modelo}, Max Tokens: {max_tokens}, Temperature: {temperature}")
+    return provider_name, modelo, {
+        "max_tokens": max_tokens,
+        "is_o_model": is_o_model,
+        "persona": req.persona or DEFAULT_SYSTEM_PROMPT,
+        "temperature": temperature,
+    }
+
+
+async def _roteia(req: MessageRequest) -> MessageRequest:
+    """Com provider 'auto', escolhe o candidato do pool com menor latência medida."""
+    if config_manager.normalize_provider(req.provider or 'groq') != "auto":
+        return req
+    candidatos = config_manager.get_auto_candidates(req.capacidade)
+    (provider_name, modelo), motivo = await router.achoose([(p, m) for p, _, m in candidatos])
+    capacidade = next(c for p, c, m in candidatos if (p, m) == (provider_name, modelo))
+    metrics.ROUTER_CHOICES.inc(provider=provider_name, model=modelo, motivo=motivo)
+    print(f"Auto: {provider_name}/{modelo} ({motivo})", file=sys.stderr)
+    return req.model_copy(update={"provider": provider_name, "capacidade": capacidade})
 
-def _build_capacidade_args(capacidade: Optional[str]) -> SimpleNamespace:
-    """Create a lightweight args object compatible with ConfigManager."""
-    capa = (capacidade or 'default').lower()
-    return SimpleNamespace(
-        transcribe=False,
-        fast=capa == 'fast',
-        cheap=capa == 'cheap',
-        smart=capa == 'smart',
-        smartest=capa == 'smartest',
-        absurdo=capa == 'absurdo',
-        model=None,
-        max_tokens=None
+
+def _metric_labels(req: MessageRequest, provider_name: str, modelo: str) -> dict:
+    return {"provider": provider_name, "model": modelo, "capacidade": (req.capacidade or "default").lower()}
+
+
+def _erro_interno(e: Exception) -> HTTPException:
+    """Registra o erro e devolve uma resposta genérica para o cliente.
+
+    Disjuntor aberto vira 503 e um 429 do provider (esgotadas as novas
+    tentativas) vira 429, ambos com Retry-After quando há estimativa.
+    """
+    if isinstance(e, CircuitOpenError) or status_code(e) == status.HTTP_429_TOO_MANY_REQUESTS:
+        aberto = isinstance(e, CircuitOpenError)
+        tipo = "circuit_open" if aberto else "rate_limit"
+        codigo = status.HTTP_503_SERVICE_UNAVAILABLE if aberto else status.HTTP_429_TOO_MANY_REQUESTS
+        espera = e.retry_after if aberto else retry_after(e)
+        metrics.record_error(tipo, codigo)
+        SecureErrorHandler.handle_error(tipo, e, exit_code=0, show_hint=False)
+        return HTTPException(
+            status_code=codigo,
+            detail=SecureErrorHandler.ERROR_MESSAGES[tipo],
+            headers={"Retry-After": str(max(1, round(espera)))} if espera is not None else None,
+        )
+    metrics.record_error("API", status.HTTP_500_INTERNAL_SERVER_ERROR)
+    SecureErrorHandler.handle_error(
+        "API",
+        Exception(f"Erro ao processar a mensagem: {e}"),
+        exit_code=0
+    )
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail="Ocorreu um erro interno ao processar sua solicitação."
     )
 
 
-@app.post("/chat", response_model=MessageResponse)
-def trata_mensagem(req: MessageRequest, token: str = Depends(validate_token)):
-    try:
-        provider_name = config_manager.normalize_provider((req.provider or 'groq').lower())
-        persona = req.persona or DEFAULT_SYSTEM_PROMPT
-        capacidade_args = _build_capacidade_args(req.capacidade)
-
-        modelo, max_tokens, is_o_model, temperature = config_manager.get_model_config(capacidade_args, provider_name)
-        print(f"Modelo: {modelo}, Max Tokens: {max_tokens}, Temperature: {temperature}")
-        
-        provider = provider_factory.create_provider(provider_name)
-        resposta = provider.call_api(
-            req.texto, 
-            modelo, 
-            max_tokens, 
-            is_o_model=is_o_model, 
-            persona=persona,
-            temperature=temperature
+@app.exception_handler(QueueFullError)
+async def trata_fila_cheia(request, exc: QueueFullError):
+    """Fila cheia responde 429 na hora; espera esgotada na fila responde 503."""
+    timeout = isinstance(exc, QueueTimeoutError)
+    codigo = status.HTTP_503_SERVICE_UNAVAILABLE if timeout else status.HTTP_429_TOO_MANY_REQUESTS
+    metrics.record_error("rate_limit", codigo)
+    return JSONResponse(
+        status_code=codigo,
+        content={"detail": SecureErrorHandler.ERROR_MESSAGES["rate_limit"]},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _sse(evento: str, dados: dict) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+
+def _politica_hedge(req: MessageRequest, provider_name: str):
+    """Política de hedge do provider, se ativa para a requisição (campo `hedge` ou `enabled`)."""
+    if req.hedge is False:
+        return None
+    politica = config_manager.get_hedge_policy(provider_name)
+    if not politica or politica["secondary"] == provider_name:
+        return None
+    if req.hedge or politica["enabled"]:
+        return politica
+    return None
+
+
+def _resolve_secundario(req: MessageRequest, politica: dict):
+    """Resolve o destino secundário com a mesma persona e a capacidade da política."""
+    secundaria = req.model_copy(update={
+        "provider": politica["secondary"],
+        "capacidade": politica["capacidade"] or req.capacidade,
+    })
+    provider_name, modelo, params = _resolve_request(secundaria)
+    return provider_name, modelo, params, _metric_labels(secundaria, provider_name, modelo)
+
+
+def _registra_hedge(primario: str, secundario: str):
+    def registra(evento: str):
+        print(f"Hedge {primario} -> {secundario}: {evento}", file=sys.stderr)
+        metrics.HEDGE_EVENTS.inc(provider=primario, secondary=secundario, evento=evento)
+    return registra
+
+
+async def _chama_admitido(provider_name: str, modelo: str, params: dict, texto: str, labels: dict) -> str:
+    """Chama o provider dentro da sua vaga de admissão, registrando fila, upstream e uso."""
+    provider = provider_pool.get(provider_name)
+    admission_key, limits = config_manager.get_limits(provider_name, modelo)
+    params = dict(params)
+    max_tokens = params.pop("max_tokens")
+    async with admission.admit(admission_key, limits) as ticket:
+        metrics.PHASE_SECONDS.observe(ticket.queue_wait, phase="queue", **labels)
+        timing.record("queue", ticket.queue_wait)
+        inicio = time.perf_counter()
+        try:
+            with capture_usage() as usage:
+                resposta = await provider.acall_api(texto, modelo, max_tokens, **params)
+        except Exception:
+            await router.arecord(provider_name, modelo, error=True)
+            raise
+        duracao = time.perf_counter() - inicio
+        await router.arecord(provider_name, modelo, latency=duracao)
+        metrics.PHASE_SECONDS.observe(duracao, phase="upstream", **labels)
+        timing.record("upstream", duracao)
+        metrics.record_usage(usage, **labels)
+        return resposta
+
+
+async def _stream_admitido(provider_name: str, modelo: str, params: dict, texto: str):
+    """Stream do provider secundário de um hedge, dentro da sua própria vaga de admissão."""
+    provider = provider_pool.get(provider_name)
+    admission_key, limits = config_manager.get_limits(provider_name, modelo)
+    params = dict(params)
+    max_tokens = params.pop("max_tokens")
+    async with admission.admit(admission_key, limits):
+        async for chunk in provider.astream_api(texto, modelo, max_tokens, **params):
+            yield chunk
+
+
+async def _executa_mensagem(req: MessageRequest, endpoint: str = "/chat") -> MessageResponse:
+    """Resolve o modelo e chama o provider aquecido correspondente."""
+    with timing.span("config"):
+        req = await _roteia(req)
+        provider_name, modelo, params = _resolve_request(req)
+    labels = _metric_labels(req, provider_name, modelo)
+
+    cache_key = None
+    if ResponseCache.is_cacheable(params["temperature"], opt_in=req.cache is True, bypass=req.cache is False):
+        cache_key = ResponseCache.make_key(
+            provider_name, modelo, params["persona"], params["temperature"], params["max_tokens"], req.texto
         )
-        return MessageResponse(resposta=resposta, modelo=modelo)
-    except Exception as e:
-        SecureErrorHandler.handle_error(
-            "API",
-            f"Erro ao processar a mensagem: {e}"
+        with timing.span("cache"):
+            cached = await response_cache.aget(cache_key)
+        if cached is not None:
+            metrics.REQUESTS.inc(endpoint=endpoint, resultado="cache", **labels)
+            return MessageResponse(resposta=cached, modelo=modelo)
+
+    flight_key = SingleFlight.make_key(
+        provider_name, modelo, params["persona"], req.texto, params["temperature"], params["max_tokens"]
+    )
+    politica = _politica_hedge(req, provider_name)
+
+    async def chama_provider():
+        def primario():
+            return _chama_admitido(provider_name, modelo, params, req.texto, labels)
+
+        if politica is None:
+            return modelo, await primario()
+
+        sec_name, sec_modelo, sec_params, sec_labels = _resolve_secundario(req, politica)
+        origem, resposta = await hedged_call(
+            primario,
+            lambda: _chama_admitido(sec_name, sec_modelo, sec_params, req.texto, sec_labels),
+            politica["delay"],
+            _registra_hedge(provider_name, sec_name),
         )
-        # Retorna uma resposta de erro genérica para o cliente
+        return (modelo if origem == PRIMARY else sec_modelo), resposta
+
+    try:
+        modelo_resposta, resposta = await single_flight.do(flight_key, chama_provider)
+    except QueueFullError:
+        metrics.REQUESTS.inc(endpoint=endpoint, resultado="rejeitada", **labels)
+        raise
+    except Exception:
+        metrics.REQUESTS.inc(endpoint=endpoint, resultado="erro", **labels)
+        raise
+
+    inicio_pos = time.perf_counter()
+    if cache_key:
+        await response_cache.aset(cache_key, resposta)
+    resultado = MessageResponse(resposta=resposta, modelo=modelo_resposta)
+    metrics.PHASE_SECONDS.observe(time.perf_counter() - inicio_pos, phase="post", **labels)
+    timing.record("post", time.perf_counter() - inicio_pos)
+    metrics.REQUESTS.inc(endpoint=endpoint, resultado="ok", **labels)
+    return resultado
+
+
+@app.post("/chat", response_model=MessageResponse)
+async def trata_mensagem(req: MessageRequest, token: str = Depends(client_key)):
+    await enforce_rate_limit(token, [req.texto])
+    try:
+        return await _executa_mensagem(req)
+    except QueueFullError:
+        raise
+    except Exception as e:
+        raise _erro_interno(e)
+
+
+@app.post("/chat/batch", response_model=BatchResponse)
+async def trata_lote(lote: BatchRequest, token: str = Depends(client_key)):
+    """Processa várias mensagens em paralelo, limitando a concorrência por provider.
+
+    Os resultados voltam na ordem de entrada; falhas ficam no campo `erro`
+    do item correspondente sem interromper o restante do lote.
+    """
+    if len(lote.itens) > BATCH_MAX_ITEMS:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Ocorreu um erro interno ao processar sua solicitação."
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"O lote aceita no máximo {BATCH_MAX_ITEMS} itens."
         )
+    await enforce_rate_limit(token, [item.texto for item in lote.itens])
+
+    limite = lote.max_concorrencia or BATCH_CONCURRENCY_PER_PROVIDER
+    limite = max(1, min(limite, BATCH_MAX_CONCURRENCY_PER_PROVIDER))
+    semaforos = {}
+
+    async def processa(indice: int, item: MessageRequest) -> BatchItemResponse:
+        provider_name = config_manager.normalize_provider((item.provider or 'groq').lower())
+        semaforo = semaforos.setdefault(provider_name, asyncio.Semaphore(limite))
+        async with semaforo:
+            try:
+                resultado = await _executa_mensagem(item, endpoint="/chat/batch")
+                return BatchItemResponse(indice=indice, resposta=resultado.resposta, modelo=resultado.modelo)
+            except QueueFullError:
+                metrics.record_error("rate_limit", status.HTTP_429_TOO_MANY_REQUESTS)
+                return BatchItemResponse(indice=indice, erro=SecureErrorHandler.ERROR_MESSAGES["rate_limit"])
+            except Exception as e:
+                tipo = "invalid_input" if isinstance(e, (KeyError, ValueError)) else "api_error"
+                metrics.record_error(tipo, status.HTTP_500_INTERNAL_SERVER_ERROR)
+                SecureErrorHandler.handle_error(
+                    tipo,
+                    e,
+                    context={"provider": provider_name, "batch_index": indice},
+                    exit_code=0,
+                    show_hint=False
+                )
+                return BatchItemResponse(indice=indice, erro=SecureErrorHandler.ERROR_MESSAGES[tipo])
+
+    resultados = await asyncio.gather(*(processa(i, item) for i, item in enumerate(lote.itens)))
+    return BatchResponse(resultados=list(resultados))
+
+
+@app.post("/chat/stream")
+async def trata_mensagem_stream(req: MessageRequest, token: str = Depends(client_key)):
+    """Envia a resposta como Server-Sent Events: vários `delta` e um `done` final."""
+    await enforce_rate_limit(token, [req.texto])
+    try:
+        with timing.span("config"):
+            req = await _roteia(req)
+            provider_name, modelo, params = _resolve_request(req)
+            provider = provider_pool.get(provider_name)
+            admission_key, limits = config_manager.get_limits(provider_name, modelo)
+    except Exception as e:
+        raise _erro_interno(e)
+    labels = _metric_labels(req, provider_name, modelo)
+
+    # A vaga é reservada antes de responder, para que a fila cheia vire 429
+    try:
+        ticket = await admission.acquire(admission_key, limits)
+    except QueueFullError:
+        metrics.REQUESTS.inc(endpoint="/chat/stream", resultado="rejeitada", **labels)
+        raise
+    metrics.PHASE_SECONDS.observe(ticket.queue_wait, phase="queue", **labels)
+    timing.record("queue", ticket.queue_wait)
+    timings = timing.current()
+
+    async def primario():
+        # Mede o provider para o roteamento e libera a vaga assim que o stream termina ou perde o hedge
+        inicio = time.perf_counter()
+        ttft = None
+        try:
+            async for chunk in provider.astream_api(req.texto, modelo, params.pop("max_tokens"), **params):
+                if chunk.delta and ttft is None:
+                    ttft = time.perf_counter() - inicio
+                if chunk.done:
+                    await router.arecord(provider_name, modelo, latency=time.perf_counter() - inicio, ttft=ttft)
+                yield chunk
+        except Exception:
+            await router.arecord(provider_name, modelo, error=True)
+            raise
+        finally:
+            admission.release(ticket)
+
+    async def eventos():
+        inicio = time.perf_counter()
+        ttft_ms = None
+        resultado = "erro"
+        try:
+            politica = _politica_hedge(req, provider_name)
+            if politica is None:
+                fonte = primario()
+            else:
+                sec_name, sec_modelo, sec_params, _ = _resolve_secundario(req, politica)
+                fonte = hedged_stream(
+                    primario,
+                    lambda: _stream_admitido(sec_name, sec_modelo, sec_params, req.texto),
+                    politica["delay"],
+                    _registra_hedge(provider_name, sec_name),
+                )
+            async for chunk in fonte:
+                if chunk.delta:
+                    if ttft_ms is None:
+                        ttft_ms = round((time.perf_counter() - inicio) * 1000, 1)
+                        metrics.TTFT_SECONDS.observe(ttft_ms / 1000, **labels)
+                        timing.record("ttft", ttft_ms / 1000)
+                    yield _sse("delta", {"texto": chunk.delta})
+                if chunk.done:
+                    metrics.PHASE_SECONDS.observe(time.perf_counter() - inicio, phase="upstream", **labels)
+                    metrics.record_usage(chunk.usage, **labels)
+                    if ttft_ms is not None:
+                        timing.record("generation", time.perf_counter() - inicio - ttft_ms / 1000)
+                    resultado = "ok"
+                    yield _sse("done", {
+                        "modelo": chunk.model or modelo,
+                        "usage": chunk.usage,
+                        "ttft_ms": ttft_ms,
+                        "total_ms": round((time.perf_counter() - inicio) * 1000, 1),
+                        "timings": timings.as_dict() if timings else None,
+                    })
+        except Exception as e:
+            _erro_interno(e)
+            yield _sse("error", {"detail": "Ocorreu um erro interno ao processar sua solicitação."})
+        finally:
+            admission.release(ticket)
+            metrics.REQUESTS.inc(endpoint="/chat/stream", resultado=resultado, **labels)
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(admission.release, ticket),
+    )
+
+tts_providers = {}
+
+def _cria_tts(engine: str):
+    """Instancia o provider de TTS do engine (o Polly valida as credenciais na criação)."""
+    if engine == "openai":
+        from providers.openaiTTS_provider import OpenAIAudio
+        return OpenAIAudio(None)
+    if engine == "groq":
+        from providers.groqTTS_provider import GroqProviderTTS
+        return GroqProviderTTS()
+    from providers.AWSpolly_provider import AWSPollyProvider
+    return AWSPollyProvider()
+
+def _tts_provider(engine: str):
+    provider = tts_providers.get(engine)
+    if provider is None:
+        provider = tts_providers[engine] = _cria_tts(engine)
+    return provider
+
+def _tts_opcoes(req: TTSRequest) -> dict:
+    if req.engine == "polly":
+        opcoes = {"voice_id": req.voz, "engine": req.modelo}
+    else:
+        opcoes = {"voz": req.voz, "modelo": req.modelo}
+    return {nome: valor for nome, valor in opcoes.items() if valor}
+
+def _inicia_audio(req: TTSRequest):
+    """Prepara o gerador de áudio e já sintetiza o primeiro bloco (erros viram 500, não um corpo truncado)."""
+    provider = _tts_provider(req.engine)
+    partes = provider.stream_audio(req.texto, **_tts_opcoes(req))
+    return partes, next(partes, b"")
+
+
+@app.post("/tts")
+async def sintetiza_audio(req: TTSRequest, token: str = Depends(client_key)):
+    """Envia o áudio (MP3) em chunked transfer à medida que cada parte do texto é sintetizada."""
+    await enforce_rate_limit(token, [req.texto])
+    inicio = time.perf_counter()
+    try:
+        partes, primeiro = await asyncio.to_thread(_inicia_audio, req)
+    except Exception as e:
+        raise _erro_interno(e)
+    metrics.TTS_FIRST_BYTE_SECONDS.observe(time.perf_counter() - inicio, engine=req.engine)
+    timing.record("first_audio", time.perf_counter() - inicio)
+
+    def audio():
+        # Iterado pelo Starlette em threads: a síntese não bloqueia o event loop
+        try:
+            yield primeiro
+            yield from partes
+        except Exception as e:
+            # Os headers já foram enviados; o cliente recebe o áudio até onde deu
+            _erro_interno(e)
+        finally:
+            partes.close()
+
+    return StreamingResponse(
+        audio(),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+audio_pool = None
+
+def _audio_pool() -> ProcessPoolExecutor:
+    """Processos para a divisão/re-codificação do áudio (spawn: fork com as threads do servidor pode travar)."""
+    global audio_pool
+    if audio_pool is None:
+        audio_pool = ProcessPoolExecutor(
+            max_workers=TRANSCRIBE_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return audio_pool
+
+async def _divide_audio(caminho: str) -> List[str]:
+    from providers.openaiWhisper_provider import split_audio
+    return await asyncio.get_running_loop().run_in_executor(_audio_pool(), split_audio, caminho)
+
+def _transcreve_aws(provider, caminho: str, idioma: str) -> str:
+    bucket = config_manager.get_transcription_bucket(exit_on_missing=False)
+    formato = path.splitext(caminho)[1].lstrip(".").lower() or "mp3"
+    return provider.call_api(caminho, language_code=idioma, media_format=formato, bucket_name=bucket)
+
+async def _transcreve(pedido: dict) -> dict:
+    """Transcreve o upload salvo em disco e o remove no fim (usado direto e pelos jobs)."""
+    caminho = pedido["arquivo"]
+    segmentos = []
+    try:
+        if pedido["backend"] == "aws":
+            provider = provider_pool.get("aws")
+            with timing.span("transcription"):
+                texto = await asyncio.to_thread(_transcreve_aws, provider, caminho, pedido["idioma"])
+        else:
+            with timing.span("split"):
+                segmentos = await _divide_audio(caminho)
+            provider = provider_pool.get("whisper")
+            with timing.span("transcription"):
+                texto = await asyncio.to_thread(
+                    provider.transcribe_segments, segmentos, caminho, pedido.get("prompt"), pedido["modelo"]
+                )
+        return {"resposta": texto, "modelo": pedido["modelo"]}
+    finally:
+        if segmentos:
+            # Os segmentos que o provider não chegou a remover (falha antes ou no meio da transcrição)
+            from providers.openaiWhisper_provider import remove_segments
+            remove_segments(segmentos, caminho)
+        try:
+            remove(caminho)
+        except OSError:
+            pass
+
+async def _executa_job(pedido: dict) -> dict:
+    if pedido.get("tipo") == "transcricao":
+        return await _transcreve(pedido)
+    resultado = await _executa_mensagem(MessageRequest(**pedido), endpoint="/jobs")
+    return {"resposta": resultado.resposta, "modelo": resultado.modelo}
+
+
+async def _inicia_job_background(pedido: dict) -> Optional[dict]:
+    """Usa o modo background do provider (OpenAI Responses), se houver, em vez de um worker local."""
+    if pedido.get("tipo") == "transcricao":
+        return None
+    req = await _roteia(MessageRequest(**pedido))
+    provider_name, modelo, params = _resolve_request(req)
+    provider = provider_pool.get(provider_name)
+    if not provider.supports_background:
+        return None
+    background_id = await provider.astart_background(req.texto, modelo, params.pop("max_tokens"), **params)
+    return {"provider": provider_name, "background_id": background_id, "modelo": modelo}
+
+
+async def _consulta_job_background(job: dict) -> Optional[dict]:
+    situacao, texto = await provider_pool.get(job["provider"]).apoll_background(job["background_id"])
+    if situacao == "completed":
+        return {"resposta": texto, "modelo": job["modelo"]}
+    if situacao in ("queued", "in_progress"):
+        return None
+    raise Exception(f"Resposta em background terminou com status {situacao}: {texto}")
+
+
+job_manager = JobManager(
+    JobStore(getenv("MINHAIA_JOBS_DB")),
+    _executa_job,
+    start_background=_inicia_job_background,
+    poll_background=_consulta_job_background,
+)
+
+
+async def _valida_webhook(webhook: Optional[str]):
+    """Recusa webhooks que não sejam http(s) públicos (o servidor faria o POST na rede interna)."""
+    recusa = await asyncio.to_thread(webhook_error, webhook) if webhook else None
+    if recusa:
+        raise HTTPException(status_code=422, detail=recusa)
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def cria_job(req: JobRequest, token: str = Depends(client_key)):
+    """Enfileira a mensagem e devolve o id do job na hora (útil para modelos O demorados)."""
+    await enforce_rate_limit(token, [req.texto])
+    await _valida_webhook(req.webhook)
+    pedido = req.model_dump(exclude={"webhook"})
+    return public_view(await job_manager.submit(pedido, req.webhook, dono=_dono(token)))
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def consulta_job(job_id: str, token: str = Depends(client_key)):
+    job = await asyncio.to_thread(job_manager.store.get, job_id)
+    if job is None or job["dono"] != _dono(token):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job não encontrado.")
+    return public_view(job)
+
+
+@app.post("/transcribe", response_model=TranscriptionResponse)
+async def transcreve_audio(
+    request: Request,
+    backend: Literal["whisper", "aws"] = "whisper",
+    capacidade: Optional[str] = None,
+    idioma: str = "pt-BR",
+    prompt: Optional[str] = None,
+    nome: Optional[str] = None,
+    assincrono: bool = False,
+    webhook: Optional[str] = None,
+    token: str = Depends(client_key),
+):
+    """Transcreve o áudio enviado (multipart com um arquivo ou o áudio no corpo).
+
+    O upload é gravado em disco enquanto chega; com `assincrono=true` a
+    resposta é um job (202) consultado em GET /jobs/{id}.
+    """
+    await enforce_rate_limit(token, [prompt or ""])
+    await _valida_webhook(webhook)
+    max_bytes = TRANSCRIBE_MAX_UPLOAD_MB * 1024 * 1024
+    if int(request.headers.get("content-length") or 0) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Arquivo acima de {TRANSCRIBE_MAX_UPLOAD_MB} MB.")
+
+    diretorio = path.join(_resolve_cache_dir(), "uploads")
+    makedirs(diretorio, exist_ok=True)
+    try:
+        with timing.span("upload"):
+            upload = await receive_upload(
+                request.stream(), request.headers.get("content-type", ""), diretorio, max_bytes, nome
+            )
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"Arquivo acima de {TRANSCRIBE_MAX_UPLOAD_MB} MB.")
+    except UploadError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if backend == "aws":
+        modelo = "transcribe"
+    else:
+        modelo = config_manager.get_model_config(ConfigManager.capacidade_args(capacidade), "whisper")[0]
+    pedido = {"tipo": "transcricao", "arquivo": upload.caminho, "backend": backend,
+              "modelo": modelo, "idioma": idioma, "prompt": prompt}
+    print(f"Transcrição: {upload.nome} ({upload.tamanho} bytes) com {backend}/{modelo}", file=sys.stderr)
+    labels = {"provider": backend, "model": modelo, "capacidade": (capacidade or "default").lower()}
+
+    if assincrono:
+        job = await job_manager.submit(pedido, webhook, dono=_dono(token))
+        metrics.REQUESTS.inc(endpoint="/transcribe", resultado="job", **labels)
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=public_view(job))
+
+    inicio = time.perf_counter()
+    try:
+        resultado = await _transcreve(pedido)
+    except Exception as e:
+        metrics.REQUESTS.inc(endpoint="/transcribe", resultado="erro", **labels)
+        raise _erro_interno(e)
+    metrics.PHASE_SECONDS.observe(time.perf_counter() - inicio, phase="upstream", **labels)
+    metrics.REQUESTS.inc(endpoint="/transcribe", resultado="ok", **labels)
+    return TranscriptionResponse(transcricao=resultado["resposta"], modelo=modelo, backend=backend)
+
+
+session_store = SessionStore(getenv("MINHAIA_SESSIONS_DB"))
+
+def _dono(token: str) -> str:
+    """Identifica o dono da sessão ou do job sem gravar a chave de API no banco."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+def _ws_token(websocket: WebSocket) -> str:
+    """Autentica pelo header Authorization ou por ?token= (navegadores não enviam headers no WebSocket)."""
+    esquema, _, valor = websocket.headers.get("authorization", "").partition(" ")
+    if esquema.lower() != "bearer":
+        valor = websocket.query_params.get("token")
+    credenciais = HTTPAuthorizationCredentials(scheme="Bearer", credentials=valor) if valor else None
+    return client_key(credenciais)
+
+def _sessao_do_dono(sessao_id: str, token: str) -> dict:
+    sessao = session_store.get(sessao_id)
+    if sessao is None or sessao["dono"] != _dono(token):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sessão não encontrada.")
+    return sessao
+
+async def _turno_sessao(websocket: WebSocket, sessao: dict, dados: dict, token: str):
+    """Um turno da conversa: histórico do store, stream de deltas e gravação do par pergunta/resposta."""
+    texto = (dados.get("texto") or "").strip()
+    if not texto:
+        await websocket.send_json({"tipo": "erro", "detail": "Mensagem vazia."})
+        return
+    try:
+        await enforce_rate_limit(token, [texto])
+    except HTTPException as e:
+        await websocket.send_json({"tipo": "erro", "detail": e.detail, "retry_after": int(e.headers["Retry-After"])})
+        return
+
+    req = MessageRequest(
+        texto=texto,
+        provider=dados.get("provider") or sessao["provider"] or "groq",
+        capacidade=dados.get("capacidade") or sessao["capacidade"],
+        persona=sessao["persona"],
+    )
+    resultado = "erro"
+    labels = {}
+    try:
+        req = await _roteia(req)
+        provider_name, modelo, params = _resolve_request(req)
+        labels = _metric_labels(req, provider_name, modelo)
+        provider = provider_pool.get(provider_name)
+        historico = await asyncio.to_thread(session_store.history, sessao["id"])
+        envio = req.texto
+        if provider.supports_history:
+            params["history"] = historico
+        else:
+            envio = flatten_history(historico, req.texto)
+        admission_key, limits = config_manager.get_limits(provider_name, modelo)
+
+        partes = []
+        inicio = time.perf_counter()
+        ttft_ms = None
+        usage = None
+        async with admission.admit(admission_key, limits) as ticket:
+            metrics.PHASE_SECONDS.observe(ticket.queue_wait, phase="queue", **labels)
+            try:
+                async for chunk in provider.astream_api(envio, modelo, params.pop("max_tokens"), **params):
+                    if chunk.delta:
+                        if ttft_ms is None:
+                            ttft_ms = round((time.perf_counter() - inicio) * 1000, 1)
+                            metrics.TTFT_SECONDS.observe(ttft_ms / 1000, **labels)
+                        partes.append(chunk.delta)
+                        await websocket.send_json({"tipo": "delta", "texto": chunk.delta})
+                    if chunk.done:
+                        usage = chunk.usage
+            except WebSocketDisconnect:
+                raise
+            except Exception:
+                await router.arecord(provider_name, modelo, error=True)
+                raise
+        duracao = time.perf_counter() - inicio
+        await router.arecord(provider_name, modelo, latency=duracao, ttft=ttft_ms / 1000 if ttft_ms else None)
+        metrics.PHASE_SECONDS.observe(duracao, phase="upstream", **labels)
+        metrics.record_usage(usage, **labels)
+
+        resposta = "".join(partes)
+        await asyncio.to_thread(session_store.append_turn, sessao["id"], texto, resposta)
+        resultado = "ok"
+        await websocket.send_json({
+            "tipo": "done",
+            "modelo": modelo,
+            "usage": usage,
+            "ttft_ms": ttft_ms,
+            "total_ms": round(duracao * 1000, 1),
+        })
+    except QueueFullError as e:
+        resultado = "rejeitada"
+        await websocket.send_json({
+            "tipo": "erro",
+            "detail": SecureErrorHandler.ERROR_MESSAGES["rate_limit"],
+            "retry_after": e.retry_after,
+        })
+    except WebSocketDisconnect:
+        raise
+    except Exception as e:
+        _erro_interno(e)
+        await websocket.send_json({"tipo": "erro", "detail": "Ocorreu um erro interno ao processar sua solicitação."})
+    finally:
+        if labels:
+            metrics.REQUESTS.inc(endpoint="/ws/session", resultado=resultado, **labels)
+
+
+@app.websocket("/ws/session")
+async def sessao_websocket(websocket: WebSocket, session_id: Optional[str] = None, provider: Optional[str] = None,
+                           capacidade: Optional[str] = None, persona: Optional[str] = None):
+    """Conversa multi-turno: o servidor guarda o histórico e devolve os deltas de cada resposta.
+
+    Cada mensagem do cliente é um JSON {"texto": ...} (provider e capacidade
+    opcionais por turno). Sem `session_id` uma nova sessão é criada e seu id
+    vem no primeiro evento, {"tipo": "sessao"}.
+    """
+    try:
+        token = _ws_token(websocket)
+        if session_id:
+            sessao = await asyncio.to_thread(_sessao_do_dono, session_id, token)
+        else:
+            sessao = await asyncio.to_thread(session_store.create, provider, capacidade, persona, _dono(token))
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    historico = await asyncio.to_thread(session_store.history, sessao["id"])
+    await websocket.send_json({"tipo": "sessao", "id": sessao["id"], "mensagens": len(historico)})
+    try:
+        while True:
+            bruto = await websocket.receive_text()
+            try:
+                dados = json.loads(bruto)
+            except ValueError:
+                dados = None
+            if not isinstance(dados, dict):
+                await websocket.send_json({"tipo": "erro", "detail": "Envie um JSON como {\"texto\": \"...\"}."})
+                continue
+            await _turno_sessao(websocket, sessao, dados, token)
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/sessions/{session_id}", response_model=SessionResponse)
+async def consulta_sessao(session_id: str, token: str = Depends(client_key)):
+    sessao = await asyncio.to_thread(_sessao_do_dono, session_id, token)
+    mensagens = await asyncio.to_thread(session_store.history, session_id)
+    campos = ("id", "provider", "capacidade", "criado_em", "atualizado_em")
+    return SessionResponse(mensagens=mensagens, **{campo: sessao[campo] for campo in campos})
+
+
+@app.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_sessao(session_id: str, token: str = Depends(client_key)):
+    await asyncio.to_thread(_sessao_do_dono, session_id, token)
+    await asyncio.to_thread(session_store.delete, session_id)
+
+
+@app.get("/health")
+async def health():
+    """Liveness: o processo está de pé e atendendo."""
+    return {"status": "ok"}
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: 200 só depois do aquecimento e antes do desligamento."""
+    pronto = prontidao["pronto"] and not prontidao["drenando"]
+    corpo = {
+        "status": "ready" if pronto else ("draining" if prontidao["drenando"] else "starting"),
+        "providers": prontidao["providers"],
+        "conectados": prontidao["conectados"],
+    }
+    return JSONResponse(corpo, status_code=status.HTTP_200_OK if pronto else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+@app.get("/cache/stats")
+async def estatisticas_cache(token: str = Depends(validate_token)):
+    """Contadores do cache de respostas e das requisições agrupadas em voo."""
+    return {**response_cache.stats(), "coalesced": single_flight.coalesced}
+
+@app.get("/metrics")
+async def exporta_metricas(token: str = Depends(validate_token)):
+    """Métricas no formato texto do Prometheus."""
+    # Com store, render() publica e lê o SQLite compartilhado: roda numa thread
+    texto = await asyncio.to_thread(metrics.registry.render) if shared_state else metrics.registry.render()
+    return PlainTextResponse(texto, media_type=metrics.MetricsRegistry.CONTENT_TYPE)
+
+def _server_options(log_level: str, drain_timeout: float) -> dict:
+    """Usa uvloop/httptools quando instalados e só registra acessos em debug."""
+    loop = "uvloop" if find_spec("uvloop") else "asyncio"
+    http = "httptools" if find_spec("httptools") else "h11"
+    print(f"Servidor: loop={loop}, http={http}, log={log_level}, drenagem={drain_timeout:g}s", file=sys.stderr)
+    return {"loop": loop, "http": http, "log_level": log_level, "access_log": log_level == "debug",
+            "timeout_graceful_shutdown": drain_timeout}
 
 # Função para disponibilizar a API de texto
-def start_text_api(host, port, secure=False, log_level="debug"):
+def start_text_api(host, port, secure=False, log_level="info", workers=1, drain_timeout=None):
     try:
         import uvicorn
         global AUTH_ENABLED
         AUTH_ENABLED = secure
-        uvicorn.run(app, host=host, port=port, reload=False, log_level=log_level)
+        if drain_timeout is not None:
+            # Também vale para os workers e para a espera dos jobs no lifespan
+            environ["MINHAIA_DRAIN_TIMEOUT"] = str(drain_timeout)
+        options = _server_options(log_level, _drain_timeout())
+        if workers and workers > 1:
+            # Cada worker importa API:app do zero, então a configuração vai pelo ambiente
+            environ["MINHAIA_API_SECURE"] = "1" if secure else "0"
+            store = SharedStateStore(environ.get("MINHAIA_SHARED_STATE"))
+            store.reset()
+            store.close()
+            environ["MINHAIA_SHARED_STATE"] = store.path
+            uvicorn.run("API:app", host=host, port=port, workers=workers,
+                        app_dir=path.dirname(path.abspath(__file__)), **options)
+        else:
+            uvicorn.run(app, host=host, port=port, reload=False, **options)
     except Exception as e:
         SecureErrorHandler.handle_error(
             "API",
@@ -0,0 +1,221 @@
+"""
+Daemon local da CLI: mantém SDKs importados e clientes aquecidos num
+processo em background, atendendo o `chat` por um socket Unix
+
+Protocolo: o cliente envia uma linha JSON {"argv", "cwd", "isatty"}
+e recebe linhas JSON {"o": texto} (stdout), {"e": texto} (stderr) e, no fim,
+{"exit": código}. {"comando": "parar"} encerra o daemon.
+"""
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Optional
+
+from utils.cache import _resolve_cache_dir
+
+
+def socket_path() -> str:
+    return os.getenv("MINHAIA_DAEMON_SOCKET") or os.path.join(_resolve_cache_dir(), "daemon.sock")
+
+
+def _conecta(path: str) -> Optional[socket.socket]:
+    if not os.path.exists(path):
+        return None
+    conexao = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conexao.connect(path)
+    except OSError:
+        conexao.close()
+        return None
+    return conexao
+
+
+def run_remote(argv, path: Optional[str] = None) -> Optional[int]:
+    """Executa a CLI no daemon e repassa a saída; None quando o daemon não está no ar"""
+    conexao = _conecta(path or socket_path())
+    if conexao is None:
+        return None
+    saida, erro = sys.stdout, sys.stderr
+    pedido = {"argv": list(argv), "cwd": os.getcwd(), "isatty": saida.isatty()}
+    with conexao, conexao.makefile("rwb") as canal:
+        canal.write(json.dumps(pedido).encode("utf-8") + b"\n")
+        canal.flush()
+        for linha in canal:
+            quadro = json.loads(linha)
+            if "exit" in quadro:
+                return quadro["exit"]
+            destino = saida if "o" in quadro else erro
+            destino.write(quadro.get("o", quadro.get("e", "")))
+            destino.flush()
+    print("Erro: o daemon encerrou a conexão antes do fim da execução", file=erro)
+    return 1
+
+
+def stop(path: Optional[str] = None) -> int:
+    """Pede ao daemon para encerrar"""
+    conexao = _conecta(path or socket_path())
+    if conexao is None:
+        print("Daemon não está em execução", file=sys.stderr)
+        return 1
+    with conexao:
+        conexao.sendall(json.dumps({"comando": "parar"}).encode("utf-8") + b"\n")
+    return 0
+
+
+class _Canal(io.TextIOBase):
+    """stdout/stderr de uma execução remota: cada escrita vira um quadro JSON no socket"""
+
+    def __init__(self, arquivo, chave: str, tty: bool = False):
+        self.arquivo = arquivo
+        self.chave = chave
+        self.tty = tty
+
+    @property
+    def encoding(self):
+        return "utf-8"
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return self.tty
+
+    def write(self, texto):
+        if texto:
+            self.arquivo.write(json.dumps({self.chave: texto}).encode("utf-8") + b"\n")
+            self.arquivo.flush()
+        return len(texto)
+
+
+class _PoolFactory:
+    """ProviderFactory que devolve as instâncias aquecidas do ProviderPool.
+
+    Providers com estado por chamada (assistant) ou que não são de chat
+    continuam sendo criados a cada execução.
+    """
+
+    def __init__(self, pool, factory):
+        self.pool = pool
+        self.factory = factory
+
+    def create_provider(self, provider_name: str):
+        if provider_name in self.pool.NON_CHAT_PROVIDERS or provider_name == "assistant":
+            return self.factory.create_provider(provider_name)
+        return self.pool.get(provider_name)
+
+    def get_available_providers(self):
+        return self.factory.get_available_providers()
+
+
+def _codigo_saida(e: SystemExit) -> int:
+    if e.code is None or isinstance(e.code, int):
+        return e.code or 0
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        linha = self.rfile.readline()
+        if not linha:
+            return
+        pedido = json.loads(linha)
+        if pedido.get("comando") == "parar":
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        saida = _Canal(self.wfile, "o", tty=bool(pedido.get("isatty")))
+        erro = _Canal(self.wfile, "e")
+        try:
+            codigo = self.server.executa(pedido, saida, erro)
+            self.wfile.write(json.dumps({"exit": codigo}).encode("utf-8") + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # cliente desconectou (Ctrl+C no terminal)
+
+
+class CLIDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Servidor do daemon: uma execução da CLI por vez, com o mesmo AIController.
+
+    As execuções são serializadas porque usam o diretório atual, sys.argv e
+    sys.stdout/stderr do processo; o ganho vem de pular o cold start, não
+    de atender vários terminais em paralelo.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str, controller):
+        self.path = path
+        self.controller = controller
+        self._lock = threading.Lock()
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o600)
+
+    def executa(self, pedido: dict, saida, erro) -> int:
+        from utils.argumentos import CLIArgumentParser
+
+        with self._lock:
+            originais = (sys.argv, sys.stdout, sys.stderr, os.getcwd())
+            try:
+                os.chdir(pedido.get("cwd") or originais[3])
+                sys.argv = ["main.py", *pedido.get("argv", [])]
+                sys.stdout, sys.stderr = saida, erro
+                try:
+                    self.controller.run(CLIArgumentParser().parse_args())
+                    return 0
+                except SystemExit as e:
+                    return _codigo_saida(e)
+                except (BrokenPipeError, ConnectionResetError):
+                    raise
+                except Exception as e:
+                    print(f"Erro: {e}", file=sys.stderr)
+                    return 1
+            finally:
+                sys.argv, sys.stdout, sys.stderr = originais[:3]
+                os.chdir(originais[3])
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def serve(controller, path: Optional[str] = None) -> int:
+    """Aquece os providers do controller e atende o socket até SIGTERM, Ctrl+C ou --daemon-stop"""
+    from providers.pool import ProviderPool
+
+    path = path or socket_path()
+    ativo = _conecta(path)
+    if ativo is not None:
+        ativo.close()
+        print(f"Daemon já está em execução em {path}", file=sys.stderr)
+        return 1
+    if os.path.exists(path):
+        os.remove(path)  # socket órfão de um daemon que não encerrou direito
+
+    inicio = time.perf_counter()
+    pool = ProviderPool(controller.provider_factory)
+    controller.provider_factory = _PoolFactory(pool, controller.provider_factory)
+    prontos = pool.warm(controller.config_manager.get_warm_providers())
+    conectados = pool.preconnect(prontos)
+    print(f"Providers aquecidos: {', '.join(prontos) or 'nenhum'} "
+          f"(conectados: {', '.join(conectados) or 'nenhum'}, {time.perf_counter() - inicio:.2f}s)", file=sys.stderr)
+
+    servidor = CLIDaemon(path, controller)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=servidor.shutdown, daemon=True).start())
+    print(f"Daemon da CLI ouvindo em {path}", file=sys.stderr)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        for provider in pool.instances().values():
+            provider.close()
+    return 0
@@ -1,7 +1,22 @@
 import json
+import os
 import sys
 from pathlib import Path
-from typing import Dict, Any, Tuple
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Tuple
+
+from constants import (
+    DEFAULT_PROVIDER_LIMITS,
+    DEFAULT_HEDGE_DELAY,
+    ROUTER_EWMA_ALPHA,
+    ROUTER_EXPLORATION,
+    ROUTER_PROBE_SECONDS,
+    SIMULATED_DEFAULTS,
+    HTTP_DEFAULTS,
+    OPENAI_COMPATIBLE_DEFAULTS,
+    OPENAI_COMPATIBLE_TYPE,
+    RESILIENCE_DEFAULTS,
+)
 
 
 class ConfigManager:
@@ -14,6 +29,7 @@ class ConfigManager:
     
     def __init__(self):
         self._models_config = None
+        self._auto_candidates = {}
         self._config_path = Path(__file__).parent.parent.parent / "config" / "models.json"
     
     def load_models_config(self) -> Dict[str, Any]:
@@ -27,13 +43,16 @@ class ConfigManager:
                 sys.exit(1)
         return self._models_config
 
-    def get_transcription_bucket(self) -> str:
+    def get_transcription_bucket(self, exit_on_missing: bool = True) -> str:
         """Return the bucket name configured for AWS Transcribe"""
         models_config = self.load_models_config()
         try:
             return models_config['aws']['models']['transcribe']['bucket_name']
         except KeyError:
-            print("Erro: Configuração de bucket para AWS Transcribe não encontrada em config/models.json", file=sys.stderr)
+            mensagem = "Configuração de bucket para AWS Transcribe não encontrada em config/models.json"
+            if not exit_on_missing:
+                raise ValueError(mensagem)
+            print(f"Erro: {mensagem}", file=sys.stderr)
             sys.exit(1)
 
     def normalize_provider(self, provider: str) -> str:
@@ -80,11 +99,151 @@ class ConfigManager:
             config.get('temperature', 0.7),
         )
     
-    def list_available_models(self) -> None:
-        """Print all available models"""
+    def get_limits(self, provider: str, model: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """Return the admission key and limits for a provider (or one of its models).
+
+        Limits declared on a model tier override the provider ones, which in
+        turn override DEFAULT_PROVIDER_LIMITS.
+        """
+        provider = self.normalize_provider(provider)
+        provider_config = self.load_models_config().get(provider, {})
+        limits = {**DEFAULT_PROVIDER_LIMITS, **provider_config.get('limits', {})}
+
+        if model:
+            for tier in provider_config.get('models', {}).values():
+                if tier.get('model') == model and 'limits' in tier:
+                    return f"{provider}:{model}", {**limits, **tier['limits']}
+        return provider, limits
+
+    @staticmethod
+    def capacidade_args(capacidade: Optional[str]) -> SimpleNamespace:
+        """Create a lightweight args object selecting a tier by name (fast, cheap, ...)."""
+        capa = (capacidade or 'default').lower()
+        return SimpleNamespace(
+            transcribe=False,
+            fast=capa == 'fast',
+            cheap=capa == 'cheap',
+            smart=capa == 'smart',
+            smartest=capa == 'smartest',
+            absurdo=capa == 'absurdo',
+            model=None,
+            max_tokens=None
+        )
+
+    def get_hedge_policy(self, provider: str) -> Optional[Dict[str, Any]]:
+        """Return the "hedge" block of a provider (secondary, capacidade, delay, enabled) or None."""
+        provider = self.normalize_provider(provider)
+        policy = self.load_models_config().get(provider, {}).get('hedge')
+        if not policy or not policy.get('secondary'):
+            return None
+        return {
+            'secondary': self.normalize_provider(policy['secondary']),
+            'capacidade': policy.get('capacidade'),
+            'delay': float(policy.get('delay', DEFAULT_HEDGE_DELAY)),
+            'enabled': bool(policy.get('enabled', False)),
+        }
+
+    def get_hedge_target(self, policy: Dict[str, Any], args) -> Tuple[str, Tuple[str, int, bool, float]]:
+        """Resolve the secondary provider and its model config for a hedge policy.
+
+        Without an explicit "capacidade" the secondary uses the same tier
+        selected for the primary.
+        """
+        if policy.get('capacidade'):
+            args = self.capacidade_args(policy['capacidade'])
+        return policy['secondary'], self.get_model_config(args, policy['secondary'])
+
+    def get_auto_policy(self) -> Dict[str, Any]:
+        """Return the "auto" routing settings (exploration, EWMA alpha and probe interval)."""
+        auto = self.load_models_config().get('auto', {})
+        return {
+            'exploration': float(auto.get('exploration', ROUTER_EXPLORATION)),
+            'alpha': float(auto.get('alpha', ROUTER_EWMA_ALPHA)),
+            'probe_seconds': float(auto.get('probe_seconds', ROUTER_PROBE_SECONDS)),
+        }
+
+    def get_warm_providers(self) -> List[str]:
+        """Providers to warm up on start: MINHAIA_WARM_PROVIDERS or every provider with models."""
+        warm_list = os.getenv('MINHAIA_WARM_PROVIDERS')
+        if warm_list:
+            return [self.normalize_provider(name.strip()) for name in warm_list.split(',') if name.strip()]
+        return [name for name, config in self.load_models_config().items() if 'models' in config]
+
+    def get_compatible_providers(self) -> Dict[str, Dict[str, Any]]:
+        """Return the providers declared as "type": "openai_compatible" in models.json.
+
+        Each entry carries base_url, api_key_env, streaming and stream_usage
+        (OPENAI_COMPATIBLE_DEFAULTS for the missing ones) plus its model tiers.
+        """
+        return {
+            name: {**OPENAI_COMPATIBLE_DEFAULTS, **config}
+            for name, config in self.load_models_config().items()
+            if config.get('type') == OPENAI_COMPATIBLE_TYPE and config.get('base_url') and 'models' in config
+        }
+
+    def get_http_settings(self, provider: str) -> Dict[str, Any]:
+        """Return the HTTP transport settings of a provider (HTTP_DEFAULTS plus its "http" block)."""
+        provider = self.normalize_provider(provider)
+        return {**HTTP_DEFAULTS, **self.load_models_config().get(provider, {}).get('http', {})}
+
+    def get_resilience_settings(self, provider: str) -> Dict[str, Any]:
+        """Return the retry and circuit breaker settings of a provider (RESILIENCE_DEFAULTS plus its "resilience" block)."""
+        provider = self.normalize_provider(provider)
+        return {**RESILIENCE_DEFAULTS, **self.load_models_config().get(provider, {}).get('resilience', {})}
+
+    def get_simulation_settings(self) -> Dict[str, Any]:
+        """Return the settings of the simulated provider.
+
+        SIMULATED_DEFAULTS, then the "simulation" block of models.json, then
+        the JSON in MINHAIA_SIMULATED (handy for load tests without editing the file).
+        """
+        settings = {**SIMULATED_DEFAULTS, **self.load_models_config().get('simulated', {}).get('simulation', {})}
+        override = os.getenv('MINHAIA_SIMULATED')
+        if override:
+            try:
+                settings.update(json.loads(override))
+            except ValueError as e:
+                print(f"Aviso: MINHAIA_SIMULATED inválido, ignorado: {e}", file=sys.stderr)
+        return settings
+
+    def get_auto_candidates(self, capacidade: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """Return (provider, capacidade, model) for each entry of the "auto" pool.
+
+        Entries without "capacidade" use the one requested. The result is
+        memoized per capacidade, since models.json is only read once.
+        """
+        capacidade = (capacidade or 'default').lower()
+        if capacidade not in self._auto_candidates:
+            candidates = []
+            for entry in self.load_models_config().get('auto', {}).get('pool', []):
+                provider = self.normalize_provider(entry['provider'])
+                capa = (entry.get('capacidade') or capacidade).lower()
+                model, _, _, _ = self.get_model_config(self.capacidade_args(capa), provider)
+                candidates.append((provider, capa, model))
+            self._auto_candidates[capacidade] = candidates
+        return self._auto_candidates[capacidade]
+
+    def list_available_models(self, breaker_states: Optional[Dict[str, dict]] = None) -> None:
+        """Print all available models, with the circuit breaker state of those not closed"""
         models_config = self.load_models_config()
+        breaker_states = breaker_states or {}
         print("\n=== Modelos Disponíveis ===")
         for provider, config in models_config.items():
             print(f"\n{provider.upper()}:")
+            if 'models' not in config:
+                for entry in config.get('pool', []):
+                    print(f"  {entry['provider']} ({entry.get('capacidade', 'capacidade pedida')})")
+                continue
             for alias, model_config in config['models'].items():
-                print(f"  {alias}: {model_config['model']} ({model_config['description']})")
+                estado = breaker_states.get(f"{provider}:{model_config['model']}")
+                print(f"  {alias}: {model_config['model']} ({model_config['description']})"
+                      f"{self._breaker_label(estado)}")
+
+    @staticmethod
+    def _breaker_label(estado: Optional[dict]) -> str:
+        """Suffix shown by --list-models for a circuit that is open or half-open"""
+        if not estado or estado['estado'] == 'closed':
+            return ""
+        if estado['estado'] == 'open':
+            return f" [circuito aberto, nova tentativa em {estado['reabre_em_s']:.0f}s]"
+        return " [circuito semiaberto: a próxima chamada testa o provider]"
@@ -33,3 +33,110 @@ VOICE_MAPPING = {
         "male": ["Matthew", "Justin", "Kevin"]
     }
 }
+
+# Limites do endpoint /chat/batch
+BATCH_MAX_ITEMS = 500
+BATCH_CONCURRENCY_PER_PROVIDER = 4
+BATCH_MAX_CONCURRENCY_PER_PROVIDER = 16
+
+# Cache de respostas (CLI e API)
+CACHE_TTL_SECONDS = 24 * 60 * 60
+CACHE_MAX_MEMORY_ENTRIES = 256
+CACHE_MAX_DISK_ENTRIES = 5000
+
+# Controle de admissão da API (sobrescrito por "limits" em config/models.json)
+DEFAULT_PROVIDER_LIMITS = {
+    "max_in_flight": 16,
+    "max_queue": 64,
+    "queue_timeout": 30,
+}
+
+# Limite de taxa padrão por chave de API no modo --secure
+DEFAULT_KEY_RATE_LIMIT = {
+    "rps": 5,
+    "burst": 10,
+    "tpm": 100000,
+}
+
+# Buckets (segundos) dos histogramas de latência em /metrics
+METRICS_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Modo multi-worker da API: intervalo (segundos) de publicação das métricas de cada worker
+METRICS_PUBLISH_INTERVAL = 1.0
+
+# Hedging entre providers (sobrescrito por "hedge" em config/models.json)
+DEFAULT_HEDGE_DELAY = 2.0
+
+# Roteamento automático (provider "auto"; sobrescrito por "auto" em config/models.json)
+ROUTER_EWMA_ALPHA = 0.2
+ROUTER_EXPLORATION = 0.1
+ROUTER_MAX_ERROR_RATE = 0.5
+# Segundos sem tráfego até um candidato com erro receber uma sondagem
+ROUTER_PROBE_SECONDS = 60.0
+
+# Jobs assíncronos da API (/jobs)
+JOBS_MAX_WORKERS = 4
+JOBS_POLL_INTERVAL = 5.0
+JOBS_WEBHOOK_ATTEMPTS = 3
+
+# Streaming de áudio da API (/tts)
+TTS_STREAM_FIRST_CHUNK = 200     # caracteres da primeira parte (primeiro áudio mais cedo)
+TTS_STREAM_PREFETCH = 2          # partes sintetizadas antecipadamente enquanto a atual é enviada
+TTS_STREAM_CHUNK_BYTES = 16384
+
+# Transcrição pela API (/transcribe)
+TRANSCRIBE_MAX_UPLOAD_MB = 500
+TRANSCRIBE_PROCESS_WORKERS = 2   # processos para dividir/re-codificar áudio (pydub + ffmpeg)
+
+# Sessões multi-turno da API (/ws/session): mensagens do histórico enviadas ao provider
+SESSION_MAX_HISTORY_MESSAGES = 40
+
+# Inicialização e desligamento da API
+WARMUP_CONNECT_TIMEOUT = 5.0     # segundos para abrir a conexão antecipada com cada provider
+API_DRAIN_TIMEOUT = 30.0         # segundos para as requisições em andamento terminarem após o SIGTERM
+
+# Provider simulado (testes de carga): sobrescrito por "simulation" em models.json e por MINHAIA_SIMULATED
+SIMULATED_DEFAULTS = {
+    "ttft_median_ms": 300,       # mediana do tempo até o primeiro token (distribuição log-normal)
+    "ttft_sigma": 0.5,           # dispersão da log-normal (0 = latência fixa)
+    "tokens_per_second": 80,
+    "output_tokens": 60,
+    "error_rate": 0.0,           # fração de chamadas que falham com 500
+    "rate_limit_rate": 0.0,      # fração de chamadas recusadas com 429
+    "retry_after": 1,
+    "seed": None,
+}
+
+# Transporte HTTP dos SDKs (utils/http_clients.py): sobrescrito pelo bloco "http" de cada provider em models.json
+HTTP_DEFAULTS = {
+    "connect_timeout": 5.0,
+    "read_timeout": 120.0,       # entre bytes recebidos; em streaming, entre chunks
+    "write_timeout": 30.0,
+    "pool_timeout": 10.0,        # espera por uma conexão livre no pool
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 60.0,
+    "http2": True,               # só com o pacote h2 instalado; o servidor negocia via ALPN
+}
+
+# Providers genéricos ("type": "openai_compatible" em models.json): llama.cpp, vLLM, Ollama e afins
+OPENAI_COMPATIBLE_TYPE = "openai_compatible"
+OPENAI_COMPATIBLE_DEFAULTS = {
+    "api_key_env": None,   # servidores locais normalmente não pedem chave
+    "streaming": True,
+    "stream_usage": True,  # envia stream_options.include_usage; desligue se o servidor rejeitar
+}
+# Chave enviada quando o provider não declara api_key_env (o SDK exige uma)
+OPENAI_COMPATIBLE_PLACEHOLDER_KEY = "sk-no-key-required"
+
+# Resiliência das chamadas (utils/resilience.py): sobrescrito pelo bloco "resilience" de cada provider em models.json
+RESILIENCE_DEFAULTS = {
+    "max_attempts": 3,          # tentativas por chamada, contando a primeira
+    "backoff_base": 0.5,        # espera antes da 2ª tentativa; dobra a cada nova (com jitter)
+    "backoff_max": 8.0,
+    "deadline": 30.0,           # nenhuma nova tentativa depois de tantos segundos desde a primeira
+    "failure_threshold": 0.5,   # fração de falhas na janela que abre o disjuntor
+    "min_calls": 5,             # chamadas na janela antes de avaliar a fração
+    "window": 20,               # últimas chamadas consideradas por provider+modelo
+    "open_seconds": 30.0,       # tempo aberto antes de liberar uma chamada de sondagem
+}
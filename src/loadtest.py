@@ -0,0 +1,189 @@
+"""
+Gerador de carga para a API (--online): dispara /chat, /chat/stream ou
+/chat/batch numa taxa alvo e mede vazão, latência e tempo até o primeiro token
+
+Uso (com o servidor no ar e o provider simulado, que não usa rede):
+    python src/loadtest.py --endpoint stream --rps 50 --duration 30 --out run.json
+    python src/loadtest.py --endpoint chat --rps 50 --compare run.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+ENDPOINTS = {"chat": "/chat", "stream": "/chat/stream", "batch": "/chat/batch"}
+
+
+def percentiles(valores: List[float]) -> Optional[Dict[str, float]]:
+    """p50/p95/p99, média e máximo (em ms) pelo método nearest-rank"""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+
+    def rank(p):
+        indice = max(0, min(len(ordenados) - 1, int(-(-p * len(ordenados) // 100)) - 1))
+        return round(ordenados[indice], 1)
+
+    return {
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "media": round(sum(ordenados) / len(ordenados), 1),
+        "max": round(ordenados[-1], 1),
+    }
+
+
+def _corpo(args, indice: int) -> dict:
+    item = {"texto": f"{args.texto} #{indice}", "provider": args.provider, "capacidade": args.capacidade,
+            "cache": False}
+    if args.endpoint == "batch":
+        return {"itens": [{**item, "texto": f"{item['texto']}.{i}"} for i in range(args.batch_size)]}
+    return item
+
+
+async def _requisicao(client: httpx.AsyncClient, args, indice: int, agendado: float) -> dict:
+    """Uma requisição; os tempos contam a partir do horário agendado (sem omissão coordenada)"""
+    resultado = {"status": None, "latencia_ms": None, "ttft_ms": None, "itens": 0, "itens_erro": 0}
+    try:
+        if args.endpoint == "stream":
+            async with client.stream("POST", ENDPOINTS["stream"], json=_corpo(args, indice)) as resposta:
+                resultado["status"] = resposta.status_code
+                evento = None
+                async for linha in resposta.aiter_lines():
+                    if linha.startswith("event: "):
+                        evento = linha[len("event: "):]
+                        if evento == "delta" and resultado["ttft_ms"] is None:
+                            resultado["ttft_ms"] = (time.perf_counter() - agendado) * 1000
+                        elif evento == "error":
+                            resultado["status"] = "stream_error"
+        else:
+            resposta = await client.post(ENDPOINTS[args.endpoint], json=_corpo(args, indice))
+            resultado["status"] = resposta.status_code
+            if args.endpoint == "batch" and resposta.status_code == 200:
+                itens = resposta.json()["resultados"]
+                resultado["itens"] = len(itens)
+                resultado["itens_erro"] = sum(1 for item in itens if item.get("erro"))
+    except httpx.HTTPError as e:
+        resultado["status"] = type(e).__name__
+    resultado["latencia_ms"] = (time.perf_counter() - agendado) * 1000
+    if args.endpoint == "chat" and resultado["status"] == 200:
+        resultado["ttft_ms"] = resultado["latencia_ms"]
+    return resultado
+
+
+async def run_load(args, transport: Optional[httpx.AsyncBaseTransport] = None) -> dict:
+    """Carga em malha aberta: a requisição i sai em inicio + i/rps, com ou sem resposta das anteriores.
+
+    `transport` permite apontar o gerador direto para o app ASGI (httpx.ASGITransport).
+    """
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limites = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    total = max(1, int(args.rps * args.duration))
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limites,
+                                 timeout=args.timeout, transport=transport) as client:
+        inicio = time.perf_counter()
+        tarefas = []
+        for indice in range(total):
+            agendado = inicio + indice / args.rps
+            espera = agendado - time.perf_counter()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            tarefas.append(asyncio.create_task(_requisicao(client, args, indice, agendado)))
+        resultados = await asyncio.gather(*tarefas)
+        duracao = time.perf_counter() - inicio
+    return summarize(args, resultados, duracao)
+
+
+def summarize(args, resultados: List[dict], duracao: float) -> dict:
+    sucessos = [r for r in resultados if r["status"] == 200]
+    relatorio = {
+        "config": {chave: getattr(args, chave) for chave in
+                   ("url", "endpoint", "provider", "capacidade", "rps", "duration", "batch_size")},
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "duracao_s": round(duracao, 2),
+        "requisicoes": len(resultados),
+        "sucessos": len(sucessos),
+        "status": dict(Counter(str(r["status"]) for r in resultados)),
+        "vazao_rps": round(len(sucessos) / duracao, 2) if duracao else 0.0,
+        "latencia_ms": percentiles([r["latencia_ms"] for r in sucessos]),
+        "ttft_ms": percentiles([r["ttft_ms"] for r in sucessos if r["ttft_ms"] is not None]),
+    }
+    if args.endpoint == "batch":
+        itens = sum(r["itens"] for r in sucessos)
+        relatorio["itens"] = itens
+        relatorio["itens_erro"] = sum(r["itens_erro"] for r in sucessos)
+        relatorio["itens_por_s"] = round(itens / duracao, 2) if duracao else 0.0
+    return relatorio
+
+
+def compare(atual: dict, base: dict, tolerancia: float = 0.1) -> List[str]:
+    """Regressões do relatório atual em relação a `base` (piora maior que `tolerancia`)"""
+    regressoes = []
+    for metrica in ("latencia_ms", "ttft_ms"):
+        for p in ("p50", "p95", "p99"):
+            antes = (base.get(metrica) or {}).get(p)
+            agora = (atual.get(metrica) or {}).get(p)
+            if antes and agora and agora > antes * (1 + tolerancia):
+                regressoes.append(f"{metrica}.{p}: {antes} -> {agora} (+{100 * (agora / antes - 1):.0f}%)")
+    antes, agora = base.get("vazao_rps"), atual.get("vazao_rps")
+    if antes and agora is not None and agora < antes * (1 - tolerancia):
+        regressoes.append(f"vazao_rps: {antes} -> {agora} ({100 * (agora / antes - 1):.0f}%)")
+    return regressoes
+
+
+def _imprime(relatorio: dict):
+    print(f"{relatorio['requisicoes']} requisições em {relatorio['duracao_s']}s, "
+          f"{relatorio['sucessos']} com sucesso ({relatorio['vazao_rps']} req/s)")
+    print(f"status: {relatorio['status']}")
+    for metrica in ("latencia_ms", "ttft_ms"):
+        valores = relatorio.get(metrica)
+        if valores:
+            print(f"{metrica:<12} " + "  ".join(f"{nome}={valor}" for nome, valor in valores.items()))
+    if "itens_por_s" in relatorio:
+        print(f"itens: {relatorio['itens']} ({relatorio['itens_por_s']}/s, {relatorio['itens_erro']} com erro)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga da API (use --provider simulated para medir só o servidor)")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Endereço da API")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="chat")
+    parser.add_argument("--rps", type=float, default=10, help="Requisições por segundo (alvo)")
+    parser.add_argument("--duration", type=float, default=10, help="Duração da carga em segundos")
+    parser.add_argument("--provider", default="simulated")
+    parser.add_argument("--capacidade", default="fast")
+    parser.add_argument("--texto", default="Teste de carga")
+    parser.add_argument("--batch-size", type=int, default=10, help="Itens por requisição em --endpoint batch")
+    parser.add_argument("--token", help="Chave da API (modo --secure)")
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--out", help="Grava o relatório em JSON neste arquivo")
+    parser.add_argument("--compare", help="Relatório JSON anterior; sai com código 1 se houver regressão")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Piora aceita no --compare (0.1 = 10%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    relatorio = asyncio.run(run_load(args))
+    _imprime(relatorio)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        print(f"Relatório salvo em {args.out}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressoes = compare(relatorio, json.load(f), args.tolerance)
+        for regressao in regressoes:
+            print(f"Regressão: {regressao}", file=sys.stderr)
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
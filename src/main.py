@@ -1,4 +1,7 @@
+import os
 import sys
+import time
+import asyncio
 from pathlib import Path
 
 # Adiciona o diretório src ao path
@@ -9,7 +12,13 @@ from config.manager import ConfigManager
 from processors.message_processor import MessageProcessor
 from utils.argumentos import CLIArgumentParser
 from utils.handlers import ResponseHandler as handler
-from API import start_text_api
+from utils.cache import ResponseCache
+from utils.hedging import hedged_call
+from utils.router import LatencyRouter
+from utils.shared_state import SharedStateStore
+from utils.error_handler import SecureErrorHandler
+from utils.resilience import CircuitOpenError, breakers
+from utils import timing
 
 
 class AIController:
@@ -19,15 +28,125 @@ class AIController:
         self.config_manager = ConfigManager()
         self.message_processor = MessageProcessor()
         self.provider_factory = ProviderFactory()
+        self.response_cache = ResponseCache()
+        self.shared_state = SharedStateStore()
+        # Disjuntores persistidos: uma execução da CLI já sabe que o provider está fora
+        breakers.attach_store(self.shared_state)
+        self._router = None
+
+    @property
+    def router(self):
+        """Roteador do provider auto, com as médias persistidas entre execuções"""
+        if self._router is None:
+            self._router = LatencyRouter(**self.config_manager.get_auto_policy(), store=self.shared_state)
+        return self._router
     
     def handle_list_models(self, args):
         """Handle --list-models command"""
         if args.list_models:
-            self.config_manager.list_available_models()
+            self.config_manager.list_available_models(breakers.states())
             sys.exit(0)
     
+    def _cache_key(self, args, provider_name: str, mensagem: str, modelo: str, max_tokens: int, temperature: float):
+        """Chave do cache para a chamada, ou None quando ela não deve ser cacheada"""
+        if provider_name in ('whisper', 'dryrun', 'assistant') or getattr(args, 'persistent', None):
+            return None
+        if not ResponseCache.is_cacheable(temperature, opt_in=getattr(args, 'cache', False),
+                                          bypass=getattr(args, 'no_cache', False)):
+            return None
+        return ResponseCache.make_key(provider_name, modelo, args.persona, temperature, max_tokens, mensagem)
+
+    def route_auto(self, args):
+        """Troca o provider 'auto' pelo candidato mais rápido do pool (e sua capacidade)"""
+        capacidade = next((c for c in ('fast', 'cheap', 'smart', 'smartest', 'absurdo') if getattr(args, c, False)), None)
+        candidatos = self.config_manager.get_auto_candidates(capacidade)
+        (provider_name, modelo), motivo = self.router.choose([(p, m) for p, _, m in candidatos])
+        capacidade = next(c for p, c, m in candidatos if (p, m) == (provider_name, modelo))
+        print(f"Auto: {provider_name}/{modelo} ({motivo})", file=sys.stderr)
+        for tier in ('fast', 'cheap', 'smart', 'smartest', 'absurdo'):
+            setattr(args, tier, tier == capacidade)
+        args.provider = provider_name
+
+    def _track(self, provider_name: str, modelo: str, call):
+        """Executa a chamada registrando latência e erros para o roteamento automático"""
+        if provider_name in ('whisper', 'dryrun', 'assistant'):
+            return call()
+        inicio = time.perf_counter()
+        try:
+            response = call()
+        except Exception:
+            self.router.record(provider_name, modelo, error=True)
+            raise
+        if isinstance(response, str):
+            self.router.record(provider_name, modelo, latency=time.perf_counter() - inicio)
+            return response
+        if response is not None:
+            return self.router.track_stream(provider_name, modelo, response)
+        return response
+
     def process_api_call(self, args, provider_name: str, mensagem: str, modelo: str, max_tokens: int, is_o_model: bool, temperature: float):
-        """Process API call based on provider and arguments"""
+        """Process API call, serving from the response cache when possible"""
+        cache_key = self._cache_key(args, provider_name, mensagem, modelo, max_tokens, temperature)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                print("Resposta obtida do cache", file=sys.stderr)
+                return cached
+
+        response = None
+        with timing.span("upstream"):
+            response = self._call_upstream(args, provider_name, mensagem, modelo, max_tokens, is_o_model, temperature)
+        if response is not None and not isinstance(response, str):
+            response = timing.timed_stream(response)
+
+        if cache_key:
+            if isinstance(response, str):
+                self.response_cache.set(cache_key, response)
+            elif response is not None:
+                response = self.response_cache.wrap_stream(cache_key, response)
+        return response
+
+    def _call_upstream(self, args, provider_name: str, mensagem: str, modelo: str, max_tokens: int, is_o_model: bool, temperature: float):
+        """Chamada ao provider (com hedge, se pedido); streams só começam a ser lidos na saída"""
+        response = None
+        if getattr(args, 'hedge', False):
+            response = self.call_hedged(args, provider_name, mensagem, modelo, max_tokens, is_o_model, temperature)
+        if response is None:
+            response = self._track(provider_name, modelo, lambda: self.call_provider(
+                args, provider_name, mensagem, modelo, max_tokens, is_o_model, temperature
+            ))
+        return response
+
+    def call_hedged(self, args, provider_name: str, mensagem: str, modelo: str, max_tokens: int, is_o_model: bool, temperature: float):
+        """Call the provider with hedging/failover to its "hedge" secondary (None when not applicable)"""
+        if provider_name in ('whisper', 'dryrun', 'assistant') or getattr(args, 'persistent', None):
+            return None
+        policy = self.config_manager.get_hedge_policy(provider_name)
+        if not policy or policy['secondary'] == provider_name:
+            print(f"Aviso: {provider_name} não tem política de hedge em config/models.json", file=sys.stderr)
+            return None
+
+        sec_name, (sec_modelo, sec_max_tokens, sec_is_o_model, sec_temperature) = \
+            self.config_manager.get_hedge_target(policy, args)
+        primary = self.provider_factory.create_provider(provider_name)
+        secondary = self.provider_factory.create_provider(sec_name)
+        print(f"Enviando para {provider_name.upper()} (hedge: {sec_name.upper()} após {policy['delay']}s)...", file=sys.stderr)
+
+        def evento(nome):
+            print(f"Hedge {provider_name} -> {sec_name}: {nome}", file=sys.stderr)
+
+        _, resposta = asyncio.run(hedged_call(
+            lambda: primary.acall_api(mensagem, modelo, max_tokens, is_o_model=is_o_model,
+                                      persona=args.persona, temperature=temperature),
+            lambda: secondary.acall_api(mensagem, sec_modelo, sec_max_tokens, is_o_model=sec_is_o_model,
+                                        persona=args.persona, temperature=sec_temperature),
+            policy['delay'],
+            evento,
+        ))
+        return resposta
+
+    def call_provider(self, args, provider_name: str, mensagem: str, modelo: str, max_tokens: int, is_o_model: bool, temperature: float):
+        """Call the provider selected by the arguments"""
         print(f"Enviando para {provider_name.upper()}...", file=sys.stderr)
         if is_o_model:
             print("Aviso: Modelos O podem levar mais tempo para processar respostas complexas", file=sys.stderr)
@@ -40,7 +159,8 @@ class AIController:
             return mensagem
         elif provider_name == 'openai':
             provider = self.provider_factory.create_provider('openai')
-            return provider.call_api(
+            call = provider.stream_api if handler.supports_streaming(args) else provider.call_api
+            return call(
                 mensagem,
                 modelo,
                 max_tokens,
@@ -63,13 +183,26 @@ class AIController:
         else:
             # Handle other providers
             provider = self.provider_factory.create_provider(provider_name)
-            return provider.call_api(mensagem, modelo, max_tokens, persona=args.persona, temperature=temperature)
+            call = provider.stream_api if handler.supports_streaming(args) else provider.call_api
+            return call(mensagem, modelo, max_tokens, persona=args.persona, temperature=temperature)
     
     def run(self, args):
         """Main execution method"""
+        if not getattr(args, 'timings', False):
+            return self._run(args)
+        with timing.capture_timings() as timings:
+            try:
+                self._run(args)
+            finally:
+                print(f"\nTempos por etapa (--timings):\n{timings.table()}", file=sys.stderr)
+
+    def _run(self, args):
         # Handle list models command
         self.handle_list_models(args)
-        args.provider = self.config_manager.normalize_provider(args.provider)
+        with timing.span("config"):
+            args.provider = self.config_manager.normalize_provider(args.provider)
+            if args.provider == 'auto':
+                self.route_auto(args)
         
         # Handle transcription if requested
         self.message_processor.handle_transcription(args, args.provider, self.config_manager)
@@ -81,17 +214,27 @@ class AIController:
         mensagem = self.message_processor.validate_message(mensagem, args)
         
         # Get model configuration
-        modelo, max_tokens, is_o_model, temperature = self.config_manager.get_model_config(args, args.provider)
+        with timing.span("config"):
+            modelo, max_tokens, is_o_model, temperature = self.config_manager.get_model_config(args, args.provider)
         
         # Override max_tokens if specified
         if args.max_tokens:
             max_tokens = args.max_tokens
         
-        # Process API call
-        response = self.process_api_call(args, args.provider, mensagem, modelo, max_tokens, is_o_model, temperature)
-        
-        # Process response
-        handler.process_response(response, args)
+        try:
+            # Process API call
+            response = self.process_api_call(args, args.provider, mensagem, modelo, max_tokens, is_o_model, temperature)
+
+            # Process response
+            with timing.span("post"):
+                handler.process_response(response, args)
+        except CircuitOpenError as e:
+            SecureErrorHandler.handle_error("circuit_open", e, context={"provider": args.provider, "model": modelo})
+        except Exception as e:
+            # Esgotadas as novas tentativas; o provider normalmente já mostrou a mensagem
+            if SecureErrorHandler.was_reported(e):
+                sys.exit(1)
+            SecureErrorHandler.handle_error("api_error", e, context={"provider": args.provider, "model": modelo})
 
 
 def main():
@@ -105,11 +248,35 @@ def main():
     parser.add_argument('--host', type=str, help='Host para a API (default: 0.0.0.0)')
     parser.add_argument('--port', type=int, help='Porta para a API (default: 8000)')
     parser.add_argument('--secure', action='store_true', help='Usa chaves de API para autenticação')
+    parser.add_argument('--workers', type=int, default=1, help='Processos da API (default: 1)')
+    parser.add_argument('--log-level', type=str, default='info',
+                        choices=['critical', 'error', 'warning', 'info', 'debug'],
+                        help='Nível de log do servidor (default: info)')
+    parser.add_argument('--drain-timeout', type=float, default=None,
+                        help='Segundos para concluir requisições em andamento ao desligar')
+    parser.add_argument('--daemon', action='store_true', help='Inicia o daemon local da CLI')
+    parser.add_argument('--daemon-stop', action='store_true', help='Encerra o daemon local da CLI')
     args, _ = parser.parse_known_args()
 
     if args.online:
-        start_text_api(args.host or '0.0.0.0', args.port or 8000, args.secure)
+        # FastAPI/pydantic só são carregados no modo servidor
+        from API import start_text_api
+        start_text_api(args.host or '0.0.0.0', args.port or 8000, args.secure,
+                       log_level=args.log_level, workers=args.workers,
+                       drain_timeout=args.drain_timeout)
+    elif args.daemon:
+        import cli_daemon
+        sys.exit(cli_daemon.serve(AIController()))
+    elif args.daemon_stop:
+        import cli_daemon
+        sys.exit(cli_daemon.stop())
     else:
+        # Com o daemon no ar, a execução acontece nele (sem cold start); senão, aqui mesmo
+        if os.getenv('MINHAIA_DAEMON', '1') != '0':
+            import cli_daemon
+            codigo = cli_daemon.run_remote(sys.argv[1:])
+            if codigo is not None:
+                sys.exit(codigo)
         # CLI tradicional
         cli_parser = CLIArgumentParser()
         args = cli_parser.parse_args()
@@ -1,5 +1,6 @@
 import sys
 from utils.handlers import ResponseHandler as handler
+from utils import timing
 
 
 class MessageProcessor:
@@ -12,16 +13,19 @@ class MessageProcessor:
         
         # Process code file
         if args.codigo:
-            codigo = handler.processar_arquivo_codigo(args.codigo)
+            with timing.span("arquivo"):
+                codigo = handler.processar_arquivo_codigo(args.codigo)
             mensagem = f"{mensagem}\n\n### Código fornecido:\n{codigo}"
         
         # Process text file
         if args.texto:
-            mensagem = f"{mensagem}\n{handler.processar_arquivo_codigo(args.texto)}"
+            with timing.span("arquivo"):
+                mensagem = f"{mensagem}\n{handler.processar_arquivo_codigo(args.texto)}"
         
         # Process PDF file
         if args.pdf:
-            pdf_content = handler.processar_arquivo_pdf(args.pdf)
+            with timing.span("pdf"):
+                pdf_content = handler.processar_arquivo_pdf(args.pdf)
             mensagem = f"{mensagem}\n\n### Conteúdo do PDF:\n{pdf_content}"
         
         return mensagem
@@ -13,9 +13,13 @@ from constants import (
     DEFAULT_OUTPUT_FORMAT,
     DEFAULT_SAMPLE_RATE,
     DEFAULT_LANGUAGE_CODE,
-    VOICE_MAPPING
+    VOICE_MAPPING,
+    TTS_STREAM_FIRST_CHUNK,
+    TTS_STREAM_CHUNK_BYTES,
 )
-from utils.text_utils import limpar_texto_para_audio, dividir_texto_inteligente
+from utils.audio_stream import transmitir_partes
+from utils.http_clients import botocore_config
+from utils.text_utils import limpar_texto_para_audio, dividir_texto_inteligente, dividir_para_streaming
 
 
 class AWSPollyProvider():
@@ -29,7 +33,7 @@ class AWSPollyProvider():
         """Inicializa e retorna o cliente AWS Polly"""
         try:
             # Tenta criar o cliente com as credenciais configuradas
-            polly_client = boto3.client('polly', region_name='us-west-2')
+            polly_client = boto3.client('polly', region_name='us-west-2', config=botocore_config("aws"))
             
             # Testa se as credenciais estão funcionando
             polly_client.describe_voices(LanguageCode='pt-BR')
@@ -187,16 +191,14 @@ class AWSPollyProvider():
                         print(f"    - {arquivo}", file=sys.stderr)
                 return False
 
-    def _gerar_audio_parte_polly(self,texto, nome_arquivo, voice_id, engine, 
-                                language_code, polly_client):
-        """Função auxiliar para gerar uma parte do áudio usando AWS Polly"""
+    def _sintetizar_polly(self, texto, voice_id, engine, language_code, polly_client):
+        """Chama synthesize_speech com SSML, caindo para a engine standard ou texto puro se preciso"""
+        # Prepara o texto em formato SSML
+        ssml_text = self.criar_ssml_texto(texto)
+
         try:
-            # Prepara o texto em formato SSML
-            ssml_text = self.criar_ssml_texto(texto)
-            
-            # Solicita a síntese de voz
             try:
-                response = polly_client.synthesize_speech(
+                return polly_client.synthesize_speech(
                     Text=ssml_text,
                     TextType='ssml',
                     OutputFormat=DEFAULT_OUTPUT_FORMAT,
@@ -209,7 +211,7 @@ class AWSPollyProvider():
                 # Se falhar com neural engine, tenta com standard
                 if engine == 'neural' and 'Neural' in str(e):
                     print(f"[⚠️] Engine neural não disponível, usando standard", file=sys.stderr)
-                    response = polly_client.synthesize_speech(
+                    return polly_client.synthesize_speech(
                         Text=ssml_text,
                         TextType='ssml',
                         OutputFormat=DEFAULT_OUTPUT_FORMAT,
@@ -217,9 +219,30 @@ class AWSPollyProvider():
                         Engine='standard',
                         SampleRate=DEFAULT_SAMPLE_RATE
                     )
-                else:
-                    raise e
-            
+                raise e
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'InvalidSsmlException':
+                raise
+            print(f"[✗] Erro de SSML: {e.response['Error']['Message']}", file=sys.stderr)
+            print("[🔄] Tentando sem formatação SSML...", file=sys.stderr)
+
+            # Tenta novamente sem SSML
+            return polly_client.synthesize_speech(
+                Text=texto,
+                TextType='text',
+                OutputFormat=DEFAULT_OUTPUT_FORMAT,
+                VoiceId=voice_id,
+                Engine=engine,
+                SampleRate=DEFAULT_SAMPLE_RATE,
+                LanguageCode=language_code
+            )
+
+    def _gerar_audio_parte_polly(self,texto, nome_arquivo, voice_id, engine, 
+                                language_code, polly_client):
+        """Função auxiliar para gerar uma parte do áudio usando AWS Polly"""
+        try:
+            response = self._sintetizar_polly(texto, voice_id, engine, language_code, polly_client)
+
             # Salva o arquivo de áudio
             with open(nome_arquivo, 'wb') as f:
                 f.write(response['AudioStream'].read())
@@ -230,39 +253,32 @@ class AWSPollyProvider():
         except ClientError as e:
             error_code = e.response['Error']['Code']
             error_message = e.response['Error']['Message']
-            
-            if error_code == 'InvalidSsmlException':
-                print(f"[✗] Erro de SSML: {error_message}", file=sys.stderr)
-                print("[🔄] Tentando sem formatação SSML...", file=sys.stderr)
-                
-                # Tenta novamente sem SSML
-                try:
-                    response = polly_client.synthesize_speech(
-                        Text=texto,
-                        TextType='text',
-                        OutputFormat=DEFAULT_OUTPUT_FORMAT,
-                        VoiceId=voice_id,
-                        Engine=engine,
-                        SampleRate=DEFAULT_SAMPLE_RATE,
-                        LanguageCode=language_code
-                    )
-                    
-                    with open(nome_arquivo, 'wb') as f:
-                        f.write(response['AudioStream'].read())
-                    
-                    print(f"[✓] Áudio salvo (sem SSML): {nome_arquivo}", file=sys.stderr)
-                    return nome_arquivo
-                except Exception as e2:
-                    print(f"[✗] Erro ao gerar áudio sem SSML: {e2}", file=sys.stderr)
-                    return False
-            else:
-                print(f"[✗] Erro AWS Polly: {error_code} - {error_message}", file=sys.stderr)
-                return False
+            print(f"[✗] Erro AWS Polly: {error_code} - {error_message}", file=sys.stderr)
+            return False
                 
         except Exception as e:
             print(f"[✗] Erro ao gerar áudio: {e}", file=sys.stderr)
             return False
 
+    def stream_audio(self, texto, voice_id=DEFAULT_VOICE_ID, engine=DEFAULT_ENGINE,
+                     language_code=DEFAULT_LANGUAGE_CODE):
+        """Devolve um gerador com os bytes MP3 do texto, parte a parte, sem gravar arquivos"""
+        partes = dividir_para_streaming(limpar_texto_para_audio(texto), 2900, TTS_STREAM_FIRST_CHUNK)
+        if not partes:
+            raise Exception("Erro: Texto vazio após limpeza")
+        return transmitir_partes(
+            partes, lambda parte: self._stream_parte(parte, voice_id, engine, language_code)
+        )
+
+    def _stream_parte(self, texto, voice_id, engine, language_code):
+        """Repassa os bytes de uma parte à medida que são lidos do AudioStream"""
+        response = self._sintetizar_polly(texto, voice_id, engine, language_code, self.polly)
+        stream = response['AudioStream']
+        try:
+            yield from stream.iter_chunks(TTS_STREAM_CHUNK_BYTES)
+        finally:
+            stream.close()
+
     def listar_vozes_disponiveis(self,language_code=None):
         """Lista as vozes disponíveis no AWS Polly"""
         try:
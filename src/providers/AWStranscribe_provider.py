@@ -8,6 +8,7 @@ import boto3
 import requests
 from botocore.exceptions import ClientError
 from .base import BaseProvider
+from utils.http_clients import botocore_config
 
 class AWSTranscribeProvider(BaseProvider):
     """ Classe para transcrição de áudio usando AWS Transcribe"""
@@ -19,8 +20,8 @@ class AWSTranscribeProvider(BaseProvider):
         self.default_language = "pt-BR"
         self.default_media_format = "mp3"
         # Clientes AWS
-        self.s3_client = boto3.client('s3')
-        self.transcribe_client = boto3.client('transcribe')
+        self.s3_client = boto3.client('s3', config=botocore_config("aws"))
+        self.transcribe_client = boto3.client('transcribe', config=botocore_config("aws"))
 
     def call_api(self,audio_file_path, language_code="pt-BR", media_format="mp3", bucket_name=None):
         """
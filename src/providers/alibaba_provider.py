@@ -1,20 +1,53 @@
 import os
 import sys
-from openai import OpenAI
-from .base import BaseProvider
+from openai import OpenAI, AsyncOpenAI
+from .base import BaseProvider, StreamChunk
+from .openai_compat import ChatCompletionsAsyncMixin
 from constants import DEFAULT_SYSTEM_PROMPT
+from utils.http_clients import sdk_options
 
 
-class Qwen3Provider(BaseProvider):
+class Qwen3Provider(ChatCompletionsAsyncMixin, BaseProvider):
     """Provider para Qwen (Alibaba) API usando a interface compatível com OpenAI"""
 
+    provider_label = "qwen"
+    api_key_env = "QWEN_API_KEY"
+    base_url = "https://dashscope-intl.aliyuncs.com/compatible-mode/v1"
+
     def __init__(self):
         super().__init__(api_key=os.getenv('QWEN_API_KEY'))
         self.client = OpenAI(
             api_key=self.api_key,
-            base_url="https://dashscope-intl.aliyuncs.com/compatible-mode/v1"
+            base_url=self.base_url,
+            **sdk_options("qwen")
         ) if self.api_key else None
 
+    def _create_async_client(self):
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                           **sdk_options("qwen", asynchronous=True))
+
+    async def acall_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
+        if is_o_model:
+            print("Aviso: Modelos O não são suportados pelo Qwen", file=sys.stderr)
+            return "Modelos O não são suportados pelo provider Qwen"
+        return await super().acall_api(message, model, max_tokens, **kwargs)
+
+    def stream_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
+        if not self.api_key:
+            raise Exception("Erro: Variável de ambiente QWEN_API_KEY não encontrada")
+        if is_o_model:
+            yield from BaseProvider.stream_api(self, message, model, max_tokens, is_o_model=is_o_model, **kwargs)
+            return
+        yield from super().stream_api(message, model, max_tokens, **kwargs)
+
+    async def astream_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
+        if is_o_model:
+            yield StreamChunk(delta="Modelos O não são suportados pelo provider Qwen")
+            yield StreamChunk(done=True, model=model)
+            return
+        async for chunk in super().astream_api(message, model, max_tokens, **kwargs):
+            yield chunk
+
     def call_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
         if not self.api_key:
             raise Exception("Erro: Variável de ambiente QWEN_API_KEY não encontrada")
@@ -38,9 +71,10 @@ class Qwen3Provider(BaseProvider):
             )
             nerd_stats = response.usage
             print(f"Estatísticas para Nerds: {str(nerd_stats)}")
+            self._report_usage(nerd_stats)
             return response.choices[0].message.content
         except Exception as e:
-            raise Exception(f"Erro na chamada da API Qwen: {e}")
+            raise Exception(f"Erro na chamada da API Qwen: {e}") from e
 
     def get_available_models(self):
         """Retorna modelos disponíveis"""
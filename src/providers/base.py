@@ -1,10 +1,88 @@
 import sys
+import asyncio
+import inspect
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from constants import WARMUP_CONNECT_TIMEOUT
+
+
+@dataclass
+class StreamChunk:
+    """Fragmento de resposta em streaming; o último (done=True) traz modelo e uso"""
+    delta: str = ""
+    done: bool = False
+    model: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None
+
+
+def usage_to_dict(usage) -> Optional[Dict[str, Any]]:
+    """Normaliza os objetos de uso dos SDKs para input_tokens/output_tokens"""
+    if usage is None:
+        return None
+    chaves = ("input_tokens", "prompt_tokens", "prompt_token_count",
+              "output_tokens", "completion_tokens", "candidates_token_count")
+    if not isinstance(usage, dict):
+        if hasattr(usage, "model_dump"):
+            usage = usage.model_dump()
+        else:
+            # Objetos simples ou protobuf (xai_sdk)
+            usage = {chave: getattr(usage, chave, None) for chave in chaves}
+
+    def _first(*keys):
+        for key in keys:
+            if usage.get(key) is not None:
+                return usage[key]
+        return 0
+
+    return {
+        "input_tokens": _first("input_tokens", "prompt_tokens", "prompt_token_count"),
+        "output_tokens": _first("output_tokens", "completion_tokens", "candidates_token_count"),
+    }
+
+
+# Destino do uso de tokens informado pela chamada em andamento (ver capture_usage)
+_usage_atual: ContextVar[Optional[Dict[str, Any]]] = ContextVar("minhaia_usage", default=None)
+
+
+@contextmanager
+def capture_usage():
+    """Coleta o uso de tokens reportado pelos providers dentro do bloco.
+
+    O dicionário é compartilhado (e não substituído), então o valor também
+    chega quando a chamada roda em outra task ou em asyncio.to_thread.
+    """
+    destino: Dict[str, Any] = {}
+    token = _usage_atual.set(destino)
+    try:
+        yield destino
+    finally:
+        _usage_atual.reset(token)
+
+
+def flatten_history(history, message) -> str:
+    """Junta o histórico [{"role", "content"}] e a nova mensagem num único texto.
+
+    Usado com providers que não aceitam o histórico como mensagens separadas.
+    """
+    if not history:
+        return message
+    papeis = {"user": "Usuário", "assistant": "Assistente"}
+    turnos = "\n\n".join(f"{papeis.get(m['role'], m['role'])}: {m['content']}" for m in history)
+    return f"Histórico da conversa:\n\n{turnos}\n\nUsuário: {message}"
 
 
 class BaseProvider(ABC):
     """Classe base abstrata para providers de IA sem dependências externas"""
 
+    # Providers que processam a requisição do lado deles (ver astart_background)
+    supports_background = False
+    # Providers que aceitam history=[{"role", "content"}] como mensagens anteriores
+    supports_history = False
+
     def __init__(self, api_key=None):
         self.api_key = api_key
 
@@ -13,6 +91,104 @@ class BaseProvider(ABC):
         """Método unificado para chamar a API do provider"""
         pass
 
+    def stream_api(self, message, model, max_tokens, **kwargs):
+        """Gera StreamChunk com os deltas de texto conforme chegam.
+
+        A implementação padrão devolve a resposta completa num único delta,
+        para providers sem suporte a streaming.
+        """
+        texto = self.call_api(message, model, max_tokens, **kwargs)
+        if texto:
+            yield StreamChunk(delta=texto)
+        yield StreamChunk(done=True, model=model)
+
+    async def acall_api(self, message, model, max_tokens, **kwargs):
+        """Versão assíncrona de call_api.
+
+        Providers com cliente assíncrono nativo sobrescrevem este método. Os
+        demais executam call_api numa thread para não bloquear o event loop.
+        """
+        return await asyncio.to_thread(self.call_api, message, model, max_tokens, **kwargs)
+
+    async def astream_api(self, message, model, max_tokens, **kwargs):
+        """Versão assíncrona de stream_api (delta único com a resposta de acall_api)"""
+        texto = await self.acall_api(message, model, max_tokens, **kwargs)
+        if texto:
+            yield StreamChunk(delta=texto)
+        yield StreamChunk(done=True, model=model)
+
+    def _report_usage(self, usage):
+        """Repassa o uso de tokens da resposta para capture_usage, se houver"""
+        destino = _usage_atual.get()
+        dados = usage_to_dict(usage)
+        if destino is not None and dados:
+            destino.update(dados)
+
+    def warmup(self):
+        """Cria antecipadamente os clientes usados pelo provider (no-op por padrão)"""
+        return None
+
+    async def apreconnect(self, timeout: float = WARMUP_CONNECT_TIMEOUT) -> bool:
+        """Abre antecipadamente a conexão (DNS e TLS) do cliente assíncrono com a API.
+
+        Qualquer resposta HTTP serve: o que importa é a conexão ficar no pool
+        para a primeira requisição real. Só clientes que expõem o httpx
+        (`_client`) e a `base_url`, como os dos SDKs OpenAI/Anthropic/Groq,
+        são aquecidos; os demais são ignorados.
+        """
+        import httpx
+
+        async_client = getattr(self, "async_client", None)
+        http = getattr(async_client, "_client", None)
+        base_url = getattr(async_client, "base_url", None)
+        if not isinstance(http, httpx.AsyncClient) or base_url is None:
+            return False
+        try:
+            await http.head(str(base_url), timeout=timeout)
+        except httpx.HTTPError as e:
+            print(f"Aviso: {type(self).__name__} não abriu conexão antecipada: {e}", file=sys.stderr)
+            return False
+        return True
+
+    def preconnect(self, timeout: float = WARMUP_CONNECT_TIMEOUT) -> bool:
+        """Versão de apreconnect para o cliente síncrono (`client`), usado pela CLI"""
+        import httpx
+
+        client = getattr(self, "client", None)
+        http = getattr(client, "_client", None)
+        base_url = getattr(client, "base_url", None)
+        if not isinstance(http, httpx.Client) or base_url is None:
+            return False
+        try:
+            http.head(str(base_url), timeout=timeout)
+        except httpx.HTTPError as e:
+            print(f"Aviso: {type(self).__name__} não abriu conexão antecipada: {e}", file=sys.stderr)
+            return False
+        return True
+
+    def close(self):
+        """Fecha as conexões mantidas pelo cliente síncrono"""
+        client = getattr(self, "client", None)
+        close = getattr(client, "close", None)
+        if close and not inspect.iscoroutinefunction(close):
+            try:
+                close()
+            except Exception as e:
+                print(f"Aviso: falha ao fechar cliente de {type(self).__name__}: {e}", file=sys.stderr)
+
+    async def aclose(self):
+        """Fecha clientes assíncronos e síncronos do provider"""
+        async_client = getattr(self, "async_client", None)
+        close = getattr(async_client, "close", None) or getattr(async_client, "aclose", None)
+        if close:
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"Aviso: falha ao fechar cliente assíncrono de {type(self).__name__}: {e}", file=sys.stderr)
+        self.close()
+
     @abstractmethod
     def get_available_models(self):
         """Retorna os modelos disponíveis para este provider"""
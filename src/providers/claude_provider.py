@@ -2,18 +2,36 @@ import os
 import sys
 from typing import Any, Dict, Tuple
 
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
 
-from .base import BaseProvider
+from .base import BaseProvider, StreamChunk, usage_to_dict
 from constants import DEFAULT_SYSTEM_PROMPT
+from utils.http_clients import sdk_options
 
 
 class ClaudeProvider(BaseProvider):
     """Provider para Anthropic Claude API usando a biblioteca oficial"""
 
+    supports_history = True
+
     def __init__(self):
         super().__init__(api_key=os.getenv('ANTHROPIC_API_KEY'))
-        self.client = Anthropic(api_key=self.api_key) if self.api_key else None
+        self.client = Anthropic(api_key=self.api_key, **sdk_options("claude")) if self.api_key else None
+        self.async_client = None
+
+    def _build_payload(self, message, model, max_tokens, **kwargs) -> Dict[str, Any]:
+        persona = kwargs.get("persona", DEFAULT_SYSTEM_PROMPT)
+        temperature = kwargs.get("temperature", 0.7)
+        return {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "system": persona,
+            "messages": [
+                *(kwargs.get("history") or []),
+                {"role": "user", "content": message}
+            ]
+        }
 
     def call_api(self, message, model, max_tokens, **kwargs):
         if not self.api_key:
@@ -24,17 +42,7 @@ class ClaudeProvider(BaseProvider):
 
         try:
             print(f"Usando modelo Claude: {model} (max_tokens: {max_tokens})", file=sys.stderr)
-            persona = kwargs.get("persona", DEFAULT_SYSTEM_PROMPT)
-            temperature = kwargs.get("temperature", 0.7)
-            payload = {
-                "model": model,
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "system": persona,
-                "messages": [
-                    {"role": "user", "content": message}
-                ]
-            }
+            payload = self._build_payload(message, model, max_tokens, **kwargs)
 
             use_stream = kwargs.get("stream", True)
             if use_stream:
@@ -46,10 +54,73 @@ class ClaudeProvider(BaseProvider):
 
             if nerd_stats:
                 print(f"Estatísticas para Nerds: {nerd_stats}", file=sys.stderr)
+                self._report_usage(nerd_stats)
+
+            return response_text
+        except Exception as e:
+            raise Exception(f"Erro na chamada da API Claude: {e}") from e
+
+    def warmup(self):
+        if self.api_key and self.async_client is None:
+            self.async_client = AsyncAnthropic(api_key=self.api_key, **sdk_options("claude", asynchronous=True))
+
+    async def acall_api(self, message, model, max_tokens, **kwargs):
+        if not self.api_key:
+            raise Exception("Erro: Variável de ambiente ANTHROPIC_API_KEY não encontrada")
+
+        self.warmup()
+
+        try:
+            print(f"Usando modelo Claude: {model} (max_tokens: {max_tokens})", file=sys.stderr)
+            payload = self._build_payload(message, model, max_tokens, **kwargs)
+            async with self.async_client.messages.stream(**payload) as stream:
+                chunks = [text async for text in stream.text_stream]
+                final_response = await stream.get_final_message()
 
+            response_text = "".join(chunks).strip() or self._extract_text(final_response)
+            nerd_stats = getattr(final_response, "usage", None)
+            if nerd_stats:
+                print(f"Estatísticas para Nerds: {nerd_stats}", file=sys.stderr)
+                self._report_usage(nerd_stats)
             return response_text
         except Exception as e:
-            raise Exception(f"Erro na chamada da API Claude: {e}")
+            raise Exception(f"Erro na chamada da API Claude: {e}") from e
+
+    def stream_api(self, message, model, max_tokens, **kwargs):
+        if not self.api_key:
+            raise Exception("Erro: Variável de ambiente ANTHROPIC_API_KEY não encontrada")
+
+        if not self.client:
+            raise Exception("Erro: Cliente Anthropic não inicializado")
+
+        try:
+            print(f"Usando modelo Claude: {model} (max_tokens: {max_tokens})", file=sys.stderr)
+            payload = self._build_payload(message, model, max_tokens, **kwargs)
+            with self.client.messages.stream(**payload) as stream:
+                for text in stream.text_stream:
+                    yield StreamChunk(delta=text)
+                final_response = stream.get_final_message()
+            usage = usage_to_dict(getattr(final_response, "usage", None))
+            yield StreamChunk(done=True, model=model, usage=usage)
+        except Exception as e:
+            raise Exception(f"Erro na chamada da API Claude: {e}") from e
+
+    async def astream_api(self, message, model, max_tokens, **kwargs):
+        if not self.api_key:
+            raise Exception("Erro: Variável de ambiente ANTHROPIC_API_KEY não encontrada")
+
+        self.warmup()
+
+        try:
+            payload = self._build_payload(message, model, max_tokens, **kwargs)
+            async with self.async_client.messages.stream(**payload) as stream:
+                async for text in stream.text_stream:
+                    yield StreamChunk(delta=text)
+                final_response = await stream.get_final_message()
+            usage = usage_to_dict(getattr(final_response, "usage", None))
+            yield StreamChunk(done=True, model=model, usage=usage)
+        except Exception as e:
+            raise Exception(f"Erro na chamada da API Claude: {e}") from e
 
     def _call_with_stream(self, payload: Dict[str, Any]) -> Tuple[str, Any]:
         """Executa a chamada usando streaming (recomendado pela Anthropic)."""
@@ -58,7 +129,7 @@ class ClaudeProvider(BaseProvider):
         with self.client.messages.stream(**payload) as stream:
             for text in stream.text_stream:
                 chunks.append(text)
-            final_response = stream.get_final_response()
+            final_response = stream.get_final_message()
         aggregated = "".join(chunks).strip()
         if not aggregated:
             aggregated = self._extract_text(final_response)
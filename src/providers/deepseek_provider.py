@@ -1,17 +1,28 @@
 import os
 import sys
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from .base import BaseProvider
+from .openai_compat import ChatCompletionsAsyncMixin
 from constants import DEFAULT_SYSTEM_PROMPT
 from utils.error_handler import SecureErrorHandler
+from utils.http_clients import sdk_options
 
 
-class DeepSeekProvider(BaseProvider):
+class DeepSeekProvider(ChatCompletionsAsyncMixin, BaseProvider):
     """Provider para DeepSeek AI API usando a interface compatível com OpenAI"""
 
+    provider_label = "deepseek"
+    api_key_env = "DEEPSEEK_API_KEY"
+    base_url = "https://api.deepseek.com"
+
     def __init__(self):
         super().__init__(api_key=os.getenv('DEEPSEEK_API_KEY'))
-        self.client = OpenAI(api_key=self.api_key, base_url="https://api.deepseek.com") if self.api_key else None
+        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                             **sdk_options("deepseek")) if self.api_key else None
+
+    def _create_async_client(self):
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                           **sdk_options("deepseek", asynchronous=True))
 
     def call_api(self, message, model, max_tokens, **kwargs):
         if not self.api_key:
@@ -37,12 +48,14 @@ class DeepSeekProvider(BaseProvider):
             )
             nerd_stats = response.usage
             print(f"Estatísticas para Nerds: {str(nerd_stats)}")
+            self._report_usage(nerd_stats)
             return response.choices[0].message.content
         except Exception as e:
             SecureErrorHandler.handle_error(
                 "api_error",
                 e,
-                context={"provider": "deepseek", "model": model}
+                context={"provider": "deepseek", "model": model},
+                exit_code=0
             )
             raise e
 
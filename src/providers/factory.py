@@ -1,47 +1,90 @@
-from providers.openai_provider import OpenAIProvider
-from providers.openai_assistant_provider import OpenAIAssistantProvider
-from providers.claude_provider import ClaudeProvider
-from providers.deepseek_provider import DeepSeekProvider
-from providers.alibaba_provider import Qwen3Provider
-from providers.grok_provider import GrokProvider
-from providers.openaiWhisper_provider import WhisperProvider
-from providers.AWStranscribe_provider import AWSTranscribeProvider
-from providers.groq_provider import GroqProvider
-from providers.gemini_provider import GeminiProvider
-from providers.perplexity_provider import PerplexityProvider
-from providers.moonshot_provider import MoonshotProvider
+from importlib import import_module
+
+from utils import timing
 
 
 
 class ProviderFactory:
-    """Factory class for creating AI provider instances"""
+    """Factory class for creating AI provider instances.
+
+    Providers are registered as "module:Class" paths and imported on first
+    use, so a CLI call only loads the SDK of the provider it talks to.
+    Entries of models.json with "type": "openai_compatible" are registered
+    automatically as OpenAICompatibleProvider instances. Chat providers are
+    returned wrapped in a ResilientProvider (retries and circuit breakers).
+    """
     
     _providers = {
-        'openai': OpenAIProvider,
-        'assistant': OpenAIAssistantProvider,
-        'claude': ClaudeProvider,
-        'deepseek': DeepSeekProvider,
-        'qwen': Qwen3Provider,
-        'grok': GrokProvider,
-        'whisper': WhisperProvider,
-        'aws': AWSTranscribeProvider,
-        'aws_transcribe': AWSTranscribeProvider,
-        'groq': GroqProvider,
-        'gemini': GeminiProvider,
-        'perplexity': PerplexityProvider,
-        'moonshot': MoonshotProvider,
-        'kimi': MoonshotProvider
+        'openai': 'providers.openai_provider:OpenAIProvider',
+        'assistant': 'providers.openai_assistant_provider:OpenAIAssistantProvider',
+        'claude': 'providers.claude_provider:ClaudeProvider',
+        'deepseek': 'providers.deepseek_provider:DeepSeekProvider',
+        'qwen': 'providers.alibaba_provider:Qwen3Provider',
+        'grok': 'providers.grok_provider:GrokProvider',
+        'whisper': 'providers.openaiWhisper_provider:WhisperProvider',
+        'aws': 'providers.AWStranscribe_provider:AWSTranscribeProvider',
+        'aws_transcribe': 'providers.AWStranscribe_provider:AWSTranscribeProvider',
+        'groq': 'providers.groq_provider:GroqProvider',
+        'gemini': 'providers.gemini_provider:GeminiProvider',
+        'perplexity': 'providers.perplexity_provider:PerplexityProvider',
+        'moonshot': 'providers.moonshot_provider:MoonshotProvider',
+        'kimi': 'providers.moonshot_provider:MoonshotProvider',
+        'simulated': 'providers.simulated_provider:SimulatedProvider'
     }
+    _compatible_class = 'providers.openai_compatible_provider:OpenAICompatibleProvider'
+    _compatible = None
+    _config = None
+    # Transcrição e o assistant (que envia arquivos) não são repetidos automaticamente
+    _without_resilience = {'whisper', 'aws', 'aws_transcribe', 'assistant'}
+    
+    @classmethod
+    def _config_manager(cls):
+        if cls._config is None:
+            from config.manager import ConfigManager
+            cls._config = ConfigManager()
+        return cls._config
+
+    @classmethod
+    def compatible_providers(cls):
+        """Settings of the OpenAI-compatible providers declared in models.json (read once)"""
+        if cls._compatible is None:
+            cls._compatible = {
+                name: settings for name, settings in cls._config_manager().get_compatible_providers().items()
+                if name not in cls._providers
+            }
+        return cls._compatible
+
+    @classmethod
+    def get_provider_class(cls, provider_name: str):
+        """Import (once) and return the class registered for the provider"""
+        if provider_name in cls._providers:
+            path = cls._providers[provider_name]
+        elif provider_name in cls.compatible_providers():
+            path = cls._compatible_class
+        else:
+            raise ValueError(f"Unknown provider: {provider_name}")
+        module_path, class_name = path.split(':')
+        return getattr(import_module(module_path), class_name)
     
     @classmethod
     def create_provider(cls, provider_name: str):
         """Create a provider instance based on the provider name"""
-        if provider_name not in cls._providers:
+        if provider_name not in cls._providers and provider_name not in cls.compatible_providers():
             raise ValueError(f"Unknown provider: {provider_name}")
         
-        return cls._providers[provider_name]()
+        with timing.span("provider_init"):
+            provider_class = cls.get_provider_class(provider_name)
+            if provider_name in cls._providers:
+                provider = provider_class()
+            else:
+                provider = provider_class(provider_name, cls.compatible_providers()[provider_name])
+            if provider_name in cls._without_resilience:
+                return provider
+            from utils.resilience import ResilientProvider
+            return ResilientProvider(provider_name, provider,
+                                     cls._config_manager().get_resilience_settings(provider_name))
     
     @classmethod
     def get_available_providers(cls):
         """Get list of available provider names"""
-        return list(cls._providers.keys())
+        return list(cls._providers.keys()) + list(cls.compatible_providers())
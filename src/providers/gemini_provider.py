@@ -1,13 +1,16 @@
 import os
 import sys
-from .base import BaseProvider
+from .base import BaseProvider, StreamChunk, usage_to_dict
 from constants import DEFAULT_SYSTEM_PROMPT
 from utils.error_handler import SecureErrorHandler
+from utils.http_clients import genai_http_options
 
 
 class GeminiProvider(BaseProvider):
     """Provider para Google Gemini API usando a biblioteca oficial"""
 
+    supports_history = True
+
     def __init__(self):
         super().__init__(api_key=os.getenv('GOOGLE_API_KEY'))
         self.client = None
@@ -27,7 +30,10 @@ class GeminiProvider(BaseProvider):
             )
             raise exc
 
-        self.client = genai.Client(api_key=self.api_key)
+        self.client = genai.Client(
+            api_key=self.api_key,
+            http_options=types.HttpOptions(**genai_http_options("gemini")),
+        )
         self.types = types
 
     def call_api(self, message, model, max_tokens, **kwargs):
@@ -48,22 +54,150 @@ class GeminiProvider(BaseProvider):
             temperature = kwargs.get("temperature", 0.7)
             response = self.client.models.generate_content(
                 model=model,
-                contents=message,
-                config=self.types.GenerateContentConfig(
-                    system_instruction=persona,
-                    max_output_tokens=max_tokens,
-                    temperature=temperature,
-                ),
+                contents=self._build_contents(message, kwargs.get("history")),
+                config=self._build_config(max_tokens, persona, temperature),
+            )
+            self._report_usage(getattr(response, "usage_metadata", None))
+            return response.text or ""
+        except Exception as e:
+            SecureErrorHandler.handle_error(
+                "api_error",
+                e,
+                context={"provider": "gemini", "model": model},
+                exit_code=0
+            )
+            raise e
+
+    def stream_api(self, message, model, max_tokens, **kwargs):
+        if not self.api_key:
+            SecureErrorHandler.handle_error(
+                "api_key_missing",
+                Exception("GOOGLE_API_KEY not found"),
+                context={"provider": "gemini"}
+            )
+            raise Exception("GOOGLE_API_KEY not found")
+
+        if self.client is None or self.types is None:
+            self._initialize_client()
+
+        try:
+            print(f"Usando modelo Gemini: {model} (max_tokens: {max_tokens})", file=sys.stderr)
+            persona = kwargs.get("persona", DEFAULT_SYSTEM_PROMPT)
+            temperature = kwargs.get("temperature", 0.7)
+            usage = None
+            for chunk in self.client.models.generate_content_stream(
+                model=model,
+                contents=self._build_contents(message, kwargs.get("history")),
+                config=self._build_config(max_tokens, persona, temperature),
+            ):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if chunk.text:
+                    yield StreamChunk(delta=chunk.text)
+            yield StreamChunk(done=True, model=model, usage=usage_to_dict(usage))
+        except Exception as e:
+            SecureErrorHandler.handle_error(
+                "api_error",
+                e,
+                context={"provider": "gemini", "model": model},
+                exit_code=0
+            )
+            raise e
+
+    async def acall_api(self, message, model, max_tokens, **kwargs):
+        if not self.api_key:
+            SecureErrorHandler.handle_error(
+                "api_key_missing",
+                Exception("GOOGLE_API_KEY not found"),
+                context={"provider": "gemini"},
+                exit_code=0
+            )
+            raise Exception("GOOGLE_API_KEY not found")
+
+        if self.client is None or self.types is None:
+            self._initialize_client()
+
+        try:
+            print(f"Usando modelo Gemini: {model} (max_tokens: {max_tokens})", file=sys.stderr)
+            persona = kwargs.get("persona", DEFAULT_SYSTEM_PROMPT)
+            temperature = kwargs.get("temperature", 0.7)
+            response = await self.client.aio.models.generate_content(
+                model=model,
+                contents=self._build_contents(message, kwargs.get("history")),
+                config=self._build_config(max_tokens, persona, temperature),
             )
+            self._report_usage(getattr(response, "usage_metadata", None))
             return response.text or ""
         except Exception as e:
             SecureErrorHandler.handle_error(
                 "api_error",
                 e,
-                context={"provider": "gemini", "model": model}
+                context={"provider": "gemini", "model": model},
+                exit_code=0
             )
             raise e
 
+    async def astream_api(self, message, model, max_tokens, **kwargs):
+        if not self.api_key:
+            SecureErrorHandler.handle_error(
+                "api_key_missing",
+                Exception("GOOGLE_API_KEY not found"),
+                context={"provider": "gemini"},
+                exit_code=0
+            )
+            raise Exception("GOOGLE_API_KEY not found")
+
+        if self.client is None or self.types is None:
+            self._initialize_client()
+
+        try:
+            persona = kwargs.get("persona", DEFAULT_SYSTEM_PROMPT)
+            temperature = kwargs.get("temperature", 0.7)
+            usage = None
+            stream = await self.client.aio.models.generate_content_stream(
+                model=model,
+                contents=self._build_contents(message, kwargs.get("history")),
+                config=self._build_config(max_tokens, persona, temperature),
+            )
+            async for chunk in stream:
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if chunk.text:
+                    yield StreamChunk(delta=chunk.text)
+            yield StreamChunk(done=True, model=model, usage=usage_to_dict(usage))
+        except Exception as e:
+            SecureErrorHandler.handle_error(
+                "api_error",
+                e,
+                context={"provider": "gemini", "model": model},
+                exit_code=0
+            )
+            raise e
+
+    async def aclose(self):
+        if self.client is not None:
+            try:
+                await self.client.aio.aclose()
+            except Exception as e:
+                print(f"Aviso: falha ao fechar cliente assíncrono do Gemini: {e}", file=sys.stderr)
+        self.close()
+
+    @staticmethod
+    def _build_contents(message, history=None):
+        """Mensagem simples ou, com histórico, a lista de turnos (o papel "assistant" vira "model")"""
+        if not history:
+            return message
+        turnos = [
+            {"role": "model" if item["role"] == "assistant" else "user", "parts": [{"text": item["content"]}]}
+            for item in history
+        ]
+        return turnos + [{"role": "user", "parts": [{"text": message}]}]
+
+    def _build_config(self, max_tokens, persona, temperature):
+        return self.types.GenerateContentConfig(
+            system_instruction=persona,
+            max_output_tokens=max_tokens,
+            temperature=temperature,
+        )
+
     def get_available_models(self):
         """Retorna modelos disponíveis"""
         return [
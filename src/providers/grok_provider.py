@@ -1,6 +1,6 @@
 import os
 import sys
-from .base import BaseProvider
+from .base import BaseProvider, StreamChunk, usage_to_dict
 from constants import DEFAULT_SYSTEM_PROMPT
 
 
@@ -21,21 +21,39 @@ class GrokProvider(BaseProvider):
             except ImportError:
                 raise ImportError("Erro: Biblioteca 'xai_sdk' não instalada. Execute: pip install xai_sdk")
 
+    def _create_chat(self, message, model, max_tokens, **kwargs):
+        from xai_sdk.chat import user, system
+        print(f"Usando modelo Grok: {model} (max_tokens: {max_tokens})", file=sys.stderr)
+        temperature = kwargs.get("temperature", 0.7)
+        chat = self.client.chat.create(model=model, temperature=temperature, max_output_tokens=max_tokens)
+        persona = kwargs.get("persona", DEFAULT_SYSTEM_PROMPT)
+        if persona:
+            chat.append(system(persona))
+        chat.append(user(message))
+        return chat
+
     def call_api(self, message, model, max_tokens, **kwargs):
         self._ensure_client()
         try:
-            from xai_sdk.chat import user, system
-            print(f"Usando modelo Grok: {model} (max_tokens: {max_tokens})", file=sys.stderr)
-            temperature = kwargs.get("temperature", 0.7)
-            chat = self.client.chat.create(model=model, temperature=temperature, max_output_tokens=max_tokens)
-            persona = kwargs.get("persona", DEFAULT_SYSTEM_PROMPT)
-            if persona:
-                chat.append(system(persona))
-            chat.append(user(message))
+            chat = self._create_chat(message, model, max_tokens, **kwargs)
             response = chat.sample()
+            self._report_usage(getattr(response, "usage", None))
             return getattr(response, "content", "")
         except Exception as e:
-            raise Exception(f"Erro na chamada da API Grok: {e}")
+            raise Exception(f"Erro na chamada da API Grok: {e}") from e
+
+    def stream_api(self, message, model, max_tokens, **kwargs):
+        self._ensure_client()
+        try:
+            chat = self._create_chat(message, model, max_tokens, **kwargs)
+            response = None
+            for response, chunk in chat.stream():
+                if chunk.content:
+                    yield StreamChunk(delta=chunk.content)
+            usage = usage_to_dict(getattr(response, "usage", None))
+            yield StreamChunk(done=True, model=model, usage=usage)
+        except Exception as e:
+            raise Exception(f"Erro na chamada da API Grok: {e}") from e
 
     def get_available_models(self):
         """Retorna modelos disponíveis"""
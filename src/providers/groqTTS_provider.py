@@ -4,8 +4,10 @@ import re
 from pathlib import Path
 
 from .base import BaseProvider
-from constants import VOICE_INSTRUCTIONS
-from utils.text_utils import limpar_texto_para_audio, dividir_texto_inteligente
+from constants import VOICE_INSTRUCTIONS, TTS_STREAM_FIRST_CHUNK, TTS_STREAM_CHUNK_BYTES
+from utils.audio_stream import transmitir_partes
+from utils.text_utils import limpar_texto_para_audio, dividir_texto_inteligente, dividir_para_streaming
+from utils.http_clients import sdk_options
 
 class GroqProviderTTS(BaseProvider):
     """Classe para manipulação de áudio usando GROQ TTS"""
@@ -21,7 +23,7 @@ class GroqProviderTTS(BaseProvider):
         
         try:
             from groq import Groq
-            self.client = Groq(api_key=self.api_key)
+            self.client = Groq(api_key=self.api_key, **sdk_options("groq"))
         except ImportError:
             raise ImportError("Erro: Biblioteca 'groq' não instalada. Execute: pip install groq")
 
@@ -153,6 +155,26 @@ class GroqProviderTTS(BaseProvider):
             print(f"[✗] Erro ao gerar áudio: {e}", file=sys.stderr)
             return False
 
+    def stream_audio(self, texto, modelo="playai-tts", voz="Adelaide-PlayAI"):
+        """Devolve um gerador com os bytes MP3 do texto, parte a parte, sem gravar arquivos"""
+        if not self.client:
+            self._initialize_client()
+
+        partes = dividir_para_streaming(limpar_texto_para_audio(texto), 1200, TTS_STREAM_FIRST_CHUNK)
+        if not partes:
+            raise Exception("Erro: Texto vazio após limpeza")
+        return transmitir_partes(partes, lambda parte: self._stream_parte(parte, modelo, voz))
+
+    def _stream_parte(self, texto, modelo, voz):
+        """Repassa os bytes de uma parte à medida que chegam da API"""
+        with self.client.audio.speech.with_streaming_response.create(
+            model=modelo,
+            voice=voz,
+            response_format="mp3",
+            input=texto
+        ) as response:
+            yield from response.iter_bytes(TTS_STREAM_CHUNK_BYTES)
+
     def get_available_models(self):
         """Retorna modelos disponíveis"""
         return ["playai-tts"]
@@ -1,26 +1,59 @@
 import os
 import sys
-from groq import Groq
+from groq import Groq, AsyncGroq
 from .base import BaseProvider
+from .openai_compat import ChatCompletionsAsyncMixin
 from constants import DEFAULT_SYSTEM_PROMPT, O_MODEL_SYSTEM_PROMPT
 from utils.error_handler import SecureErrorHandler
+from utils.http_clients import sdk_options
 
 
-class GroqProvider(BaseProvider):
+class GroqProvider(ChatCompletionsAsyncMixin, BaseProvider):
     """Provider para Groq API usando a biblioteca oficial"""
 
+    provider_label = "groq"
+    api_key_env = "GROQ_API_KEY"
+    # A Groq informa o uso em x_groq.usage e não aceita stream_options
+    stream_usage_option = False
+
     def __init__(self):
         super().__init__(api_key=os.getenv('GROQ_API_KEY'))
-        self.client = Groq(api_key=self.api_key) if self.api_key else None
+        self.client = Groq(api_key=self.api_key, **sdk_options("groq")) if self.api_key else None
+
+    def _create_async_client(self):
+        return AsyncGroq(api_key=self.api_key, **sdk_options("groq", asynchronous=True))
+
+    async def acall_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
+        if is_o_model:
+            # A Responses API da Groq só é usada pelo cliente síncrono
+            return await BaseProvider.acall_api(self, message, model, max_tokens, is_o_model=is_o_model, **kwargs)
+        return await super().acall_api(message, model, max_tokens, **kwargs)
+
+    def stream_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
+        if is_o_model:
+            yield from BaseProvider.stream_api(self, message, model, max_tokens, is_o_model=is_o_model, **kwargs)
+            return
+        yield from super().stream_api(message, model, max_tokens, **kwargs)
+
+    async def astream_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
+        if is_o_model:
+            async for chunk in BaseProvider.astream_api(self, message, model, max_tokens, is_o_model=is_o_model, **kwargs):
+                yield chunk
+            return
+        async for chunk in super().astream_api(message, model, max_tokens, **kwargs):
+            yield chunk
 
     def call_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
         if not self.api_key:
+            # Também chamado pela API (acall_api/astream_api com is_o_model): não encerra o processo
+            erro = Exception("GROQ_API_KEY not found")
             SecureErrorHandler.handle_error(
                 "api_key_missing",
-                Exception("GROQ_API_KEY not found"),
-                context={"provider": "groq"}
+                erro,
+                context={"provider": "groq"},
+                exit_code=0
             )
-            raise Exception("GROQ_API_KEY not found")
+            raise erro
 
         try:
             persona = kwargs.get("persona", O_MODEL_SYSTEM_PROMPT if is_o_model else DEFAULT_SYSTEM_PROMPT)
@@ -50,12 +83,14 @@ class GroqProvider(BaseProvider):
                 )
                 nerd_stats = response.usage
                 print(f"\nEstatísticas para Nerds: {str(nerd_stats)}")
+                self._report_usage(nerd_stats)
                 return response.choices[0].message.content
         except Exception as e:
             SecureErrorHandler.handle_error(
                 "api_error",
                 e,
-                context={"provider": "groq", "model": model}
+                context={"provider": "groq", "model": model},
+                exit_code=0
             )
             raise e
 
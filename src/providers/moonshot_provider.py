@@ -1,17 +1,28 @@
 import os
 import sys
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from .base import BaseProvider
+from .openai_compat import ChatCompletionsAsyncMixin
 from constants import DEFAULT_SYSTEM_PROMPT
 from utils.error_handler import SecureErrorHandler
+from utils.http_clients import sdk_options
 
 
-class MoonshotProvider(BaseProvider):
+class MoonshotProvider(ChatCompletionsAsyncMixin, BaseProvider):
     """Provider para Moonshot/Kimi usando API compatível com OpenAI."""
 
+    provider_label = "moonshot"
+    api_key_env = "KIMI_API_KEY"
+    base_url = "https://api.moonshot.ai/v1"
+
     def __init__(self):
         super().__init__(api_key=os.getenv('KIMI_API_KEY'))
-        self.client = OpenAI(api_key=self.api_key, base_url="https://api.moonshot.ai/v1") if self.api_key else None
+        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                             **sdk_options("moonshot")) if self.api_key else None
+
+    def _create_async_client(self):
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                           **sdk_options("moonshot", asynchronous=True))
 
     def call_api(self, message, model, max_tokens, **kwargs):
         if not self.api_key:
@@ -37,12 +48,14 @@ class MoonshotProvider(BaseProvider):
             )
             nerd_stats = response.usage
             print(f"Estatisticas para Nerds: {str(nerd_stats)}")
+            self._report_usage(nerd_stats)
             return response.choices[0].message.content or ""
         except Exception as e:
             SecureErrorHandler.handle_error(
                 "api_error",
                 e,
-                context={"provider": "moonshot", "model": model}
+                context={"provider": "moonshot", "model": model},
+                exit_code=0
             )
             raise e
 
@@ -5,8 +5,16 @@ import re
 from pathlib import Path
 from .base import BaseProvider
 from utils.error_handler import SecureErrorHandler
-from constants import DEFAULT_VOICE, DEFAULT_TTS_MODEL, VOICE_INSTRUCTIONS
-from utils.text_utils import limpar_texto_para_audio, dividir_texto_inteligente
+from constants import (
+    DEFAULT_VOICE,
+    DEFAULT_TTS_MODEL,
+    VOICE_INSTRUCTIONS,
+    TTS_STREAM_FIRST_CHUNK,
+    TTS_STREAM_CHUNK_BYTES,
+)
+from utils.audio_stream import transmitir_partes
+from utils.text_utils import limpar_texto_para_audio, dividir_texto_inteligente, dividir_para_streaming
+from utils.http_clients import sdk_options
 
 class OpenAIAudio(BaseProvider):
     """Classe para manipulação de áudio usando OpenAI TTS"""
@@ -23,7 +31,7 @@ class OpenAIAudio(BaseProvider):
         
         try:
             from openai import OpenAI
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = OpenAI(api_key=self.api_key, **sdk_options("openai"))
         except ImportError:
             raise ImportError("Erro: Biblioteca 'openai' não instalada. Execute: pip install openai")
 
@@ -160,6 +168,27 @@ class OpenAIAudio(BaseProvider):
         except Exception as e:
             print(f"[✗] Erro ao gerar áudio: {e}", file=sys.stderr)
             return False
+
+    def stream_audio(self, texto, modelo=DEFAULT_TTS_MODEL, voz=DEFAULT_VOICE):
+        """Devolve um gerador com os bytes MP3 do texto, parte a parte, sem gravar arquivos"""
+        if not self.client:
+            self._initialize_client()
+
+        partes = dividir_para_streaming(limpar_texto_para_audio(texto), 3500, TTS_STREAM_FIRST_CHUNK)
+        if not partes:
+            raise Exception("Erro: Texto vazio após limpeza")
+        return transmitir_partes(partes, lambda parte: self._stream_parte(parte, modelo, voz))
+
+    def _stream_parte(self, texto, modelo, voz):
+        """Repassa os bytes de uma parte à medida que chegam da API"""
+        with self.client.audio.speech.with_streaming_response.create(
+            model=modelo,
+            voice=voz,
+            input=texto,
+            response_format="mp3"
+        ) as response:
+            yield from response.iter_bytes(TTS_STREAM_CHUNK_BYTES)
+
     def get_available_models(self):
         """Retorna modelos disponíveis"""
         return ["gpt-4o-audio-preview", "gpt-4o-mini-audio-preview", "tts-1", "tts-1-hd", "gpt-4o-mini-tts"]
@@ -8,6 +8,7 @@ from openai import OpenAI
 from .base import BaseProvider
 from constants import DEFAULT_SYSTEM_PROMPT, O_MODEL_SYSTEM_PROMPT
 from utils.error_handler import SecureErrorHandler
+from utils.http_clients import sdk_options
 
 
 class OpenAIAssistantProvider(BaseProvider):
@@ -15,7 +16,7 @@ class OpenAIAssistantProvider(BaseProvider):
 
     def __init__(self):
         super().__init__(api_key=os.getenv('OPENAI_API_KEY'))
-        self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        self.client = OpenAI(api_key=self.api_key, **sdk_options("assistant")) if self.api_key else None
 
     def _upload_files(self, files: List[str]) -> Tuple[List[str], List[dict]]:
         uploaded_file_ids = []
@@ -0,0 +1,152 @@
+import sys
+from abc import ABC, abstractmethod
+from constants import DEFAULT_SYSTEM_PROMPT
+from .base import StreamChunk, usage_to_dict
+from utils.error_handler import SecureErrorHandler
+
+
+class ChatCompletionsAsyncMixin(ABC):
+    """Streaming e acall_api nativo para providers com interface chat.completions.
+
+    As subclasses definem `provider_label`, `api_key_env` e
+    `_create_async_client()`; o cliente assíncrono é criado na primeira chamada.
+    """
+
+    provider_label = "openai"
+    api_key_env = "OPENAI_API_KEY"
+    async_client = None
+    # Pede o uso de tokens no último chunk (stream_options da API OpenAI)
+    stream_usage_option = True
+    supports_history = True
+
+    @abstractmethod
+    def _create_async_client(self):
+        """Cria o cliente assíncrono (AsyncOpenAI, AsyncGroq...) com a chave e a base_url do provider.
+
+        Abstrato: uma subclasse que não o define não pode ser instanciada.
+        """
+
+    def _get_async_client(self):
+        if self.async_client is None:
+            self.async_client = self._create_async_client()
+        return self.async_client
+
+    def warmup(self):
+        if self.api_key:
+            self._get_async_client()
+
+    def _build_messages(self, message, persona, history=None):
+        return [
+            {"role": "system", "content": persona},
+            *(history or []),
+            {"role": "user", "content": message}
+        ]
+
+    def _check_api_key(self):
+        if not self.api_key:
+            SecureErrorHandler.handle_error(
+                "api_key_missing",
+                Exception(f"{self.api_key_env} not found"),
+                context={"provider": self.provider_label},
+                exit_code=0
+            )
+            raise Exception(f"{self.api_key_env} not found")
+
+    async def acall_api(self, message, model, max_tokens, **kwargs):
+        self._check_api_key()
+
+        try:
+            persona = kwargs.get("persona") or DEFAULT_SYSTEM_PROMPT
+            temperature = kwargs.get("temperature", 0.7)
+            print(f"Usando modelo {self.provider_label}: {model} (max_tokens: {max_tokens})", file=sys.stderr)
+            response = await self._get_async_client().chat.completions.create(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=self._build_messages(message, persona, kwargs.get("history"))
+            )
+            print(f"Estatísticas para Nerds: {str(response.usage)}", file=sys.stderr)
+            self._report_usage(response.usage)
+            return response.choices[0].message.content or ""
+        except Exception as e:
+            # exit_code=0: no servidor o erro deve virar resposta HTTP, não sys.exit
+            SecureErrorHandler.handle_error(
+                "api_error",
+                e,
+                context={"provider": self.provider_label, "model": model},
+                exit_code=0
+            )
+            raise e
+
+    async def astream_api(self, message, model, max_tokens, **kwargs):
+        self._check_api_key()
+
+        try:
+            usage = None
+            stream = await self._get_async_client().chat.completions.create(
+                **self._stream_params(message, model, max_tokens, **kwargs)
+            )
+            async for chunk in stream:
+                usage = self._chunk_usage(chunk) or usage
+                if chunk.choices:
+                    delta = getattr(chunk.choices[0].delta, "content", None)
+                    if delta:
+                        yield StreamChunk(delta=delta)
+            yield StreamChunk(done=True, model=model, usage=usage_to_dict(usage))
+        except Exception as e:
+            SecureErrorHandler.handle_error(
+                "api_error",
+                e,
+                context={"provider": self.provider_label, "model": model},
+                exit_code=0
+            )
+            raise e
+
+    def stream_api(self, message, model, max_tokens, **kwargs):
+        self._check_api_key()
+
+        try:
+            print(f"Usando modelo {self.provider_label}: {model} (max_tokens: {max_tokens})", file=sys.stderr)
+            usage = None
+            stream = self.client.chat.completions.create(
+                **self._stream_params(message, model, max_tokens, **kwargs)
+            )
+            for chunk in stream:
+                usage = self._chunk_usage(chunk) or usage
+                if chunk.choices:
+                    delta = getattr(chunk.choices[0].delta, "content", None)
+                    if delta:
+                        yield StreamChunk(delta=delta)
+            yield StreamChunk(done=True, model=model, usage=usage_to_dict(usage))
+        except Exception as e:
+            SecureErrorHandler.handle_error(
+                "api_error",
+                e,
+                context={"provider": self.provider_label, "model": model},
+                exit_code=0
+            )
+            raise e
+
+    def _stream_params(self, message, model, max_tokens, **kwargs):
+        params = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": kwargs.get("temperature", 0.7),
+            "messages": self._build_messages(
+                message, kwargs.get("persona") or DEFAULT_SYSTEM_PROMPT, kwargs.get("history")
+            ),
+            "stream": True,
+        }
+        if self.stream_usage_option:
+            params["stream_options"] = {"include_usage": True}
+        return params
+
+    @staticmethod
+    def _chunk_usage(chunk):
+        """Uso de tokens do chunk: campo padrão, x_groq ou dentro do choice (Moonshot)"""
+        usage = getattr(chunk, "usage", None)
+        if usage is None and getattr(chunk, "x_groq", None) is not None:
+            usage = getattr(chunk.x_groq, "usage", None)
+        if usage is None and chunk.choices:
+            usage = getattr(chunk.choices[0], "usage", None)
+        return usage
@@ -0,0 +1,76 @@
+import os
+import sys
+from openai import OpenAI, AsyncOpenAI
+from .base import BaseProvider
+from .openai_compat import ChatCompletionsAsyncMixin
+from constants import DEFAULT_SYSTEM_PROMPT, OPENAI_COMPATIBLE_PLACEHOLDER_KEY
+from utils.error_handler import SecureErrorHandler
+from utils.http_clients import sdk_options
+
+
+class OpenAICompatibleProvider(ChatCompletionsAsyncMixin, BaseProvider):
+    """Provider genérico para qualquer servidor com a API chat.completions (llama.cpp, vLLM, Ollama...).
+
+    Não há uma classe por serviço: o nome, a base_url, a variável da chave,
+    o suporte a streaming e os modelos vêm do bloco do provider em
+    models.json ("type": "openai_compatible"), e o ProviderFactory o
+    registra automaticamente.
+    """
+
+    def __init__(self, name: str, settings: dict):
+        self.provider_label = name
+        self.api_key_env = settings.get("api_key_env") or ""
+        self.base_url = settings["base_url"]
+        self.streaming = bool(settings.get("streaming", True))
+        self.stream_usage_option = bool(settings.get("stream_usage", True))
+        self.models = [tier["model"] for tier in settings.get("models", {}).values()]
+        super().__init__(api_key=os.getenv(self.api_key_env) if self.api_key_env else OPENAI_COMPATIBLE_PLACEHOLDER_KEY)
+        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                             **sdk_options(name)) if self.api_key else None
+
+    def _create_async_client(self):
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                           **sdk_options(self.provider_label, asynchronous=True))
+
+    def call_api(self, message, model, max_tokens, **kwargs):
+        self._check_api_key()
+
+        try:
+            print(f"Usando modelo {self.provider_label}: {model} (max_tokens: {max_tokens})", file=sys.stderr)
+            response = self.client.chat.completions.create(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=kwargs.get("temperature", 0.7),
+                messages=self._build_messages(
+                    message, kwargs.get("persona") or DEFAULT_SYSTEM_PROMPT, kwargs.get("history")
+                )
+            )
+            print(f"Estatísticas para Nerds: {str(response.usage)}", file=sys.stderr)
+            self._report_usage(response.usage)
+            return response.choices[0].message.content or ""
+        except Exception as e:
+            SecureErrorHandler.handle_error(
+                "api_error",
+                e,
+                context={"provider": self.provider_label, "model": model},
+                exit_code=0
+            )
+            raise e
+
+    def stream_api(self, message, model, max_tokens, **kwargs):
+        if not self.streaming:
+            yield from BaseProvider.stream_api(self, message, model, max_tokens, **kwargs)
+            return
+        yield from super().stream_api(message, model, max_tokens, **kwargs)
+
+    async def astream_api(self, message, model, max_tokens, **kwargs):
+        if not self.streaming:
+            async for chunk in BaseProvider.astream_api(self, message, model, max_tokens, **kwargs):
+                yield chunk
+            return
+        async for chunk in super().astream_api(message, model, max_tokens, **kwargs):
+            yield chunk
+
+    def get_available_models(self):
+        """Retorna os modelos declarados para o provider em models.json"""
+        return self.models
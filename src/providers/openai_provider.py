@@ -1,18 +1,22 @@
 import os
 import sys
 from pathlib import Path
-from openai import OpenAI
-from .base import BaseProvider
+from openai import OpenAI, AsyncOpenAI
+from .base import BaseProvider, StreamChunk, usage_to_dict
 from constants import DEFAULT_SYSTEM_PROMPT, O_MODEL_SYSTEM_PROMPT
 from utils.error_handler import SecureErrorHandler
+from utils.http_clients import sdk_options
 
 
 class OpenAIProvider(BaseProvider):
     """Provider para OpenAI API usando a biblioteca oficial"""
 
+    supports_background = True
+    supports_history = True
+
     def __init__(self):
         super().__init__(api_key=os.getenv('OPENAI_API_KEY'))
-        self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        self.client = OpenAI(api_key=self.api_key, **sdk_options("openai")) if self.api_key else None
         # Alias para suportar chamadas no formato `client.response.delete(id)`
         # mantendo compatibilidade com o SDK oficial (`client.responses.delete`).
         if self.client and not hasattr(self.client, "response"):
@@ -25,6 +29,7 @@ class OpenAIProvider(BaseProvider):
                     return self._openai_client.responses.delete(response_id)
 
             self.client.response = _ResponseDeleteProxy(self.client)
+        self.async_client = None
         self.history_file = Path.home() / '.minhaia/response.id'
 
     def _load_history(self):
@@ -55,6 +60,21 @@ class OpenAIProvider(BaseProvider):
                 except Exception:
                     pass
 
+    def _apply_persistence(self, params, persistent):
+        """Aplica o modo --persistent: limpa ou continua a conversa salva"""
+        prev_id = None
+        if persistent == 'no':
+            print("Limpando conversa anterior")
+            self._delete_history()
+        elif persistent == 'yes':
+            prev_id = self._load_history()
+            print(f"Continuando conversa id: {prev_id}", file=sys.stderr)
+
+        if persistent == 'yes':
+            params["store"] = True
+            if prev_id:
+                params["previous_response_id"] = prev_id
+
     def call_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
         if not self.api_key:
             SecureErrorHandler.handle_error(
@@ -70,14 +90,6 @@ class OpenAIProvider(BaseProvider):
             temperature = kwargs.get("temperature", 0.7)
             print(f"Usando modelo OpenAI: {model} - (max_tokens: {max_tokens}) {persona}", file=sys.stderr)
 
-            prev_id = None
-            if persistent == 'no':
-                print("Limpando conversa anterior")
-                self._delete_history()
-            elif persistent == 'yes':
-                prev_id = self._load_history()
-                print(f"Continuando conversa id: {prev_id}", file=sys.stderr)
-
             params = {
                 "model": model,
                 "max_output_tokens": max_tokens,
@@ -90,10 +102,7 @@ class OpenAIProvider(BaseProvider):
             if not is_o_model:
                 params["temperature"] = temperature
 
-            if persistent == 'yes':
-                params["store"] = True
-                if prev_id:
-                    params["previous_response_id"] = prev_id
+            self._apply_persistence(params, persistent)
 
             response = self.client.responses.create(**params)
 
@@ -102,15 +111,152 @@ class OpenAIProvider(BaseProvider):
 
             nerd_stats = response.usage
             print(f"Estatísticas para Nerds: {str(nerd_stats)}")
+            self._report_usage(nerd_stats)
             return self._extrair_texto_resposta(response)
         except Exception as e:
             SecureErrorHandler.handle_error(
                 "api_error",
                 e,
-                context={"provider": "openai", "model": model}
+                context={"provider": "openai", "model": model},
+                exit_code=0
+            )
+            raise e
+
+    def stream_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
+        if not self.api_key:
+            SecureErrorHandler.handle_error(
+                "api_key_missing",
+                Exception("OPENAI_API_KEY not found"),
+                context={"provider": "openai"}
+            )
+            raise Exception("OPENAI_API_KEY not found")
+
+        try:
+            persistent = kwargs.get("persistent")
+            print(f"Usando modelo OpenAI: {model} - (max_tokens: {max_tokens})", file=sys.stderr)
+            params = self._build_params(message, model, max_tokens, is_o_model, **kwargs)
+            self._apply_persistence(params, persistent)
+
+            usage = None
+            stream = self.client.responses.create(stream=True, **params)
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    yield StreamChunk(delta=event.delta)
+                elif event.type == "response.completed":
+                    usage = getattr(event.response, "usage", None)
+                    if persistent == 'yes':
+                        self._save_history(event.response.id)
+            yield StreamChunk(done=True, model=model, usage=usage_to_dict(usage))
+        except Exception as e:
+            SecureErrorHandler.handle_error(
+                "api_error",
+                e,
+                context={"provider": "openai", "model": model},
+                exit_code=0
             )
             raise e
 
+    def warmup(self):
+        if self.api_key and self.async_client is None:
+            self.async_client = AsyncOpenAI(api_key=self.api_key, **sdk_options("openai", asynchronous=True))
+
+    def _check_async_ready(self):
+        if not self.api_key:
+            SecureErrorHandler.handle_error(
+                "api_key_missing",
+                Exception("OPENAI_API_KEY not found"),
+                context={"provider": "openai"},
+                exit_code=0
+            )
+            raise Exception("OPENAI_API_KEY not found")
+        self.warmup()
+
+    def _build_params(self, message, model, max_tokens, is_o_model, **kwargs):
+        """Parâmetros da Responses API para chamadas sem histórico persistente"""
+        persona = kwargs.get("persona") or (O_MODEL_SYSTEM_PROMPT if is_o_model else DEFAULT_SYSTEM_PROMPT)
+        params = {
+            "model": model,
+            "max_output_tokens": max_tokens,
+            "input": [
+                {"role": "system", "content": persona},
+                *(kwargs.get("history") or []),
+                {"role": "user", "content": message}
+            ]
+        }
+        if not is_o_model:
+            params["temperature"] = kwargs.get("temperature", 0.7)
+        return params
+
+    async def acall_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
+        if kwargs.get("persistent"):
+            # O histórico em ~/.minhaia/response.id é exclusivo do fluxo síncrono da CLI
+            return await super().acall_api(message, model, max_tokens, is_o_model=is_o_model, **kwargs)
+
+        self._check_async_ready()
+
+        try:
+            print(f"Usando modelo OpenAI: {model} - (max_tokens: {max_tokens})", file=sys.stderr)
+            params = self._build_params(message, model, max_tokens, is_o_model, **kwargs)
+            response = await self.async_client.responses.create(**params)
+            print(f"Estatísticas para Nerds: {str(response.usage)}", file=sys.stderr)
+            self._report_usage(response.usage)
+            return self._extrair_texto_resposta(response)
+        except Exception as e:
+            SecureErrorHandler.handle_error(
+                "api_error",
+                e,
+                context={"provider": "openai", "model": model},
+                exit_code=0
+            )
+            raise e
+
+    async def astream_api(self, message, model, max_tokens, is_o_model=False, **kwargs):
+        if kwargs.get("persistent"):
+            async for chunk in super().astream_api(message, model, max_tokens, is_o_model=is_o_model, **kwargs):
+                yield chunk
+            return
+
+        self._check_async_ready()
+
+        try:
+            params = self._build_params(message, model, max_tokens, is_o_model, **kwargs)
+            usage = None
+            stream = await self.async_client.responses.create(stream=True, **params)
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    yield StreamChunk(delta=event.delta)
+                elif event.type == "response.completed":
+                    usage = getattr(event.response, "usage", None)
+            yield StreamChunk(done=True, model=model, usage=usage_to_dict(usage))
+        except Exception as e:
+            SecureErrorHandler.handle_error(
+                "api_error",
+                e,
+                context={"provider": "openai", "model": model},
+                exit_code=0
+            )
+            raise e
+
+    async def astart_background(self, message, model, max_tokens, is_o_model=False, **kwargs):
+        """Cria a resposta em modo background (Responses API) e devolve o id para consulta"""
+        self._check_async_ready()
+        params = self._build_params(message, model, max_tokens, is_o_model, **kwargs)
+        response = await self.async_client.responses.create(background=True, store=True, **params)
+        print(f"Resposta OpenAI em background: {response.id} ({response.status})", file=sys.stderr)
+        return response.id
+
+    async def apoll_background(self, response_id):
+        """Devolve (status, texto); o texto só vem com status "completed" (ou o erro, se falhou)"""
+        self._check_async_ready()
+        response = await self.async_client.responses.retrieve(response_id)
+        if response.status == "completed":
+            self._report_usage(response.usage)
+            return response.status, self._extrair_texto_resposta(response)
+        if response.status in ("failed", "cancelled", "incomplete"):
+            detalhe = getattr(response, "error", None) or getattr(response, "incomplete_details", None)
+            return response.status, str(detalhe or "")
+        return response.status, None
+
     def _extrair_texto_resposta(self, response):
         try:
             if getattr(response, "output_text", None):
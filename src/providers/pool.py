@@ -0,0 +1,74 @@
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from providers.factory import ProviderFactory
+
+
+class ProviderPool:
+    """Mantém uma instância aquecida de cada provider para reuso entre requisições.
+
+    Cada instância guarda seus clientes SDK (e os pools de conexão httpx),
+    evitando refazer o handshake TLS a cada chamada.
+    """
+
+    # Providers que não atendem mensagens de chat
+    NON_CHAT_PROVIDERS = {"whisper", "aws", "aws_transcribe", "dryrun"}
+
+    def __init__(self, factory=None):
+        self._factory = factory or ProviderFactory()
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider_name: str):
+        """Retorna a instância aquecida do provider, criando-a na primeira vez"""
+        provider = self._instances.get(provider_name)
+        if provider is not None:
+            return provider
+        with self._lock:
+            provider = self._instances.get(provider_name)
+            if provider is None:
+                provider = self._factory.create_provider(provider_name)
+                self._instances[provider_name] = provider
+        return provider
+
+    def warm(self, provider_names):
+        """Cria e aquece os providers informados, ignorando os indisponíveis"""
+        ready = []
+        for name in provider_names:
+            if name in self.NON_CHAT_PROVIDERS or name not in self._factory.get_available_providers():
+                continue
+            try:
+                self.get(name).warmup()
+                ready.append(name)
+            except (Exception, SystemExit) as e:
+                # SystemExit: alguns providers encerram o processo quando falta a chave
+                print(f"Aviso: provider '{name}' não foi aquecido: {e}", file=sys.stderr)
+        return ready
+
+    async def apreconnect(self, provider_names):
+        """Abre em paralelo a conexão de cada provider já aquecido; devolve os conectados"""
+        instancias = {nome: self._instances[nome] for nome in provider_names if nome in self._instances}
+        resultados = await asyncio.gather(*(p.apreconnect() for p in instancias.values()), return_exceptions=True)
+        return [nome for nome, ok in zip(instancias, resultados) if ok is True]
+
+    def preconnect(self, provider_names):
+        """Versão síncrona de apreconnect (clientes usados pela CLI), em paralelo por threads"""
+        instancias = {nome: self._instances[nome] for nome in provider_names if nome in self._instances}
+        if not instancias:
+            return []
+        with ThreadPoolExecutor(max_workers=len(instancias)) as executor:
+            resultados = list(executor.map(lambda p: p.preconnect(), instancias.values()))
+        return [nome for nome, ok in zip(instancias, resultados) if ok]
+
+    def instances(self):
+        return dict(self._instances)
+
+    async def aclose(self):
+        """Fecha as conexões de todos os providers criados"""
+        with self._lock:
+            instances = list(self._instances.values())
+            self._instances.clear()
+        for provider in instances:
+            await provider.aclose()
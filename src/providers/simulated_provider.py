@@ -0,0 +1,112 @@
+import asyncio
+import math
+import random
+import sys
+import time
+from typing import Optional
+
+from .base import BaseProvider, StreamChunk
+from config.manager import ConfigManager
+
+# Vocabulário das respostas geradas (cada palavra conta como um token)
+PALAVRAS = ("resposta", "simulada", "para", "teste", "de", "carga", "sem", "rede", "com",
+            "latência", "configurável", "e", "tokens", "em", "streaming")
+
+
+class SimulatedError(Exception):
+    """Falha simulada do upstream, com o status HTTP (500 ou 429) e os headers da resposta"""
+
+    def __init__(self, status_code: int, mensagem: str, retry_after: Optional[float] = None):
+        super().__init__(mensagem)
+        self.status_code = status_code
+        self.headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+
+
+class SimulatedProvider(BaseProvider):
+    """Provider sem rede para medir o overhead do próprio servidor sob carga.
+
+    O tempo até o primeiro token segue uma log-normal (mediana `ttft_median_ms`,
+    dispersão `ttft_sigma`); depois, `output_tokens` palavras saem a
+    `tokens_per_second`. Uma fração `rate_limit_rate` das chamadas é recusada
+    na hora com 429 e uma fração `error_rate` falha com 500 após o primeiro
+    token. Configuração em ConfigManager.get_simulation_settings().
+    """
+
+    supports_history = True
+
+    def __init__(self, settings: Optional[dict] = None):
+        super().__init__(api_key="simulated")
+        self.settings = settings if settings is not None else ConfigManager().get_simulation_settings()
+        self._random = random.Random(self.settings.get("seed"))
+
+    def _sorteia(self):
+        """Decide o destino da chamada: (ttft em segundos, erro ou None)"""
+        s = self.settings
+        sigma = float(s.get("ttft_sigma", 0))
+        ttft = float(s["ttft_median_ms"]) / 1000 * (math.exp(self._random.gauss(0, sigma)) if sigma else 1)
+        sorteio = self._random.random()
+        if sorteio < s["rate_limit_rate"]:
+            return 0.0, SimulatedError(429, "Rate limit simulado", retry_after=s.get("retry_after"))
+        if sorteio < s["rate_limit_rate"] + s["error_rate"]:
+            return ttft, SimulatedError(500, "Erro simulado do upstream")
+        return ttft, None
+
+    def _tokens(self, max_tokens: int):
+        total = max(1, min(int(self.settings["output_tokens"]), max_tokens or 1))
+        return [PALAVRAS[i % len(PALAVRAS)] + ("" if i == total - 1 else " ") for i in range(total)]
+
+    def _usage(self, message: str, tokens: list) -> dict:
+        return {"input_tokens": max(1, len(message or "") // 4), "output_tokens": len(tokens)}
+
+    def _intervalo(self) -> float:
+        taxa = float(self.settings["tokens_per_second"])
+        return 1 / taxa if taxa > 0 else 0.0
+
+    def call_api(self, message, model, max_tokens, **kwargs):
+        return "".join(chunk.delta for chunk in self.stream_api(message, model, max_tokens, **kwargs))
+
+    def stream_api(self, message, model, max_tokens, **kwargs):
+        ttft, erro = self._sorteia()
+        print(f"Usando modelo simulado: {model} (ttft: {ttft * 1000:.0f} ms)", file=sys.stderr)
+        time.sleep(ttft)
+        if erro is not None and erro.status_code == 429:
+            raise erro
+        tokens = self._tokens(max_tokens)
+        inicio = time.perf_counter()
+        for i, token in enumerate(tokens):
+            time.sleep(max(0.0, inicio + i * self._intervalo() - time.perf_counter()))
+            yield StreamChunk(delta=token)
+            if erro is not None:
+                raise erro
+        usage = self._usage(message, tokens)
+        self._report_usage(usage)
+        yield StreamChunk(done=True, model=model, usage=usage)
+
+    async def acall_api(self, message, model, max_tokens, **kwargs):
+        partes = []
+        async for chunk in self.astream_api(message, model, max_tokens, **kwargs):
+            partes.append(chunk.delta)
+        return "".join(partes)
+
+    async def astream_api(self, message, model, max_tokens, **kwargs):
+        ttft, erro = self._sorteia()
+        await asyncio.sleep(ttft)
+        if erro is not None and erro.status_code == 429:
+            raise erro
+        tokens = self._tokens(max_tokens)
+        loop = asyncio.get_running_loop()
+        inicio = loop.time()
+        for i, token in enumerate(tokens):
+            # Agenda pelo relógio do início, para o atraso de um token não se acumular nos seguintes
+            espera = inicio + i * self._intervalo() - loop.time()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            yield StreamChunk(delta=token)
+            if erro is not None:
+                raise erro
+        usage = self._usage(message, tokens)
+        self._report_usage(usage)
+        yield StreamChunk(done=True, model=model, usage=usage)
+
+    def get_available_models(self):
+        return ["simulated-default", "simulated-fast"]
@@ -0,0 +1,109 @@
+"""
+Controle de admissão: limita chamadas simultâneas por provider (ou modelo)
+"""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+
+class QueueFullError(Exception):
+    """Fila do provider cheia: a requisição é recusada imediatamente"""
+
+    def __init__(self, key: str, retry_after: int, message: str = None):
+        super().__init__(message or f"Fila cheia para {key}")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class QueueTimeoutError(QueueFullError):
+    """A requisição esperou na fila além do tempo limite"""
+
+    def __init__(self, key: str, retry_after: int):
+        super().__init__(key, retry_after, f"Tempo de espera na fila esgotado para {key}")
+
+
+class _Slot:
+    def __init__(self, max_in_flight: int, max_queue: int):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        # Média móvel do tempo de serviço, usada para estimar o Retry-After
+        self.avg_service = 1.0
+
+
+class AdmissionTicket:
+    def __init__(self, key: str, slot: _Slot, queue_wait: float):
+        self.key = key
+        self.slot = slot
+        self.queue_wait = queue_wait
+        self.started = time.monotonic()
+        self.released = False
+
+
+class AdmissionController:
+    """Fila limitada por chave com no máximo `max_in_flight` chamadas em andamento.
+
+    Quando a fila já tem `max_queue` requisições esperando, novas chegadas são
+    recusadas na hora com QueueFullError; quem espera mais que `queue_timeout`
+    recebe QueueTimeoutError. Ambas trazem uma estimativa de Retry-After.
+    """
+
+    def __init__(self):
+        self._slots: Dict[str, _Slot] = {}
+
+    def _slot(self, key: str, limits: dict) -> _Slot:
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = _Slot(int(limits["max_in_flight"]), int(limits["max_queue"]))
+            self._slots[key] = slot
+        return slot
+
+    def _retry_after(self, slot: _Slot) -> int:
+        estimativa = slot.avg_service * (slot.waiting + 1) / max(slot.max_in_flight, 1)
+        return max(1, math.ceil(estimativa))
+
+    async def acquire(self, key: str, limits: dict) -> AdmissionTicket:
+        slot = self._slot(key, limits)
+        if slot.semaphore.locked() and slot.waiting >= slot.max_queue:
+            raise QueueFullError(key, self._retry_after(slot))
+
+        inicio = time.monotonic()
+        slot.waiting += 1
+        try:
+            await asyncio.wait_for(slot.semaphore.acquire(), timeout=float(limits["queue_timeout"]))
+        except asyncio.TimeoutError:
+            raise QueueTimeoutError(key, self._retry_after(slot))
+        finally:
+            slot.waiting -= 1
+
+        slot.in_flight += 1
+        return AdmissionTicket(key, slot, time.monotonic() - inicio)
+
+    def release(self, ticket: AdmissionTicket):
+        if ticket.released:
+            return
+        ticket.released = True
+        slot = ticket.slot
+        duracao = time.monotonic() - ticket.started
+        slot.avg_service = 0.8 * slot.avg_service + 0.2 * duracao
+        slot.in_flight -= 1
+        slot.semaphore.release()
+
+    @asynccontextmanager
+    async def admit(self, key: str, limits: dict):
+        ticket = await self.acquire(key, limits)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            key: {"in_flight": slot.in_flight, "waiting": slot.waiting,
+                  "max_in_flight": slot.max_in_flight, "max_queue": slot.max_queue}
+            for key, slot in list(self._slots.items())  # também chamado da thread de /metrics
+        }
@@ -1,6 +1,8 @@
 import argparse
 import sys
 
+from config.manager import ConfigManager
+
 
 class CLIArgumentParser:
     """Classe para gerenciar os argumentos da linha de comando"""
@@ -23,12 +25,20 @@ class CLIArgumentParser:
         parser.add_argument('--port', type=int, default=8000, help='Porta da API FastAPI')
         parser.add_argument('--host', type=str, default='0.0.0.0', help='Host da API FastAPI')
         parser.add_argument('--secure', action='store_true', help='Usa chaves de API para autenticação')
+        parser.add_argument('--workers', type=int, default=1, help='Processos da API (modo --online)')
+        parser.add_argument('--log-level', type=str, default='info', help='Nível de log da API (modo --online)')
+        parser.add_argument('--drain-timeout', type=float, default=None,
+                            help='Segundos para terminar as requisições em andamento ao desligar a API')
+        parser.add_argument('--daemon', action='store_true',
+                            help='Inicia o daemon local que atende o chat com clientes já aquecidos')
+        parser.add_argument('--daemon-stop', action='store_true', help='Encerra o daemon local')
 
-        # Providers
+        # Providers (mais os "openai_compatible" declarados em models.json)
         parser.add_argument('--provider',
-                          choices=['aws', 'openai', 'assistant', 'claude', 'anthropic', 'deepseek', 'qwen', 'dryrun', 'grok', 'whisper', 'groq', 'gemini', 'perplexity', 'moonshot', 'kimi'],
+                          choices=['aws', 'openai', 'assistant', 'claude', 'anthropic', 'deepseek', 'qwen', 'dryrun', 'grok', 'whisper', 'groq', 'gemini', 'perplexity', 'moonshot', 'kimi', 'simulated', 'auto',
+                                   *ConfigManager().get_compatible_providers()],
                           default='groq',
-                          help='Escolha o provider da API de chat')
+                          help='Escolha o provider da API de chat (auto: o mais rápido do pool em models.json)')
         parser.add_argument('--openai', action='store_true', help='Usa API da OpenAI')
         parser.add_argument('--assistant', action='store_true', help='Usa OpenAI Responses com ferramentas')
         parser.add_argument('--anthropic', action='store_true', help='Usa API da Anthropic (alias de --claude)')
@@ -78,6 +88,15 @@ class CLIArgumentParser:
         parser.add_argument('--list-models', action='store_true')
         parser.add_argument('--persistent', choices=['yes', 'no'],
                             help='Mantém histórico de conversas na OpenAI')
+        parser.add_argument('--hedge', action='store_true',
+                            help='Dispara o provider secundário de "hedge" (models.json) se o primário demorar ou falhar')
+        cache_group = parser.add_mutually_exclusive_group()
+        cache_group.add_argument('--cache', action='store_true',
+                                 help='Usa o cache de respostas mesmo com temperature > 0')
+        cache_group.add_argument('--no-cache', action='store_true',
+                                 help='Ignora o cache de respostas')
+        parser.add_argument('--timings', action='store_true',
+                            help='Mostra no stderr o tempo gasto em cada etapa da execução')
         
         return parser
     
@@ -0,0 +1,43 @@
+"""
+Streaming de áudio por partes: a primeira parte sai em streaming e as
+seguintes são sintetizadas antecipadamente enquanto a atual é enviada
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List
+
+from constants import TTS_STREAM_PREFETCH
+
+
+def transmitir_partes(partes: List[str], sintetizar: Callable[[str], Iterable[bytes]],
+                      antecipar: int = TTS_STREAM_PREFETCH) -> Iterator[bytes]:
+    """Gera os bytes de áudio das partes, em ordem.
+
+    `sintetizar(parte)` devolve os bytes de uma parte (em blocos). A primeira
+    parte é repassada bloco a bloco, assim que chega do provider; até
+    `antecipar` partes seguintes são sintetizadas em paralelo e entregues
+    inteiras quando chegar a vez delas. Se o consumidor desistir (gerador
+    fechado), as partes ainda não iniciadas são canceladas.
+    """
+    if not partes:
+        return
+    executor = ThreadPoolExecutor(max_workers=max(1, antecipar), thread_name_prefix="tts")
+    pendentes = iter(partes[1:])
+    futuros = deque()
+
+    def agenda():
+        while len(futuros) < max(1, antecipar):
+            parte = next(pendentes, None)
+            if parte is None:
+                return
+            futuros.append(executor.submit(lambda p=parte: b"".join(sintetizar(p))))
+
+    try:
+        agenda()
+        yield from sintetizar(partes[0])
+        while futuros:
+            bloco = futuros.popleft().result()
+            agenda()
+            yield bloco
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,197 @@
+"""
+Cache de respostas compartilhado entre a CLI e a API
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from constants import CACHE_TTL_SECONDS, CACHE_MAX_MEMORY_ENTRIES, CACHE_MAX_DISK_ENTRIES
+
+
+def _resolve_cache_dir() -> str:
+    configured_dir = os.getenv("MINHAIA_CACHE_DIR", os.path.expanduser("~/.minhaia"))
+    try:
+        os.makedirs(configured_dir, exist_ok=True)
+        return configured_dir
+    except OSError:
+        fallback_dir = os.path.join(tempfile.gettempdir(), "minhaia-cache")
+        os.makedirs(fallback_dir, exist_ok=True)
+        return fallback_dir
+
+
+class ResponseCache:
+    """Cache de respostas com camada LRU em memória e camada SQLite em disco.
+
+    Cada entrada tem TTL próprio; as duas camadas são limitadas em número de
+    entradas e descartam primeiro as menos usadas recentemente.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: int = CACHE_TTL_SECONDS,
+                 max_memory_entries: int = CACHE_MAX_MEMORY_ENTRIES,
+                 max_disk_entries: int = CACHE_MAX_DISK_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_enabled = max_disk_entries > 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    @staticmethod
+    def make_key(provider, model, persona, temperature, max_tokens, message) -> str:
+        """Chave estável a partir dos parâmetros que influenciam a resposta"""
+        payload = json.dumps(
+            {
+                "provider": provider,
+                "model": model,
+                "persona": persona or "",
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "message": hashlib.sha256((message or "").encode("utf-8")).hexdigest(),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_cacheable(temperature, opt_in: bool = False, bypass: bool = False) -> bool:
+        """Por padrão só respostas determinísticas (temperature 0) vão para o cache"""
+        if bypass:
+            return False
+        return bool(opt_in) or temperature == 0
+
+    def _connection(self):
+        if self._conn is None:
+            path = self.path or os.path.join(_resolve_cache_dir(), "cache.sqlite3")
+            self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS respostas ("
+                "chave TEXT PRIMARY KEY, valor TEXT NOT NULL, "
+                "expira_em REAL NOT NULL, acessado_em REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_acesso ON respostas (acessado_em)")
+            self._conn.commit()
+        return self._conn
+
+    def _disk_error(self, e: Exception):
+        print(f"Aviso: cache em disco desativado: {e}", file=sys.stderr)
+        self._disk_enabled = False
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._disk_enabled:
+                try:
+                    conn = self._connection()
+                    row = conn.execute(
+                        "SELECT valor, expira_em FROM respostas WHERE chave = ?", (key,)
+                    ).fetchone()
+                    if row and row[1] > now:
+                        conn.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (now, key))
+                        conn.commit()
+                        self._remember(key, row[0], row[1])
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return row[0]
+                    if row:
+                        conn.execute("DELETE FROM respostas WHERE chave = ?", (key,))
+                        conn.commit()
+                except sqlite3.Error as e:
+                    self._disk_error(e)
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None):
+        if value is None:
+            return
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if not self._disk_enabled:
+                return
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO respostas (chave, valor, expira_em, acessado_em) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now),
+                )
+                conn.execute("DELETE FROM respostas WHERE expira_em <= ?", (now,))
+                conn.execute(
+                    "DELETE FROM respostas WHERE chave IN ("
+                    "SELECT chave FROM respostas ORDER BY acessado_em DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                self._disk_error(e)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get() para o event loop: com a camada em disco ativa, roda numa thread"""
+        if not self._disk_enabled:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str, ttl: Optional[int] = None):
+        """set() para o event loop: a gravação e o descarte em disco rodam numa thread"""
+        if not self._disk_enabled:
+            return self.set(key, value, ttl)
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def wrap_stream(self, key: str, chunks):
+        """Repassa os StreamChunk e grava o texto completo quando o stream termina"""
+        partes = []
+        for chunk in chunks:
+            if chunk.delta:
+                partes.append(chunk.delta)
+            if chunk.done:
+                self.set(key, "".join(partes))
+            yield chunk
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._disk_enabled:
+                try:
+                    conn = self._connection()
+                    conn.execute("DELETE FROM respostas")
+                    conn.commit()
+                except sqlite3.Error as e:
+                    self._disk_error(e)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "memory_entries": len(self._memory),
+        }
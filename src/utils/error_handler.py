@@ -41,6 +41,7 @@ class SecureErrorHandler:
         "dependency_missing": "Dependência do sistema não encontrada.",
         "network_error": "Erro de conexão de rede.",
         "rate_limit": "Limite de requisições excedido. Aguarde antes de tentar novamente.",
+        "circuit_open": "Serviço temporariamente indisponível após falhas seguidas. Tente novamente em instantes.",
         "invalid_format": "Formato de arquivo não suportado.",
         "generic": "Ocorreu um erro inesperado. Consulte os logs para mais detalhes.",
         "API": "Erro na API. Verifique a configuração e tente novamente."
@@ -91,6 +92,16 @@ class SecureErrorHandler:
         
         if exit_code > 0:
             sys.exit(exit_code)
+        # Marks the error so callers further up don't print it again
+        try:
+            error._minhaia_reported = True
+        except AttributeError:
+            pass
+    
+    @staticmethod
+    def was_reported(error: BaseException) -> bool:
+        """Whether handle_error already logged and showed this error"""
+        return getattr(error, "_minhaia_reported", False)
     
     @staticmethod
     def _get_hint(error_type: str, context: Optional[Dict[str, Any]] = None) -> Optional[str]:
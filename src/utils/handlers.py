@@ -1,10 +1,8 @@
 import sys
 import subprocess
 
-from providers.openaiTTS_provider import OpenAIAudio
-from providers.AWSpolly_provider import AWSPollyProvider
-from providers.groqTTS_provider import GroqProviderTTS
 from utils.formatters import remove_markdown, format_as_log
+from utils import timing
 
 
 class ResponseHandler:
@@ -43,16 +41,60 @@ class ResponseHandler:
             print(f"Erro ao processar o arquivo PDF '{arquivo}': {e}", file=sys.stderr)
             sys.exit(1)
 
+    @staticmethod
+    def supports_streaming(args):
+        """Indica se a saída pedida pode ser exibida (ou gravada com -f) incrementalmente"""
+        if args.voz or args.polly or args.t:
+            return False
+        return bool(args.f) or not args.p
+
+    @staticmethod
+    def process_stream(chunks, args):
+        """Exibe ou grava em -f os deltas à medida que chegam e retorna o texto completo"""
+        partes = []
+        try:
+            destino = open(args.f, 'w', encoding='utf-8') if args.f else sys.stdout
+        except IOError as e:
+            print(f"Erro ao salvar arquivo: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        try:
+            for chunk in chunks:
+                if chunk.delta:
+                    partes.append(chunk.delta)
+                    destino.write(chunk.delta)
+                    destino.flush()
+                if chunk.done and chunk.usage:
+                    print(f"\nEstatísticas para Nerds: {chunk.usage}", file=sys.stderr)
+        except IOError as e:
+            print(f"Erro ao salvar arquivo: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            if args.f:
+                destino.close()
+
+        if args.f:
+            print(f"Resposta salva em: {args.f}", file=sys.stderr)
+        else:
+            print()
+        return "".join(partes)
+
     @staticmethod
     def process_response(response, args):
         """Processa e exibe a resposta conforme os parâmetros"""
         audio_file = None
-        if args.voz:
+        if response is not None and not isinstance(response, str):
+            # Gerador de StreamChunk vindo de stream_api
+            ResponseHandler.process_stream(response, args)
+        elif args.voz:
             print(f"Mensagem original: \n {response}", file=sys.stderr)
             print("Convertendo texto em áudio usando openaiTTS...")
+            # Os SDKs de TTS só são importados quando o áudio é pedido
+            from providers.openaiTTS_provider import OpenAIAudio
             provider = OpenAIAudio(args.voz)
             try:
-                provider.call_api(response, args.voz)
+                with timing.span("tts"):
+                    provider.call_api(response, args.voz)
                 audio_file = provider.nome_arquivo
             except Exception as e:
                 print(f"Erro ao processar a resposta: {e}", file=sys.stderr)
@@ -60,8 +102,10 @@ class ResponseHandler:
         elif args.polly:
             print(remove_markdown(response))
             print("Convertendo texto em áudio usando AWS Polly...")
-            provider = AWSPollyProvider()
-            audio_file = provider.call_api(response, args.polly)
+            with timing.span("tts"):
+                from providers.AWSpolly_provider import AWSPollyProvider
+                provider = AWSPollyProvider()
+                audio_file = provider.call_api(response, args.polly)
         elif args.t:
             print(remove_markdown(response))
         elif args.f:
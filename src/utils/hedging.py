@@ -0,0 +1,116 @@
+"""
+Hedging e failover entre providers: a primeira resposta válida vence
+"""
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+PRIMARY = "primary"
+SECONDARY = "secondary"
+
+
+def _sem_evento(nome: str):
+    return None
+
+
+async def _cancela(*tasks: asyncio.Task):
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _corrida(inicia: Dict[str, Callable[[], Awaitable]], delay: float,
+                   evento: Callable[[str], None]) -> Tuple[str, object]:
+    """Executa a primária e, por atraso (hedge) ou erro (failover), a secundária.
+
+    Devolve (origem, resultado) da primeira task bem-sucedida. Se as duas
+    falharem, propaga o erro da primária.
+    """
+    tasks = {asyncio.ensure_future(inicia[PRIMARY]()): PRIMARY}
+    modo = None
+    erros = {}
+
+    def dispara_secundaria(motivo: str):
+        nonlocal modo
+        modo = motivo
+        evento(motivo)
+        task = asyncio.ensure_future(inicia[SECONDARY]())
+        tasks[task] = SECONDARY
+        return task
+
+    try:
+        pendentes = set(tasks)
+        done, _ = await asyncio.wait(pendentes, timeout=delay)
+        if not done:
+            pendentes.add(dispara_secundaria("hedge"))
+
+        while pendentes:
+            done, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                origem = tasks[task]
+                if task.exception() is None:
+                    if origem == SECONDARY and modo == "hedge":
+                        evento("hedge_won")
+                    return origem, task.result()
+                erros[origem] = task.exception()
+                if origem == PRIMARY and modo is None:
+                    pendentes.add(dispara_secundaria("failover"))
+        raise erros.get(PRIMARY) or erros[SECONDARY]
+    finally:
+        # A vitória de uma chamada (ou o cancelamento do chamador) não deixa a outra órfã
+        await _cancela(*tasks)
+
+
+async def hedged_call(primary: Callable[[], Awaitable], secondary: Callable[[], Awaitable],
+                      delay: float, on_event: Optional[Callable[[str], None]] = None) -> Tuple[str, object]:
+    """Chama `primary`; sem resposta em `delay` segundos, dispara também `secondary`.
+
+    Devolve (origem, resultado) da primeira chamada bem-sucedida e cancela a
+    outra. Se a primária falhar, a secundária assume (failover). Eventos
+    passados para `on_event`: "hedge", "hedge_won" e "failover".
+    """
+    return await _corrida({PRIMARY: primary, SECONDARY: secondary}, delay, on_event or _sem_evento)
+
+
+async def _ate_primeiro_token(stream: AsyncIterator) -> list:
+    """Lê o stream até o primeiro delta (ou o fim) e devolve os chunks lidos"""
+    lidos = []
+    async for chunk in stream:
+        lidos.append(chunk)
+        if chunk.delta or chunk.done:
+            break
+    return lidos
+
+
+async def hedged_stream(primary: Callable[[], AsyncIterator], secondary: Callable[[], AsyncIterator],
+                        delay: float, on_event: Optional[Callable[[str], None]] = None) -> AsyncIterator:
+    """Versão em streaming de hedged_call, decidida pelo primeiro token.
+
+    O stream que entregar o primeiro delta continua e o outro é fechado.
+    Erros antes do primeiro token passam para o outro stream; depois dele o
+    texto já foi enviado e o erro é propagado.
+    """
+    streams = {}
+
+    def abre(origem: str, fabrica: Callable[[], AsyncIterator]):
+        async def inicia():
+            streams[origem] = fabrica()
+            return await _ate_primeiro_token(streams[origem])
+        return inicia
+
+    vencedor = None
+    try:
+        vencedor, lidos = await _corrida(
+            {PRIMARY: abre(PRIMARY, primary), SECONDARY: abre(SECONDARY, secondary)},
+            delay,
+            on_event or _sem_evento,
+        )
+    finally:
+        for origem, stream in streams.items():
+            if origem != vencedor:
+                await stream.aclose()
+
+    for chunk in lidos:
+        yield chunk
+    async for chunk in streams[vencedor]:
+        yield chunk
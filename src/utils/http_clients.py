@@ -0,0 +1,91 @@
+"""
+Clientes HTTP dos SDKs: pool de conexões limitado, keep-alive, HTTP/2 e
+timeouts de conexão/leitura por provider (bloco "http" em models.json)
+"""
+from importlib.util import find_spec
+from typing import Any, Dict
+
+import httpx
+
+_config_manager = None
+
+
+def http_settings(provider: str) -> Dict[str, Any]:
+    global _config_manager
+    if _config_manager is None:
+        from config.manager import ConfigManager
+        _config_manager = ConfigManager()
+    return _config_manager.get_http_settings(provider)
+
+
+def http2_available() -> bool:
+    return find_spec("h2") is not None
+
+
+def build_timeout(settings: Dict[str, Any]) -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=settings["connect_timeout"],
+        read=settings["read_timeout"],
+        write=settings["write_timeout"],
+        pool=settings["pool_timeout"],
+    )
+
+
+def _client_kwargs(settings: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "timeout": build_timeout(settings),
+        "limits": httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive_connections"],
+            keepalive_expiry=settings["keepalive_expiry"],
+        ),
+        "http2": bool(settings["http2"]) and http2_available(),
+        "follow_redirects": True,
+    }
+
+
+def http_client(provider: str) -> httpx.Client:
+    """httpx.Client ajustado para o provider"""
+    return httpx.Client(**_client_kwargs(http_settings(provider)))
+
+
+def async_http_client(provider: str) -> httpx.AsyncClient:
+    """httpx.AsyncClient ajustado para o provider"""
+    return httpx.AsyncClient(**_client_kwargs(http_settings(provider)))
+
+
+def sdk_options(provider: str, asynchronous: bool = False) -> Dict[str, Any]:
+    """Argumentos `http_client`, `timeout` e `max_retries` para os SDKs OpenAI, Anthropic e Groq.
+
+    O timeout também vai para o SDK porque ele o repassa a cada requisição,
+    sobrepondo o do cliente httpx (o padrão do SDK OpenAI é de 10 minutos).
+    As novas tentativas ficam com utils/resilience.py, que conhece o prazo
+    total e o disjuntor; as do SDK são desligadas para não multiplicá-las.
+    """
+    settings = http_settings(provider)
+    cliente = httpx.AsyncClient if asynchronous else httpx.Client
+    return {"http_client": cliente(**_client_kwargs(settings)), "timeout": build_timeout(settings), "max_retries": 0}
+
+
+def genai_http_options(provider: str = "gemini") -> Dict[str, Any]:
+    """Argumentos de google.genai.types.HttpOptions (timeout em ms e clientes httpx)"""
+    settings = http_settings(provider)
+    return {
+        "timeout": int(settings["read_timeout"] * 1000),
+        "httpx_client": http_client(provider),
+        "httpx_async_client": async_http_client(provider),
+    }
+
+
+def botocore_config(provider: str, **kwargs):
+    """botocore Config com os mesmos timeouts e tamanho de pool (Polly e Transcribe não usam httpx)"""
+    from botocore.config import Config
+
+    settings = http_settings(provider)
+    return Config(
+        connect_timeout=settings["connect_timeout"],
+        read_timeout=settings["read_timeout"],
+        max_pool_connections=settings["max_keepalive_connections"],
+        tcp_keepalive=True,
+        **kwargs,
+    )
@@ -0,0 +1,307 @@
+"""
+Jobs assíncronos da API: fila persistente, workers limitados e webhooks
+"""
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from constants import JOBS_MAX_WORKERS, JOBS_POLL_INTERVAL, JOBS_WEBHOOK_ATTEMPTS
+from utils.cache import _resolve_cache_dir
+from utils.error_handler import SecureErrorHandler
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _hosts_liberados() -> set:
+    """Hosts internos aceitos como webhook (MINHAIA_WEBHOOK_HOSTS, separados por vírgula)"""
+    return {host.strip().lower() for host in os.getenv("MINHAIA_WEBHOOK_HOSTS", "").split(",") if host.strip()}
+
+
+def webhook_error(url: str) -> Optional[str]:
+    """Motivo para recusar o webhook, ou None se ele pode ser chamado.
+
+    Só aceita http(s) para endereços públicos: loopback, redes privadas,
+    link-local (metadados de nuvem) e afins exigem o host em
+    MINHAIA_WEBHOOK_HOSTS. Resolve o DNS, então deve rodar fora do event loop.
+    """
+    partes = urlsplit(url)
+    if partes.scheme not in ("http", "https") or not partes.hostname:
+        return "O webhook precisa ser uma URL http ou https."
+    host = partes.hostname.lower()
+    if host in _hosts_liberados():
+        return None
+    try:
+        enderecos = {info[4][0] for info in socket.getaddrinfo(host, partes.port or 80, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError, ValueError):
+        return "Não foi possível resolver o host do webhook."
+    for endereco in enderecos:
+        ip = ipaddress.ip_address(endereco.split("%", 1)[0])
+        ip = getattr(ip, "ipv4_mapped", None) or ip
+        if not ip.is_global or ip.is_multicast:
+            return "O webhook não pode apontar para um endereço interno."
+    return None
+
+
+class JobStore:
+    """Jobs em SQLite (WAL): estado e resultado sobrevivem a reinícios do servidor"""
+
+    CAMPOS = ("id", "status", "pedido", "resposta", "modelo", "erro", "webhook",
+              "provider", "background_id", "dono", "worker_pid", "criado_em", "atualizado_em")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(_resolve_cache_dir(), "jobs.sqlite3")
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, pedido TEXT NOT NULL, "
+                "resposta TEXT, modelo TEXT, erro TEXT, webhook TEXT, provider TEXT, "
+                "background_id TEXT, dono TEXT, worker_pid INTEGER, criado_em REAL NOT NULL, "
+                "atualizado_em REAL NOT NULL)"
+            )
+            colunas = {linha[1] for linha in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "worker_pid" not in colunas:
+                # Bancos antigos guardavam o PID do worker na coluna dono
+                self._conn.execute("ALTER TABLE jobs RENAME COLUMN dono TO worker_pid")
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN dono TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _row_to_job(self, row) -> Dict:
+        job = dict(zip(self.CAMPOS, row))
+        job["pedido"] = json.loads(job["pedido"])
+        return job
+
+    def create(self, pedido: dict, webhook: Optional[str] = None, dono: Optional[str] = None,
+               worker_pid: Optional[int] = None) -> Dict:
+        agora = time.time()
+        job_id = uuid.uuid4().hex
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, pedido, webhook, dono, worker_pid, criado_em, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(pedido), webhook, dono, worker_pid, agora, agora),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {', '.join(self.CAMPOS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def update(self, job_id: str, **campos):
+        campos["atualizado_em"] = time.time()
+        atribuicoes = ", ".join(f"{nome} = ?" for nome in campos)
+        with self._transaction() as conn:
+            conn.execute(f"UPDATE jobs SET {atribuicoes} WHERE id = ?", (*campos.values(), job_id))
+
+    def claim_orphans(self, worker_pid: int) -> List[Dict]:
+        """Assume os jobs pendentes cujo worker não existe mais (reinício ou worker morto)"""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(self.CAMPOS)} FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchall()
+            orfaos = [self._row_to_job(row) for row in rows]
+            orfaos = [job for job in orfaos if job["worker_pid"] == worker_pid or not _pid_alive(job["worker_pid"])]
+            conn.executemany("UPDATE jobs SET worker_pid = ? WHERE id = ?",
+                             [(worker_pid, job["id"]) for job in orfaos])
+        return orfaos
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class JobManager:
+    """Executa jobs com no máximo `max_workers` chamadas locais simultâneas.
+
+    `run(pedido)` processa o job no servidor e devolve {"resposta", "modelo"}.
+    Quando `start_background(pedido)` devolve {"provider", "background_id",
+    "modelo"}, o provider processa o job do lado dele e `poll_background(job)`
+    é consultado a cada `poll_interval` segundos sem ocupar um worker.
+    """
+
+    def __init__(self, store: JobStore, run: Callable[[dict], Awaitable[dict]],
+                 start_background: Optional[Callable[[dict], Awaitable[Optional[dict]]]] = None,
+                 poll_background: Optional[Callable[[dict], Awaitable[Optional[dict]]]] = None,
+                 max_workers: int = JOBS_MAX_WORKERS, poll_interval: float = JOBS_POLL_INTERVAL):
+        self.store = store
+        self.run = run
+        self.start_background = start_background
+        self.poll_background = poll_background
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = set()
+        self._executando = 0
+        self._parando = False
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._parando = False
+        for _ in range(self.max_workers):
+            self._spawn(self._worker())
+        for job in await asyncio.to_thread(self.store.claim_orphans, os.getpid()):
+            if job["background_id"]:
+                self._spawn(self._acompanha(job["id"]))
+            else:
+                await asyncio.to_thread(self.store.update, job["id"], status=QUEUED)
+                self._queue.put_nowait(job["id"])
+
+    async def stop(self, timeout: float = 0):
+        """Para os workers, esperando até `timeout` segundos pelos jobs em execução.
+
+        Jobs ainda na fila (ou interrompidos no prazo) continuam no store e
+        são retomados como órfãos na próxima inicialização.
+        """
+        self._parando = True
+        prazo = time.monotonic() + timeout
+        while self._executando and time.monotonic() < prazo:
+            await asyncio.sleep(0.05)
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def submit(self, pedido: dict, webhook: Optional[str] = None, dono: Optional[str] = None) -> Dict:
+        """Enfileira o job; `dono` identifica quem pode consultá-lo"""
+        job = await asyncio.to_thread(self.store.create, pedido, webhook, dono=dono, worker_pid=os.getpid())
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            if self._parando:
+                self._queue.task_done()
+                return
+            self._executando += 1
+            try:
+                await self._executa(job_id)
+            finally:
+                self._executando -= 1
+                self._queue.task_done()
+
+    async def _executa(self, job_id: str):
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job["status"] not in (QUEUED, RUNNING):
+            return
+        await asyncio.to_thread(self.store.update, job_id, status=RUNNING)
+        try:
+            if self.start_background:
+                remoto = await self.start_background(job["pedido"])
+                if remoto:
+                    await asyncio.to_thread(self.store.update, job_id, provider=remoto["provider"],
+                                            background_id=remoto["background_id"], modelo=remoto["modelo"])
+                    self._spawn(self._acompanha(job_id))
+                    return
+            resultado = await self.run(job["pedido"])
+        except Exception as e:
+            await self._finaliza(job_id, erro=e)
+            return
+        await self._finaliza(job_id, resultado=resultado)
+
+    async def _acompanha(self, job_id: str):
+        """Consulta o job em background no provider até ele terminar"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                resultado = await self.poll_background(await asyncio.to_thread(self.store.get, job_id))
+            except Exception as e:
+                await self._finaliza(job_id, erro=e)
+                return
+            if resultado is not None:
+                await self._finaliza(job_id, resultado=resultado)
+                return
+
+    async def _finaliza(self, job_id: str, resultado: Optional[dict] = None, erro: Optional[Exception] = None):
+        if erro is not None:
+            SecureErrorHandler.handle_error("api_error", erro, context={"job": job_id}, exit_code=0, show_hint=False)
+            await asyncio.to_thread(self.store.update, job_id, status=FAILED,
+                                    erro=SecureErrorHandler.ERROR_MESSAGES["api_error"])
+        else:
+            await asyncio.to_thread(self.store.update, job_id, status=SUCCEEDED,
+                                    resposta=resultado["resposta"], modelo=resultado["modelo"])
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job and job["webhook"]:
+            await self._notifica(job)
+
+    async def _notifica(self, job: Dict):
+        """POST do job finalizado no webhook, com algumas tentativas"""
+        import httpx
+
+        recusa = await asyncio.to_thread(webhook_error, job["webhook"])
+        if recusa:
+            # O DNS pode ter mudado desde a criação do job
+            SecureErrorHandler.handle_error("network_error", Exception(recusa), context={"job": job["id"]},
+                                            exit_code=0, show_hint=False)
+            return
+        corpo = public_view(job)
+        for tentativa in range(JOBS_WEBHOOK_ATTEMPTS):
+            try:
+                async with httpx.AsyncClient(timeout=10) as client:
+                    resposta = await client.post(job["webhook"], json=corpo)
+                if resposta.status_code < 500:
+                    return
+            except httpx.HTTPError as e:
+                erro = e
+            else:
+                erro = Exception(f"Webhook respondeu {resposta.status_code}")
+            if tentativa + 1 < JOBS_WEBHOOK_ATTEMPTS:
+                await asyncio.sleep(2 ** tentativa)
+        SecureErrorHandler.handle_error("network_error", erro, context={"job": job["id"]}, exit_code=0, show_hint=False)
+
+
+def public_view(job: Dict) -> Dict:
+    """Campos do job expostos na API e no webhook"""
+    return {chave: job[chave] for chave in ("id", "status", "resposta", "modelo", "erro", "criado_em", "atualizado_em")}
@@ -0,0 +1,288 @@
+"""
+Métricas no formato texto do Prometheus (endpoint /metrics da API)
+"""
+import math
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from constants import METRICS_LATENCY_BUCKETS
+
+
+def _escape(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(nomes: Tuple[str, ...], valores: Tuple[str, ...], extra: str = "") -> str:
+    pares = [f'{nome}="{_escape(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _format_value(valor: float) -> str:
+    if valor == math.inf:
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metric:
+    tipo = "untyped"
+
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.labels = tuple(labels)
+        self._valores: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(nome, "")) for nome in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+
+    def export(self) -> list:
+        """Valores serializáveis em JSON, para o SharedStateStore"""
+        with self._lock:
+            return [[list(key), valor] for key, valor in self._valores.items()]
+
+    @staticmethod
+    def combine(atual, novo):
+        """Soma os valores de dois processos para a mesma combinação de labels"""
+        return atual + novo
+
+    def _linhas(self, valores: dict):
+        linhas = self.header()
+        for key, valor in sorted(valores.items()):
+            linhas.append(f"{self.nome}{_format_labels(self.labels, key)} {_format_value(valor)}")
+        return linhas
+
+    def render(self, valores: Optional[dict] = None):
+        if valores is None:
+            with self._lock:
+                valores = dict(self._valores)
+        return self._linhas(valores)
+
+
+class Counter(_Metric):
+    tipo = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Contadores só aumentam")
+        key = self._key(labels)
+        with self._lock:
+            self._valores[key] = self._valores.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._valores.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    tipo = "gauge"
+
+    def set(self, valor: float, **labels):
+        with self._lock:
+            self._valores[self._key(labels)] = valor
+
+    def value(self, **labels) -> float:
+        return self._valores.get(self._key(labels), 0)
+
+
+class MaxGauge(Gauge):
+    """Gauge de um estado já compartilhado entre processos: vale o maior valor, não a soma"""
+
+    @staticmethod
+    def combine(atual, novo):
+        return max(atual, novo)
+
+
+class Histogram(_Metric):
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = (),
+                 buckets: Iterable[float] = METRICS_LATENCY_BUCKETS):
+        super().__init__(nome, descricao, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, valor: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            contagens, soma = self._valores.get(key, ([0] * len(self.buckets), 0.0))
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    contagens[i] += 1
+            self._valores[key] = (contagens, soma + valor)
+
+    def count(self, **labels) -> int:
+        entrada = self._valores.get(self._key(labels))
+        return entrada[0][-1] if entrada else 0
+
+    def export(self) -> list:
+        with self._lock:
+            return [[list(key), [list(contagens), soma]] for key, (contagens, soma) in self._valores.items()]
+
+    @staticmethod
+    def combine(atual, novo):
+        return [a + b for a, b in zip(atual[0], novo[0])], atual[1] + novo[1]
+
+    def _linhas(self, valores: dict):
+        linhas = self.header()
+        for key, (contagens, soma) in sorted(valores.items()):
+            for limite, contagem in zip(self.buckets, contagens):
+                le = f'le="{_format_value(limite)}"'
+                linhas.append(f"{self.nome}_bucket{_format_labels(self.labels, key, le)} {contagem}")
+            linhas.append(f"{self.nome}_sum{_format_labels(self.labels, key)} {_format_value(soma)}")
+            linhas.append(f"{self.nome}_count{_format_labels(self.labels, key)} {contagens[-1]}")
+        return linhas
+
+
+class MetricsRegistry:
+    """Conjunto de métricas exportado em /metrics.
+
+    Com vários workers, cada processo publica periodicamente seus valores no
+    SharedStateStore (attach_store) e /metrics soma os retratos de todos.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._store = None
+
+    def attach_store(self, store):
+        self._store = store
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Função chamada antes de exportar, para atualizar gauges sob demanda"""
+        self._collectors.append(collector)
+
+    def _collect(self):
+        for collector in self._collectors:
+            collector()
+
+    def export(self) -> Dict[str, list]:
+        self._collect()
+        return {nome: metrica.export() for nome, metrica in self._metricas.items()}
+
+    def publish(self):
+        """Grava os valores deste processo no store compartilhado (no-op sem store)"""
+        if self._store is not None:
+            self._store.publish_metrics(self.export(), os.getpid())
+
+    def _register(self, metrica: _Metric) -> _Metric:
+        existente = self._metricas.get(metrica.nome)
+        if existente is not None:
+            return existente
+        self._metricas[metrica.nome] = metrica
+        return metrica
+
+    def counter(self, nome: str, descricao: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(nome, descricao, labels))
+
+    def gauge(self, nome: str, descricao: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(nome, descricao, labels))
+
+    def max_gauge(self, nome: str, descricao: str, labels: Iterable[str] = ()) -> MaxGauge:
+        return self._register(MaxGauge(nome, descricao, labels))
+
+    def histogram(self, nome: str, descricao: str, labels: Iterable[str] = (),
+                  buckets: Optional[Iterable[float]] = None) -> Histogram:
+        return self._register(Histogram(nome, descricao, labels, buckets or METRICS_LATENCY_BUCKETS))
+
+    def _merged(self) -> Dict[str, dict]:
+        self.publish()
+        merged: Dict[str, dict] = {}
+        for retrato in self._store.load_metrics():
+            for nome, itens in retrato.items():
+                metrica = self._metricas.get(nome)
+                if metrica is None:
+                    continue
+                destino = merged.setdefault(nome, {})
+                for key, valor in itens:
+                    key = tuple(key)
+                    destino[key] = metrica.combine(destino[key], valor) if key in destino else valor
+        return merged
+
+    def render(self) -> str:
+        linhas = []
+        if self._store is None:
+            self._collect()
+            for metrica in self._metricas.values():
+                linhas.extend(metrica.render())
+        else:
+            merged = self._merged()
+            for nome, metrica in self._metricas.items():
+                linhas.extend(metrica.render(merged.get(nome, {})))
+        return "\n".join(linhas) + "\n"
+
+
+registry = MetricsRegistry()
+
+MODEL_LABELS = ("provider", "model", "capacidade")
+
+REQUESTS = registry.counter(
+    "minhaia_requests_total", "Requisições atendidas por endpoint e resultado",
+    ("endpoint",) + MODEL_LABELS + ("resultado",),
+)
+PHASE_SECONDS = registry.histogram(
+    "minhaia_request_phase_seconds", "Duração por fase: queue, upstream e post",
+    MODEL_LABELS + ("phase",),
+)
+TTFT_SECONDS = registry.histogram(
+    "minhaia_time_to_first_token_seconds", "Tempo até o primeiro token em /chat/stream",
+    MODEL_LABELS,
+)
+TTS_FIRST_BYTE_SECONDS = registry.histogram(
+    "minhaia_tts_first_byte_seconds", "Tempo até o primeiro byte de áudio em /tts", ("engine",),
+)
+INPUT_TOKENS = registry.counter(
+    "minhaia_input_tokens_total", "Tokens de entrada informados pelos providers", MODEL_LABELS,
+)
+OUTPUT_TOKENS = registry.counter(
+    "minhaia_output_tokens_total", "Tokens de saída informados pelos providers", MODEL_LABELS,
+)
+ERRORS = registry.counter(
+    "minhaia_errors_total", "Erros por tipo do SecureErrorHandler e status HTTP",
+    ("error_type", "status"),
+)
+HEDGE_EVENTS = registry.counter(
+    "minhaia_hedge_events_total", "Hedges disparados, vencidos pelo secundário e failovers",
+    ("provider", "secondary", "evento"),
+)
+ROUTER_CHOICES = registry.counter(
+    "minhaia_router_choices_total", "Escolhas do provider auto por motivo (best, explore, probe, unmeasured)",
+    ("provider", "model", "motivo"),
+)
+IN_FLIGHT = registry.gauge(
+    "minhaia_admission_in_flight", "Chamadas em andamento por chave de admissão", ("chave",),
+)
+QUEUE_WAITING = registry.gauge(
+    "minhaia_admission_waiting", "Requisições na fila por chave de admissão", ("chave",),
+)
+
+RETRIES = registry.counter(
+    "minhaia_retries_total", "Novas tentativas de chamadas aos providers por motivo (status HTTP ou connection)",
+    ("provider", "model", "motivo"),
+)
+CIRCUIT_STATE = registry.max_gauge(
+    "minhaia_circuit_state", "Estado do disjuntor por provider e modelo (0 fechado, 1 semiaberto, 2 aberto)",
+    ("provider", "model"),
+)
+CIRCUIT_REJECTIONS = registry.counter(
+    "minhaia_circuit_rejections_total", "Chamadas recusadas na hora por disjuntor aberto", ("provider", "model"),
+)
+
+
+def record_usage(usage: Optional[dict], **labels):
+    """Soma input_tokens/output_tokens (formato de usage_to_dict) aos contadores"""
+    if not usage:
+        return
+    INPUT_TOKENS.inc(usage.get("input_tokens") or 0, **labels)
+    OUTPUT_TOKENS.inc(usage.get("output_tokens") or 0, **labels)
+
+
+def record_error(error_type: str, status: int):
+    ERRORS.inc(error_type=error_type, status=status)
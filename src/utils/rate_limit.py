@@ -0,0 +1,158 @@
+"""
+Limite de taxa por chave de API (token bucket)
+"""
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+from constants import DEFAULT_KEY_RATE_LIMIT
+
+
+class RateLimitExceeded(Exception):
+    """A chave excedeu sua taxa de requisições ou de tokens"""
+
+    def __init__(self, key_label: str, retry_after: int, motivo: str):
+        super().__init__(f"Limite de {motivo} excedido para {key_label}")
+        self.retry_after = retry_after
+        self.motivo = motivo
+
+
+class TokenBucket:
+    """Balde com `capacity` fichas reabastecido a `rate` fichas por segundo.
+
+    Um pedido maior que a capacidade (um lote grande) passa com o balde
+    cheio e o deixa negativo: a dívida é paga antes do próximo pedido, então
+    a taxa média continua respeitada.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: Optional[float] = None) -> float:
+        """Segundos até haver `amount` fichas, ou o balde cheio se `amount` passar da capacidade"""
+        self._refill(time.monotonic() if now is None else now)
+        falta = min(amount, self.capacity) - self.tokens
+        if falta <= 0:
+            return 0.0
+        return falta / self.rate if self.rate > 0 else math.inf
+
+    def consume(self, amount: float):
+        self.tokens -= amount
+
+
+class KeyRateLimiter:
+    """Dois baldes por chave: requisições por segundo e tokens estimados por minuto.
+
+    Os limites vêm de `limites` em api.key.json (por chave) com
+    `limite_padrao` (ou DEFAULT_KEY_RATE_LIMIT) como fallback. Uma requisição
+    só consome fichas se couber nos dois baldes.
+    """
+
+    def __init__(self, limits_by_key: Optional[Dict[str, dict]] = None, default_limits: Optional[dict] = None):
+        self.limits_by_key = limits_by_key or {}
+        self.default_limits = {**DEFAULT_KEY_RATE_LIMIT, **(default_limits or {})}
+        self._buckets: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _limits(self, key: str) -> dict:
+        return {**self.default_limits, **self.limits_by_key.get(key, {})}
+
+    def _buckets_for(self, key: str):
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            limits = self._limits(key)
+            buckets = (
+                TokenBucket(float(limits["rps"]), float(limits["burst"])),
+                TokenBucket(float(limits["tpm"]) / 60.0, float(limits["tpm"])),
+            )
+            self._buckets[key] = buckets
+        return buckets
+
+    @staticmethod
+    def estimate_tokens(texto: str) -> int:
+        """Estimativa grosseira (~4 caracteres por token) usada antes da chamada"""
+        return len(texto or "") // 4 + 1
+
+    @staticmethod
+    def _rejeita(key: str, espera_req: float, espera_tok: float):
+        motivo = "requisições" if espera_req >= espera_tok else "tokens"
+        raise RateLimitExceeded(key[:4] + "…", max(1, math.ceil(max(espera_req, espera_tok))), motivo)
+
+    def check(self, key: str, requests: int = 1, tokens: int = 0):
+        """Consome as fichas da chave ou levanta RateLimitExceeded com o Retry-After"""
+        with self._lock:
+            req_bucket, tok_bucket = self._buckets_for(key)
+            now = time.monotonic()
+            espera_req = req_bucket.wait_time(requests, now)
+            espera_tok = tok_bucket.wait_time(tokens, now)
+            if espera_req > 0 or espera_tok > 0:
+                self._rejeita(key, espera_req, espera_tok)
+            req_bucket.consume(requests)
+            tok_bucket.consume(tokens)
+
+    async def acheck(self, key: str, requests: int = 1, tokens: int = 0):
+        """check() para o event loop (os baldes em memória não bloqueiam)"""
+        self.check(key, requests, tokens)
+
+
+class SharedKeyRateLimiter(KeyRateLimiter):
+    """KeyRateLimiter com os baldes no SharedStateStore, válido para todos os workers.
+
+    Usa o relógio de parede (time.time), comum aos processos, e uma transação
+    BEGIN IMMEDIATE para que dois workers não gastem as mesmas fichas. A
+    chave de API vai para o disco só como hash, como o dono de jobs e sessões.
+    """
+
+    def __init__(self, store, limits_by_key: Optional[Dict[str, dict]] = None,
+                 default_limits: Optional[dict] = None):
+        super().__init__(limits_by_key, default_limits)
+        self.store = store
+
+    @staticmethod
+    def _stored_key(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+    def _load_bucket(self, conn, key: str, tipo: str, rate: float, capacity: float, now: float) -> TokenBucket:
+        bucket = TokenBucket(rate, capacity)
+        row = conn.execute(
+            "SELECT fichas, atualizado_em FROM baldes WHERE chave = ? AND tipo = ?", (key, tipo)
+        ).fetchone()
+        if row:
+            bucket.tokens, bucket.updated = row[0], min(row[1], now)
+        else:
+            bucket.updated = now
+        return bucket
+
+    def check(self, key: str, requests: int = 1, tokens: int = 0):
+        limits = self._limits(key)
+        now = time.time()
+        armazenada = self._stored_key(key)
+        with self.store.transaction() as conn:
+            req_bucket = self._load_bucket(conn, armazenada, "req", float(limits["rps"]), float(limits["burst"]), now)
+            tok_bucket = self._load_bucket(
+                conn, armazenada, "tok", float(limits["tpm"]) / 60.0, float(limits["tpm"]), now
+            )
+            espera_req = req_bucket.wait_time(requests, now)
+            espera_tok = tok_bucket.wait_time(tokens, now)
+            if espera_req > 0 or espera_tok > 0:
+                self._rejeita(key, espera_req, espera_tok)
+            req_bucket.consume(requests)
+            tok_bucket.consume(tokens)
+            conn.executemany(
+                "INSERT OR REPLACE INTO baldes (chave, tipo, fichas, atualizado_em) VALUES (?, ?, ?, ?)",
+                [(armazenada, "req", req_bucket.tokens, now), (armazenada, "tok", tok_bucket.tokens, now)],
+            )
+
+    async def acheck(self, key: str, requests: int = 1, tokens: int = 0):
+        """A transação pode esperar o lock de outro worker: roda numa thread, fora do event loop"""
+        await asyncio.to_thread(self.check, key, requests, tokens)
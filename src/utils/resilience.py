@@ -0,0 +1,364 @@
+"""
+Resiliência das chamadas aos providers: novas tentativas com backoff
+exponencial e jitter, respeito ao Retry-After, prazo total e um disjuntor
+(circuit breaker) por provider+modelo
+"""
+import asyncio
+import random
+import sys
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Sequence
+
+from constants import RESILIENCE_DEFAULTS
+from utils import metrics, timing
+from utils.router import route_key
+
+FECHADO = "closed"
+SEMIABERTO = "half_open"
+ABERTO = "open"
+_VALOR_ESTADO = {FECHADO: 0, SEMIABERTO: 1, ABERTO: 2}
+
+# 529: "overloaded" da Anthropic
+STATUS_TRANSITORIOS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+# Falhas de rede dos SDKs (openai, anthropic, groq) e do httpx, reconhecidas pelo nome da classe
+_ERROS_DE_CONEXAO = {"APIConnectionError", "APITimeoutError", "TransportError", "TimeoutException"}
+
+
+class CircuitOpenError(Exception):
+    """Disjuntor aberto: a chamada é recusada sem ir ao provider"""
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Circuito aberto para {key}; nova tentativa em {retry_after:.0f}s")
+        self.key = key
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+def _cadeia(erro: Exception):
+    """O erro e suas causas (`raise ... from e`), para os providers que embrulham o erro do SDK"""
+    vistos = set()
+    while erro is not None and id(erro) not in vistos:
+        vistos.add(id(erro))
+        yield erro
+        erro = erro.__cause__
+
+
+def status_code(erro: Exception) -> Optional[int]:
+    """Status HTTP do erro do SDK (status_code ou code, no erro ou na resposta)"""
+    for causa in _cadeia(erro):
+        for origem in (causa, getattr(causa, "response", None)):
+            for atributo in ("status_code", "code"):
+                valor = getattr(origem, atributo, None)
+                if isinstance(valor, int) and 100 <= valor < 600:
+                    return valor
+    return None
+
+
+def retry_after(erro: Exception) -> Optional[float]:
+    """Segundos pedidos pelo servidor em retry-after-ms ou Retry-After (segundos ou data HTTP)"""
+    headers = next((h for causa in _cadeia(erro)
+                    for h in (getattr(causa, "headers", None), getattr(getattr(causa, "response", None), "headers", None))
+                    if h), None)
+    if not headers:
+        return None
+    headers = {str(nome).lower(): valor for nome, valor in headers.items()}
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        valor = headers.get("retry-after")
+        if valor is None:
+            return None
+        try:
+            return max(0.0, float(valor))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def transient_reason(erro: Exception) -> Optional[str]:
+    """Motivo ("429", "503", "connection"...) quando vale tentar de novo; None para erros definitivos"""
+    codigo = status_code(erro)
+    if codigo is not None:
+        return str(codigo) if codigo in STATUS_TRANSITORIOS else None
+    for causa in _cadeia(erro):
+        if isinstance(causa, (ConnectionError, TimeoutError)):
+            return "connection"
+        if any(classe.__name__ in _ERROS_DE_CONEXAO for classe in type(causa).__mro__):
+            return "connection"
+    return None
+
+
+def _novo_estado() -> dict:
+    return {"estado": FECHADO, "resultados": [], "reabre_em": 0.0, "sonda_ate": 0.0}
+
+
+class CircuitBreakers:
+    """Disjuntores por provider+modelo, na memória ou num SharedStateStore.
+
+    Fechado, guarda o resultado das últimas `window` chamadas e abre quando
+    a fração de falhas transitórias passa de `failure_threshold` (com pelo
+    menos `min_calls`). Aberto, recusa tudo por `open_seconds` e depois
+    libera uma única chamada de sondagem (semiaberto): sucesso fecha o
+    disjuntor, falha o abre de novo. Com um store o estado vale para todos
+    os workers e entre execuções da CLI.
+    """
+
+    def __init__(self, store=None, clock: Callable[[], float] = time.time):
+        self.store = store
+        self._clock = clock
+        self._estados: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def attach_store(self, store):
+        self.store = store
+
+    def _le(self, keys: Optional[Sequence[str]] = None) -> Dict[str, dict]:
+        if self.store is not None:
+            return self.store.load_breakers(keys)
+        with self._lock:
+            return {key: dict(dados) for key, dados in self._estados.items() if keys is None or key in keys}
+
+    def _transacao(self, key: str, operacao: Callable[[dict], object]):
+        """Aplica `operacao` (altera o estado e devolve um resultado) de forma atômica"""
+        resultado = []
+
+        def aplica(dados):
+            estado = dados or _novo_estado()
+            resultado.append(operacao(estado))
+            return estado
+
+        if self.store is not None:
+            self.store.update_breaker(key, aplica)
+        else:
+            with self._lock:
+                self._estados[key] = aplica(self._estados.get(key))
+        return resultado[0]
+
+    def allow(self, provider: str, model: str, politica: dict):
+        """Levanta CircuitOpenError se o disjuntor não deixa a chamada passar"""
+        key = route_key(provider, model)
+        atual = self._le([key]).get(key)
+        if atual is None or atual["estado"] == FECHADO:
+            return
+        agora = self._clock()
+
+        def operacao(estado):
+            if estado["estado"] == ABERTO:
+                if agora < estado["reabre_em"]:
+                    return estado["reabre_em"] - agora
+                estado["estado"] = SEMIABERTO
+            elif estado["estado"] == SEMIABERTO and agora < estado["sonda_ate"]:
+                # Uma sondagem por vez; a de um processo que morreu expira após open_seconds
+                return estado["sonda_ate"] - agora
+            if estado["estado"] == SEMIABERTO:
+                estado["sonda_ate"] = agora + politica["open_seconds"]
+            return None
+
+        espera = self._transacao(key, operacao)
+        if espera is not None:
+            metrics.CIRCUIT_REJECTIONS.inc(provider=provider, model=model)
+            raise CircuitOpenError(key, espera)
+
+    def record(self, provider: str, model: str, politica: dict, falha: bool) -> Optional[str]:
+        """Registra o resultado de uma chamada (só falhas transitórias contam como falha).
+
+        Devolve o novo estado quando a chamada o mudou.
+        """
+        key = route_key(provider, model)
+        agora = self._clock()
+
+        def operacao(estado):
+            anterior = estado["estado"]
+            if anterior == SEMIABERTO:
+                estado["sonda_ate"] = 0.0
+                abre = falha
+                if not falha:
+                    estado.update(estado=FECHADO, resultados=[])
+            elif anterior == FECHADO:
+                resultados = (estado["resultados"] + [1 if falha else 0])[-politica["window"]:]
+                estado["resultados"] = resultados
+                abre = (len(resultados) >= politica["min_calls"]
+                        and sum(resultados) / len(resultados) >= politica["failure_threshold"])
+            else:
+                return None  # chamada liberada antes de o disjuntor abrir
+            if abre:
+                estado.update(estado=ABERTO, resultados=[], reabre_em=agora + politica["open_seconds"])
+            return estado["estado"] if estado["estado"] != anterior else None
+
+        mudou = self._transacao(key, operacao)
+        if mudou == ABERTO:
+            print(f"Aviso: circuito de {key} aberto por {politica['open_seconds']:.0f}s", file=sys.stderr)
+        elif mudou == FECHADO:
+            print(f"Circuito de {key} fechado novamente", file=sys.stderr)
+        return mudou
+
+    async def aallow(self, provider: str, model: str, politica: dict):
+        """allow() para o event loop: com store, a transação (que pode esperar o lock) roda numa thread"""
+        if self.store is None:
+            return self.allow(provider, model, politica)
+        await asyncio.to_thread(self.allow, provider, model, politica)
+
+    async def arecord(self, provider: str, model: str, politica: dict, falha: bool) -> Optional[str]:
+        """record() para o event loop, como aallow()"""
+        if self.store is None:
+            return self.record(provider, model, politica, falha)
+        return await asyncio.to_thread(self.record, provider, model, politica, falha)
+
+    def states(self, keys: Optional[Sequence[str]] = None) -> Dict[str, dict]:
+        """Estado de cada disjuntor conhecido; aberto com o prazo vencido aparece como semiaberto"""
+        agora = self._clock()
+        estados = {}
+        for key, dados in self._le(keys).items():
+            estado = dados["estado"]
+            restante = max(0.0, dados["reabre_em"] - agora) if estado == ABERTO else 0.0
+            if estado == ABERTO and restante == 0:
+                estado = SEMIABERTO
+            falhas = dados["resultados"]
+            estados[key] = {
+                "estado": estado,
+                "reabre_em_s": round(restante, 1),
+                "taxa_falhas": round(sum(falhas) / len(falhas), 2) if falhas else 0.0,
+            }
+        return estados
+
+    def collect_metrics(self):
+        for key, dados in self.states().items():
+            provider, _, model = key.partition(":")
+            metrics.CIRCUIT_STATE.set(_VALOR_ESTADO[dados["estado"]], provider=provider, model=model)
+
+
+breakers = CircuitBreakers()
+metrics.registry.add_collector(breakers.collect_metrics)
+
+
+class ResilientProvider:
+    """Envolve um provider de chat com novas tentativas e o disjuntor de cada modelo.
+
+    call_api, stream_api, acall_api e astream_api passam pela política; o
+    resto (clientes, warmup, close, atributos) vai direto ao provider. Um
+    stream só é repetido enquanto nada foi entregue: a tentativa termina no
+    primeiro chunk, e o resultado da chamada vai para o disjuntor uma única
+    vez, quando o stream acaba (uma falha depois do primeiro chunk não é
+    repetida).
+    """
+
+    def __init__(self, name: str, provider, politica: Optional[dict] = None, rng: Optional[random.Random] = None):
+        object.__setattr__(self, "_nome", name)
+        object.__setattr__(self, "_provider", provider)
+        object.__setattr__(self, "_politica", {**RESILIENCE_DEFAULTS, **(politica or {})})
+        object.__setattr__(self, "_rng", rng or random.Random())
+
+    def __getattr__(self, nome):
+        return getattr(self._provider, nome)
+
+    def __setattr__(self, nome, valor):
+        setattr(self._provider, nome, valor)
+
+    @property
+    def wrapped(self):
+        return self._provider
+
+    def _espera(self, erro: Exception, model: str, tentativa: int, inicio: float,
+                estado: Optional[str]) -> Optional[float]:
+        """Quanto esperar antes da próxima tentativa (None: desiste); `estado` é o que o disjuntor devolveu"""
+        motivo = transient_reason(erro)
+        if motivo is None or estado == ABERTO or tentativa >= self._politica["max_attempts"]:
+            return None
+        espera = retry_after(erro)
+        if espera is None:
+            teto = min(self._politica["backoff_max"], self._politica["backoff_base"] * 2 ** (tentativa - 1))
+            espera = self._rng.uniform(0, teto)
+        if time.monotonic() - inicio + espera > self._politica["deadline"]:
+            return None
+        metrics.RETRIES.inc(provider=self._nome, model=model, motivo=motivo)
+        timing.record("retry_wait", espera)
+        print(f"Aviso: {self._nome}/{model} falhou ({motivo}); tentativa {tentativa + 1} de "
+              f"{self._politica['max_attempts']} em {espera:.1f}s", file=sys.stderr)
+        return espera
+
+    def _executa(self, model: str, chamada: Callable[[], object], registra_sucesso: bool = True):
+        inicio = time.monotonic()
+        tentativa = 0
+        while True:
+            tentativa += 1
+            breakers.allow(self._nome, model, self._politica)
+            try:
+                resultado = chamada()
+            except Exception as e:
+                estado = breakers.record(self._nome, model, self._politica, falha=transient_reason(e) is not None)
+                espera = self._espera(e, model, tentativa, inicio, estado)
+                if espera is None:
+                    raise
+                time.sleep(espera)
+                continue
+            if registra_sucesso:
+                breakers.record(self._nome, model, self._politica, falha=False)
+            return resultado
+
+    async def _aexecuta(self, model: str, chamada: Callable[[], object], registra_sucesso: bool = True):
+        inicio = time.monotonic()
+        tentativa = 0
+        while True:
+            tentativa += 1
+            await breakers.aallow(self._nome, model, self._politica)
+            try:
+                resultado = await chamada()
+            except Exception as e:
+                falha = transient_reason(e) is not None
+                estado = await breakers.arecord(self._nome, model, self._politica, falha=falha)
+                espera = self._espera(e, model, tentativa, inicio, estado)
+                if espera is None:
+                    raise
+                await asyncio.sleep(espera)
+                continue
+            if registra_sucesso:
+                await breakers.arecord(self._nome, model, self._politica, falha=False)
+            return resultado
+
+    def call_api(self, message, model, max_tokens, **kwargs):
+        return self._executa(model, lambda: self._provider.call_api(message, model, max_tokens, **kwargs))
+
+    async def acall_api(self, message, model, max_tokens, **kwargs):
+        return await self._aexecuta(model, lambda: self._provider.acall_api(message, model, max_tokens, **kwargs))
+
+    def stream_api(self, message, model, max_tokens, **kwargs):
+        def inicia():
+            chunks = iter(self._provider.stream_api(message, model, max_tokens, **kwargs))
+            return next(chunks, None), chunks
+
+        primeiro, chunks = self._executa(model, inicia, registra_sucesso=False)
+        falha = False
+        try:
+            if primeiro is not None:
+                yield primeiro
+                yield from chunks
+        except Exception as e:
+            falha = transient_reason(e) is not None
+            raise
+        finally:
+            # Também quando o consumidor abandona o stream (hedge perdido, cliente desconectado)
+            breakers.record(self._nome, model, self._politica, falha=falha)
+
+    async def astream_api(self, message, model, max_tokens, **kwargs):
+        async def inicia():
+            chunks = self._provider.astream_api(message, model, max_tokens, **kwargs).__aiter__()
+            try:
+                return await chunks.__anext__(), chunks
+            except StopAsyncIteration:
+                return None, chunks
+
+        primeiro, chunks = await self._aexecuta(model, inicia, registra_sucesso=False)
+        falha = False
+        try:
+            if primeiro is not None:
+                yield primeiro
+                async for chunk in chunks:
+                    yield chunk
+        except Exception as e:
+            falha = transient_reason(e) is not None
+            raise
+        finally:
+            # Também quando o consumidor abandona o stream (hedge perdido, cliente desconectado)
+            await breakers.arecord(self._nome, model, self._politica, falha=falha)
@@ -0,0 +1,145 @@
+"""
+Roteamento automático pelo provider+modelo mais rápido e saudável (provider "auto")
+"""
+import asyncio
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from constants import ROUTER_EWMA_ALPHA, ROUTER_EXPLORATION, ROUTER_MAX_ERROR_RATE, ROUTER_PROBE_SECONDS
+
+
+@dataclass
+class RouteStats:
+    """Médias móveis (EWMA) medidas no tráfego real de um provider+modelo"""
+    latency: Optional[float] = None
+    ttft: Optional[float] = None
+    error_rate: float = 0.0
+    samples: int = 0
+    updated_at: float = 0.0
+
+    def _ewma(self, atual: Optional[float], novo: float, alpha: float) -> float:
+        return novo if atual is None else (1 - alpha) * atual + alpha * novo
+
+    def update(self, alpha: float, latency: Optional[float] = None, ttft: Optional[float] = None,
+               error: bool = False):
+        if latency is not None:
+            self.latency = self._ewma(self.latency, latency, alpha)
+        if ttft is not None:
+            self.ttft = self._ewma(self.ttft, ttft, alpha)
+        self.error_rate = self._ewma(self.error_rate, 1.0 if error else 0.0, alpha)
+        self.samples += 1
+        self.updated_at = time.time()
+
+
+def route_key(provider: str, model: str) -> str:
+    return f"{provider}:{model}"
+
+
+class LatencyRouter:
+    """Escolhe o candidato saudável com menor latência, explorando de vez em quando.
+
+    Candidatos ainda sem medição são escolhidos primeiro; com probabilidade
+    `exploration` a escolha é aleatória entre os saudáveis, o que renova
+    medições antigas. Um candidato com erro demais não recebe tráfego, então
+    depois de `probe_seconds` sem medições ele recebe uma sondagem, que
+    baixa a taxa de erro quando o provider volta. Com um SharedStateStore as médias ficam em disco,
+    compartilhadas entre workers e entre execuções da CLI.
+    """
+
+    def __init__(self, alpha: float = ROUTER_EWMA_ALPHA, exploration: float = ROUTER_EXPLORATION,
+                 max_error_rate: float = ROUTER_MAX_ERROR_RATE, probe_seconds: float = ROUTER_PROBE_SECONDS,
+                 store=None, rng: Optional[random.Random] = None):
+        self.alpha = alpha
+        self.exploration = exploration
+        self.max_error_rate = max_error_rate
+        self.probe_seconds = probe_seconds
+        self.store = store
+        self._rng = rng or random.Random()
+        self._stats: Dict[str, RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def stats(self, key: str) -> RouteStats:
+        if self.store is not None:
+            dados = self.store.load_routes([key]).get(key)
+            return RouteStats(**dados) if dados else RouteStats()
+        return self._stats.get(key) or RouteStats()
+
+    def _snapshot(self, keys: Sequence[str]) -> Dict[str, RouteStats]:
+        if self.store is not None:
+            return {key: RouteStats(**dados) for key, dados in self.store.load_routes(keys).items()}
+        with self._lock:
+            return {key: self._stats[key] for key in keys if key in self._stats}
+
+    @staticmethod
+    def score(stats: RouteStats) -> float:
+        """Latência esperada penalizada pela taxa de erro (menor é melhor)"""
+        base = stats.latency if stats.latency is not None else stats.ttft
+        return (base or 0.0) * (1 + stats.error_rate)
+
+    def choose(self, candidates: List[Tuple[str, str]]) -> Tuple[Tuple[str, str], str]:
+        """Devolve (candidato, motivo) com motivo em unmeasured, probe, explore ou best"""
+        if not candidates:
+            raise ValueError("Nenhum candidato configurado para o provider auto")
+        medidos = self._snapshot([route_key(*c) for c in candidates])
+
+        sem_medicao = [c for c in candidates if route_key(*c) not in medidos]
+        if sem_medicao:
+            return sem_medicao[0], "unmeasured"
+
+        saudaveis = [c for c in candidates if medidos[route_key(*c)].error_rate < self.max_error_rate]
+        limite = time.time() - self.probe_seconds
+        esquecidos = [c for c in candidates if c not in saudaveis and medidos[route_key(*c)].updated_at <= limite]
+        if esquecidos:
+            return min(esquecidos, key=lambda c: medidos[route_key(*c)].updated_at), "probe"
+        if not saudaveis:
+            # Todos com erro: ainda assim tenta o de menor taxa de erro
+            return min(candidates, key=lambda c: medidos[route_key(*c)].error_rate), "best"
+        if len(saudaveis) > 1 and self._rng.random() < self.exploration:
+            return self._rng.choice(saudaveis), "explore"
+        return min(saudaveis, key=lambda c: self.score(medidos[route_key(*c)])), "best"
+
+    def record(self, provider: str, model: str, latency: Optional[float] = None,
+               ttft: Optional[float] = None, error: bool = False):
+        key = route_key(provider, model)
+        if self.store is not None:
+            self.store.update_route(key, lambda dados: self._atualiza(RouteStats(**(dados or {})),
+                                                                        latency, ttft, error))
+            return
+        with self._lock:
+            stats = self._stats.setdefault(key, RouteStats())
+            stats.update(self.alpha, latency, ttft, error)
+
+    async def achoose(self, candidates: List[Tuple[str, str]]) -> Tuple[Tuple[str, str], str]:
+        """choose() para o event loop: com store, a consulta ao SQLite roda numa thread"""
+        if self.store is None:
+            return self.choose(candidates)
+        return await asyncio.to_thread(self.choose, candidates)
+
+    async def arecord(self, provider: str, model: str, latency: Optional[float] = None,
+                      ttft: Optional[float] = None, error: bool = False):
+        """record() para o event loop: com store, a transação (que pode esperar o lock) roda numa thread"""
+        if self.store is None:
+            return self.record(provider, model, latency, ttft, error)
+        await asyncio.to_thread(self.record, provider, model, latency, ttft, error)
+
+    def _atualiza(self, stats: RouteStats, latency, ttft, error) -> dict:
+        stats.update(self.alpha, latency, ttft, error)
+        return asdict(stats)
+
+    def track_stream(self, provider: str, model: str, chunks):
+        """Repassa os StreamChunk medindo o primeiro token e a duração total"""
+        inicio = time.perf_counter()
+        ttft = None
+        try:
+            for chunk in chunks:
+                if chunk.delta and ttft is None:
+                    ttft = time.perf_counter() - inicio
+                if chunk.done:
+                    self.record(provider, model, latency=time.perf_counter() - inicio, ttft=ttft)
+                yield chunk
+        except Exception:
+            self.record(provider, model, error=True)
+            raise
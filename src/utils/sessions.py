@@ -0,0 +1,111 @@
+"""
+Sessões de conversa da API (/ws/session): histórico por sessão em SQLite
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from constants import SESSION_MAX_HISTORY_MESSAGES
+from utils.cache import _resolve_cache_dir
+
+
+class SessionStore:
+    """Sessões e mensagens em SQLite (WAL), indexadas por (sessão, ordem).
+
+    Cada turno acrescenta duas linhas (usuário e assistente); a leitura do
+    histórico usa o índice e traz só as últimas `limite` mensagens, então o
+    custo por turno não cresce com o tamanho da conversa.
+    """
+
+    CAMPOS = ("id", "provider", "capacidade", "persona", "dono", "criado_em", "atualizado_em")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(_resolve_cache_dir(), "sessions.sqlite3")
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessoes ("
+                "id TEXT PRIMARY KEY, provider TEXT, capacidade TEXT, persona TEXT, dono TEXT, "
+                "criado_em REAL NOT NULL, atualizado_em REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS mensagens ("
+                "sessao_id TEXT NOT NULL, ordem INTEGER NOT NULL, papel TEXT NOT NULL, "
+                "conteudo TEXT NOT NULL, criado_em REAL NOT NULL, PRIMARY KEY (sessao_id, ordem))"
+            )
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def create(self, provider: Optional[str] = None, capacidade: Optional[str] = None,
+               persona: Optional[str] = None, dono: Optional[str] = None) -> Dict:
+        agora = time.time()
+        sessao_id = uuid.uuid4().hex
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO sessoes (id, provider, capacidade, persona, dono, criado_em, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (sessao_id, provider, capacidade, persona, dono, agora, agora),
+            )
+        return self.get(sessao_id)
+
+    def get(self, sessao_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {', '.join(self.CAMPOS)} FROM sessoes WHERE id = ?", (sessao_id,)
+            ).fetchone()
+        return dict(zip(self.CAMPOS, row)) if row else None
+
+    def history(self, sessao_id: str, limite: int = SESSION_MAX_HISTORY_MESSAGES) -> List[Dict[str, str]]:
+        """Últimas `limite` mensagens, da mais antiga para a mais nova, no formato dos providers"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT papel, conteudo FROM mensagens WHERE sessao_id = ? ORDER BY ordem DESC LIMIT ?",
+                (sessao_id, limite),
+            ).fetchall()
+        return [{"role": papel, "content": conteudo} for papel, conteudo in reversed(rows)]
+
+    def append_turn(self, sessao_id: str, pergunta: str, resposta: str):
+        """Grava a pergunta e a resposta de um turno concluído"""
+        agora = time.time()
+        with self._transaction() as conn:
+            ultima = conn.execute(
+                "SELECT COALESCE(MAX(ordem), 0) FROM mensagens WHERE sessao_id = ?", (sessao_id,)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO mensagens (sessao_id, ordem, papel, conteudo, criado_em) VALUES (?, ?, ?, ?, ?)",
+                [(sessao_id, ultima + 1, "user", pergunta, agora),
+                 (sessao_id, ultima + 2, "assistant", resposta, agora)],
+            )
+            conn.execute("UPDATE sessoes SET atualizado_em = ? WHERE id = ?", (agora, sessao_id))
+
+    def delete(self, sessao_id: str) -> bool:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM mensagens WHERE sessao_id = ?", (sessao_id,))
+            return conn.execute("DELETE FROM sessoes WHERE id = ?", (sessao_id,)).rowcount > 0
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
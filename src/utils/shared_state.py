@@ -0,0 +1,123 @@
+"""
+Estado compartilhado entre os workers da API (SQLite em modo WAL)
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from utils.cache import _resolve_cache_dir
+
+
+class SharedStateStore:
+    """Arquivo SQLite local com baldes de taxa, métricas, médias do roteamento e disjuntores.
+
+    O cache de respostas já é compartilhado pela camada em disco do
+    ResponseCache; aqui ficam os dados que antes viviam só na memória de
+    cada processo.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(_resolve_cache_dir(), "shared-state.sqlite3")
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            # isolation_level=None: as transações são abertas explicitamente com BEGIN IMMEDIATE
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS baldes ("
+                "chave TEXT NOT NULL, tipo TEXT NOT NULL, fichas REAL NOT NULL, "
+                "atualizado_em REAL NOT NULL, PRIMARY KEY (chave, tipo))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS metricas (pid INTEGER PRIMARY KEY, dados TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rotas (chave TEXT PRIMARY KEY, dados TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS disjuntores (chave TEXT PRIMARY KEY, dados TEXT NOT NULL)"
+            )
+        return self._conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transação exclusiva entre processos (BEGIN IMMEDIATE)"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def publish_metrics(self, dados: Dict[str, list], pid: Optional[int] = None):
+        """Grava o retrato das métricas deste processo"""
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO metricas (pid, dados) VALUES (?, ?)",
+                (pid or os.getpid(), json.dumps(dados)),
+            )
+
+    def load_metrics(self) -> List[Dict[str, list]]:
+        with self._lock:
+            rows = self._connection().execute("SELECT dados FROM metricas").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def load_routes(self, keys: Sequence[str]) -> Dict[str, dict]:
+        """Médias do roteamento automático das chaves pedidas (as sem medição ficam de fora)"""
+        if not keys:
+            return {}
+        marcadores = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT chave, dados FROM rotas WHERE chave IN ({marcadores})", list(keys)
+            ).fetchall()
+        return {chave: json.loads(dados) for chave, dados in rows}
+
+    def update_route(self, key: str, atualiza: Callable[[Optional[dict]], dict]):
+        """Lê, atualiza e grava as médias de uma rota numa única transação"""
+        with self.transaction() as conn:
+            row = conn.execute("SELECT dados FROM rotas WHERE chave = ?", (key,)).fetchone()
+            dados = atualiza(json.loads(row[0]) if row else None)
+            conn.execute("INSERT OR REPLACE INTO rotas (chave, dados) VALUES (?, ?)", (key, json.dumps(dados)))
+
+    def load_breakers(self, keys: Optional[Sequence[str]] = None) -> Dict[str, dict]:
+        """Estado dos disjuntores das chaves pedidas (todos, sem `keys`)"""
+        with self._lock:
+            if keys is None:
+                rows = self._connection().execute("SELECT chave, dados FROM disjuntores").fetchall()
+            elif not keys:
+                rows = []
+            else:
+                rows = self._connection().execute(
+                    f"SELECT chave, dados FROM disjuntores WHERE chave IN ({','.join('?' * len(keys))})", list(keys)
+                ).fetchall()
+        return {chave: json.loads(dados) for chave, dados in rows}
+
+    def update_breaker(self, key: str, atualiza: Callable[[Optional[dict]], dict]):
+        """Lê, atualiza e grava o estado de um disjuntor numa única transação"""
+        with self.transaction() as conn:
+            row = conn.execute("SELECT dados FROM disjuntores WHERE chave = ?", (key,)).fetchone()
+            dados = atualiza(json.loads(row[0]) if row else None)
+            conn.execute("INSERT OR REPLACE INTO disjuntores (chave, dados) VALUES (?, ?)", (key, json.dumps(dados)))
+
+    def reset(self):
+        """Limpa o estado de uma execução anterior (chamado antes de iniciar os workers)"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM metricas")
+            conn.execute("DELETE FROM baldes")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,55 @@
+"""
+Agrupamento (single-flight) de requisições idênticas em andamento
+"""
+import asyncio
+import hashlib
+import json
+from typing import Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Executa uma única chamada por chave enquanto ela estiver em andamento.
+
+    Requisições concorrentes com a mesma chave aguardam a mesma tarefa e
+    recebem o mesmo resultado (ou a mesma exceção). A tarefa é protegida com
+    asyncio.shield, então o cancelamento de um cliente não afeta os demais.
+    """
+
+    def __init__(self):
+        self._em_andamento: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(provider, model, persona, texto, temperature, max_tokens=None) -> str:
+        payload = json.dumps(
+            {
+                "provider": provider,
+                "model": model,
+                "persona": (persona or "").strip(),
+                "texto": " ".join((texto or "").split()),
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        task = self._em_andamento.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._em_andamento[key] = task
+            task.add_done_callback(lambda t, k=key: self._finaliza(k, t))
+        return await asyncio.shield(task)
+
+    def _finaliza(self, key: str, task: asyncio.Task):
+        if self._em_andamento.get(key) is task:
+            del self._em_andamento[key]
+        # Marca a exceção como consumida caso todos os clientes tenham desistido
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._em_andamento)
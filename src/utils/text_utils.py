@@ -107,4 +107,22 @@ def dividir_texto_inteligente(texto, limite=2900):
         partes.append(texto_restante[:corte].strip())
         texto_restante = texto_restante[corte:].strip()
     
-    return partes
\ No newline at end of file
+    return partes
+
+def dividir_para_streaming(texto, limite=2900, primeiro_limite=200):
+    """
+    Divide o texto como dividir_texto_inteligente, mas com uma primeira
+    parte curta: no streaming de áudio ela é sintetizada primeiro e o
+    cliente começa a ouvir antes das partes maiores ficarem prontas.
+    """
+    if not texto:
+        return []
+    primeiro_limite = min(primeiro_limite, limite)
+    prefixo = texto[:primeiro_limite + 1]
+    primeira = dividir_texto_inteligente(prefixo, primeiro_limite)[0]
+    # primeira vem sem os espaços das pontas: o corte é onde ela termina no texto original
+    corte = prefixo.find(primeira) + len(primeira)
+    restante = texto[corte:].strip()
+    if not restante:
+        return [primeira]
+    return [primeira] + dividir_texto_inteligente(restante, limite)
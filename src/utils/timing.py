@@ -0,0 +1,139 @@
+"""
+Tempos por etapa (spans) de uma requisição da API ou execução da CLI
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+_timings_atual: ContextVar[Optional["Timings"]] = ContextVar("minhaia_timings", default=None)
+
+
+class _SpanNulo:
+    """Span usado quando nada está sendo medido: entrar e sair não custam nada"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULO = _SpanNulo()
+
+
+class _Span:
+    __slots__ = ("timings", "nome", "inicio")
+
+    def __init__(self, timings: "Timings", nome: str):
+        self.timings = timings
+        self.nome = nome
+
+    def __enter__(self):
+        # Reserva a posição na entrada: etapas externas aparecem antes das internas
+        self.timings.add(self.nome, 0.0, vezes=0)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+
+class Timings:
+    """Soma, por nome, a duração das etapas na ordem em que apareceram.
+
+    Um mesmo nome medido várias vezes (várias partes de áudio, itens de um
+    lote) acumula a duração e a contagem. Etapas podem se aninhar (por
+    exemplo, provider_init dentro de upstream), então as porcentagens não
+    somam necessariamente 100.
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.spans: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def add(self, nome: str, segundos: float, vezes: int = 1):
+        with self._lock:
+            span = self.spans.setdefault(nome, [0.0, 0])
+            span[0] += segundos
+            span[1] += vezes
+
+    def span(self, nome: str) -> _Span:
+        return _Span(self, nome)
+
+    def total(self) -> float:
+        return time.perf_counter() - self.inicio
+
+    def as_dict(self) -> Dict[str, float]:
+        """Duração de cada etapa em ms"""
+        with self._lock:
+            return {nome: round(segundos * 1000, 1) for nome, (segundos, _) in self.spans.items()}
+
+    def server_timing(self) -> str:
+        """Valor do header Server-Timing (etapas e o total, em ms)"""
+        partes = [f"{nome};dur={ms}" for nome, ms in self.as_dict().items()]
+        partes.append(f"total;dur={round(self.total() * 1000, 1)}")
+        return ", ".join(partes)
+
+    def table(self) -> str:
+        """Tabela para o stderr da CLI (--timings)"""
+        total_ms = self.total() * 1000
+        linhas = [f"{'etapa':<16} {'ms':>10} {'%':>6} {'n':>4}"]
+        with self._lock:
+            for nome, (segundos, vezes) in self.spans.items():
+                ms = segundos * 1000
+                pct = 100 * ms / total_ms if total_ms else 0.0
+                linhas.append(f"{nome:<16} {ms:>10.1f} {pct:>6.1f} {vezes:>4}")
+        linhas.append(f"{'total':<16} {total_ms:>10.1f} {100.0:>6.1f}")
+        return "\n".join(linhas)
+
+
+@contextmanager
+def capture_timings() -> Iterator[Timings]:
+    """Liga o registro de spans no contexto atual (também visível em asyncio.to_thread)"""
+    timings = Timings()
+    token = _timings_atual.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings_atual.reset(token)
+
+
+def current() -> Optional[Timings]:
+    return _timings_atual.get()
+
+
+def span(nome: str):
+    """Mede o bloco `with` como a etapa `nome`; sem capture_timings ativo não faz nada"""
+    timings = _timings_atual.get()
+    return _NULO if timings is None else _Span(timings, nome)
+
+
+def record(nome: str, segundos: float):
+    """Registra uma duração já medida (por exemplo, a espera na fila de admissão)"""
+    timings = _timings_atual.get()
+    if timings is not None:
+        timings.add(nome, segundos)
+
+
+def timed_stream(chunks):
+    """Repassa um stream de StreamChunk registrando `ttft` e `generation`"""
+    timings = _timings_atual.get()
+    if timings is None:
+        yield from chunks
+        return
+    inicio = time.perf_counter()
+    primeiro = None
+    try:
+        for chunk in chunks:
+            if primeiro is None and chunk.delta:
+                primeiro = time.perf_counter()
+                timings.add("ttft", primeiro - inicio)
+            yield chunk
+    finally:
+        if primeiro is not None:
+            timings.add("generation", time.perf_counter() - primeiro)
@@ -0,0 +1,181 @@
+"""
+Recebimento de uploads em streaming: o corpo vai direto para um arquivo em
+disco, sem ser montado em memória (multipart/form-data ou corpo bruto)
+"""
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Optional
+
+MAX_CABECALHOS = 16 * 1024
+MAX_CAMPO = 64 * 1024
+
+
+class UploadError(Exception):
+    """Upload malformado (multipart inválido ou sem arquivo)"""
+
+
+class UploadTooLarge(UploadError):
+    """O corpo passou do limite de bytes aceito"""
+
+
+@dataclass
+class Upload:
+    caminho: str
+    nome: str
+    tamanho: int
+    campos: Dict[str, str] = field(default_factory=dict)
+
+
+def boundary_from_content_type(content_type: str) -> Optional[bytes]:
+    """Extrai o boundary de um Content-Type multipart/form-data"""
+    if not content_type.lower().startswith("multipart/form-data"):
+        return None
+    achado = re.search(r'boundary="?([^";]+)"?', content_type, flags=re.IGNORECASE)
+    if not achado:
+        raise UploadError("Content-Type multipart sem boundary")
+    return achado.group(1).encode("latin-1")
+
+
+def _sufixo(nome: str) -> str:
+    sufixo = os.path.splitext(nome or "")[1].lower()
+    return sufixo if re.fullmatch(r"\.[a-z0-9]{1,5}", sufixo) else ""
+
+
+def _disposicao(cabecalhos: bytes):
+    texto = cabecalhos.decode("utf-8", "replace")
+    nome = re.search(r'\bname="([^"]*)"', texto)
+    arquivo = re.search(r'\bfilename="([^"]*)"', texto)
+    return (nome.group(1) if nome else ""), (arquivo.group(1) if arquivo else None)
+
+
+class _Destino:
+    """Arquivo temporário que recebe os bytes e aplica o limite de tamanho"""
+
+    def __init__(self, diretorio: str, nome: str, max_bytes: int):
+        self.nome = os.path.basename(nome or "upload")
+        fd, self.caminho = tempfile.mkstemp(prefix="upload_", suffix=_sufixo(nome), dir=diretorio)
+        self.arquivo = os.fdopen(fd, "wb")
+        self.max_bytes = max_bytes
+        self.tamanho = 0
+
+    def write(self, dados: bytes):
+        self.tamanho += len(dados)
+        if self.tamanho > self.max_bytes:
+            raise UploadTooLarge(f"Upload acima de {self.max_bytes} bytes")
+        self.arquivo.write(dados)
+
+    def close(self):
+        self.arquivo.close()
+
+    def descarta(self):
+        self.close()
+        try:
+            os.remove(self.caminho)
+        except OSError:
+            pass
+
+
+async def _recebe_bruto(corpo: AsyncIterator[bytes], destino: _Destino):
+    async for chunk in corpo:
+        destino.write(chunk)
+
+
+async def _recebe_multipart(corpo: AsyncIterator[bytes], boundary: bytes, diretorio: str,
+                            max_bytes: int, campos: Dict[str, str], destinos: list):
+    """Percorre o multipart chunk a chunk; só o primeiro arquivo é gravado (em `destinos`).
+
+    O buffer nunca guarda mais que um chunk e o tamanho do delimitador: o
+    conteúdo do arquivo é repassado assim que se sabe que não é o início
+    do próximo delimitador.
+    """
+    delimitador = b"\r\n--" + boundary
+    buffer = bytearray(b"\r\n")  # permite tratar o primeiro delimitador como os demais
+    estado = "preambulo"
+    destino = None
+    alvo = None  # destino da parte atual: _Destino, nome de campo ou None (ignorada)
+    valor = bytearray()
+
+    async for chunk in corpo:
+        buffer += chunk
+        while True:
+            if estado == "preambulo":
+                pos = buffer.find(delimitador)
+                if pos < 0:
+                    del buffer[:max(0, len(buffer) - len(delimitador))]
+                    break
+                del buffer[:pos + len(delimitador)]
+                estado = "delimitador"
+            if estado == "delimitador":
+                if len(buffer) < 2:
+                    break
+                if buffer[:2] == b"--":
+                    return
+                estado = "cabecalhos"
+            if estado == "cabecalhos":
+                pos = buffer.find(b"\r\n\r\n")
+                if pos < 0:
+                    if len(buffer) > MAX_CABECALHOS:
+                        raise UploadError("Cabeçalhos de parte multipart grandes demais")
+                    break
+                nome, arquivo = _disposicao(bytes(buffer[:pos]))
+                del buffer[:pos + 4]
+                if arquivo is not None and destino is None:
+                    destino = alvo = _Destino(diretorio, arquivo, max_bytes)
+                    destinos.append(destino)
+                elif arquivo is None and nome:
+                    alvo, valor = nome, bytearray()
+                else:
+                    alvo = None
+                estado = "corpo"
+            if estado == "corpo":
+                pos = buffer.find(delimitador)
+                fim = pos if pos >= 0 else max(0, len(buffer) - len(delimitador))
+                dados = bytes(buffer[:fim])
+                del buffer[:fim]
+                if isinstance(alvo, _Destino):
+                    alvo.write(dados)
+                elif alvo is not None:
+                    valor += dados
+                    if len(valor) > MAX_CAMPO:
+                        raise UploadError(f"Campo {alvo} grande demais")
+                if pos < 0:
+                    break
+                if isinstance(alvo, str):
+                    campos[alvo] = valor.decode("utf-8", "replace")
+                del buffer[:len(delimitador)]
+                estado = "delimitador"
+    raise UploadError("Multipart terminou antes do delimitador final")
+
+
+async def receive_upload(corpo: AsyncIterator[bytes], content_type: str, diretorio: str,
+                         max_bytes: int, nome: Optional[str] = None) -> Upload:
+    """Grava o upload em `diretorio` enquanto ele chega e devolve onde ficou.
+
+    Com multipart/form-data, o primeiro campo com filename vira o arquivo e
+    os demais campos de texto vão para `Upload.campos`. Qualquer outro
+    Content-Type é tratado como o próprio áudio no corpo, com o nome vindo
+    de `nome`. Em caso de erro o arquivo parcial é removido.
+    """
+    boundary = boundary_from_content_type(content_type or "")
+    campos: Dict[str, str] = {}
+    destinos = []
+    try:
+        if boundary is None:
+            destinos.append(_Destino(diretorio, nome or "upload", max_bytes))
+            await _recebe_bruto(corpo, destinos[0])
+        else:
+            await _recebe_multipart(corpo, boundary, diretorio, max_bytes, campos, destinos)
+            if not destinos:
+                raise UploadError("Nenhum arquivo no multipart")
+        destino = destinos[0]
+        destino.close()
+    except BaseException:
+        for destino in destinos:
+            destino.descarta()
+        raise
+    if destino.tamanho == 0:
+        destino.descarta()
+        raise UploadError("Arquivo vazio")
+    return Upload(destino.caminho, destino.nome, destino.tamanho, campos)
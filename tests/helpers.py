@@ -0,0 +1,21 @@
+"""Providers falsos compartilhados pelos testes"""
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from providers.base import BaseProvider  # noqa: E402
+
+
+class EchoProvider(BaseProvider):
+    """Responde "modelo:mensagem" sem rede; os testes sobrescrevem só o que precisam"""
+
+    def call_api(self, message, model, max_tokens, **kwargs):
+        return f"{model}:{message}"
+
+    def get_available_models(self):
+        return ["echo"]
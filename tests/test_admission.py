@@ -0,0 +1,86 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import API  # noqa: E402
+from config.manager import ConfigManager  # noqa: E402
+from utils.admission import AdmissionController, QueueFullError, QueueTimeoutError  # noqa: E402
+
+
+LIMITS = {"max_in_flight": 1, "max_queue": 1, "queue_timeout": 5}
+
+
+class AdmissionControllerTests(unittest.TestCase):
+    def test_rejects_when_queue_is_full(self):
+        async def cenario():
+            controller = AdmissionController()
+            ocupado = await controller.acquire("groq", LIMITS)
+            na_fila = asyncio.ensure_future(controller.acquire("groq", LIMITS))
+            await asyncio.sleep(0)
+            with self.assertRaises(QueueFullError) as ctx:
+                await controller.acquire("groq", LIMITS)
+            controller.release(ocupado)
+            controller.release(await na_fila)
+            return ctx.exception
+
+        erro = asyncio.run(cenario())
+
+        self.assertNotIsInstance(erro, QueueTimeoutError)
+        self.assertGreaterEqual(erro.retry_after, 1)
+
+    def test_queue_timeout(self):
+        async def cenario():
+            controller = AdmissionController()
+            await controller.acquire("groq", LIMITS)
+            await controller.acquire("groq", {**LIMITS, "queue_timeout": 0.01})
+
+        with self.assertRaises(QueueTimeoutError):
+            asyncio.run(cenario())
+
+    def test_release_is_idempotent(self):
+        async def cenario():
+            controller = AdmissionController()
+            ticket = await controller.acquire("groq", LIMITS)
+            controller.release(ticket)
+            controller.release(ticket)
+            return controller.snapshot()["groq"]["in_flight"]
+
+        self.assertEqual(asyncio.run(cenario()), 0)
+
+
+class LimitsConfigTests(unittest.TestCase):
+    def test_model_limits_override_provider_limits(self):
+        manager = ConfigManager()
+
+        chave, limites = manager.get_limits("openai", "gpt-5.4-pro")
+        self.assertEqual(chave, "openai:gpt-5.4-pro")
+        self.assertEqual(limites["max_in_flight"], 2)
+
+        chave, limites = manager.get_limits("openai", "gpt-5.4")
+        self.assertEqual(chave, "openai")
+        self.assertEqual(limites["max_in_flight"], 16)
+
+
+class QueueFullResponseTests(unittest.TestCase):
+    def test_chat_returns_429_with_retry_after(self):
+        client = TestClient(API.app)
+
+        with patch.object(API.admission, "acquire", side_effect=QueueFullError("groq", 7)):
+            resposta = client.post("/chat", json={"texto": "oi"})
+
+        self.assertEqual(resposta.status_code, 429)
+        self.assertEqual(resposta.headers["Retry-After"], "7")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import unittest
 from pathlib import Path
@@ -12,6 +13,7 @@ if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
 import API  # noqa: E402
+from utils.rate_limit import KeyRateLimiter, RateLimitExceeded, TokenBucket  # noqa: E402
 
 
 class ApiSecurityTests(unittest.TestCase):
@@ -19,11 +21,13 @@ class ApiSecurityTests(unittest.TestCase):
         self.original_auth_enabled = API.AUTH_ENABLED
         self.original_owner = API.VALID_OWNER
         self.original_keys = list(API.VALID_KEYS)
+        self.original_limiter = API.rate_limiter
 
     def tearDown(self):
         API.AUTH_ENABLED = self.original_auth_enabled
         API.VALID_OWNER = self.original_owner
         API.VALID_KEYS = self.original_keys
+        API.rate_limiter = self.original_limiter
 
     def test_validate_token_is_optional_when_security_is_disabled(self):
         API.AUTH_ENABLED = False
@@ -50,6 +54,72 @@ class ApiSecurityTests(unittest.TestCase):
 
         self.assertEqual(owner, "henrique")
 
+    def test_client_key_returns_key_for_rate_limiting(self):
+        API.AUTH_ENABLED = True
+        API.VALID_OWNER = "henrique"
+        API.VALID_KEYS = ["secret"]
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="henrique:secret")
+
+        self.assertEqual(API.client_key(credentials), "secret")
+
+    def test_enforce_rate_limit_returns_429_after_burst(self):
+        API.AUTH_ENABLED = True
+        API.rate_limiter = KeyRateLimiter({"secret": {"rps": 0.5, "burst": 2}})
+
+        asyncio.run(API.enforce_rate_limit("secret", ["oi"]))
+        asyncio.run(API.enforce_rate_limit("secret", ["oi"]))
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(API.enforce_rate_limit("secret", ["oi"]))
+
+        self.assertEqual(ctx.exception.status_code, 429)
+        self.assertEqual(ctx.exception.headers["Retry-After"], "2")
+
+    def test_large_batch_is_charged_in_full(self):
+        API.AUTH_ENABLED = True
+        API.rate_limiter = KeyRateLimiter({"secret": {"rps": 5, "burst": 10, "tpm": 100000}})
+
+        asyncio.run(API.enforce_rate_limit("secret", ["oi"] * 500))
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(API.enforce_rate_limit("secret", ["oi"]))
+
+        # 490 requisições de dívida a 5 rps: ~98 s até a próxima
+        self.assertGreaterEqual(int(ctx.exception.headers["Retry-After"]), 98)
+
+    def test_enforce_rate_limit_is_disabled_without_security(self):
+        API.AUTH_ENABLED = False
+        API.rate_limiter = KeyRateLimiter(default_limits={"rps": 0, "burst": 0})
+
+        asyncio.run(API.enforce_rate_limit("anonymous", ["oi"]))
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_tokens_per_minute_limit_does_not_consume_requests(self):
+        limiter = KeyRateLimiter(default_limits={"rps": 10, "burst": 10, "tpm": 60})
+
+        limiter.check("k", tokens=60)
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            limiter.check("k", tokens=30)
+
+        self.assertEqual(ctx.exception.motivo, "tokens")
+        self.assertGreater(limiter._buckets["k"][0].tokens, 8)
+
+    def test_tokens_above_capacity_leave_the_bucket_in_debt(self):
+        limiter = KeyRateLimiter(default_limits={"rps": 10, "burst": 10, "tpm": 60})
+
+        limiter.check("k", tokens=600)
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            limiter.check("k", tokens=1)
+
+        self.assertEqual(ctx.exception.motivo, "tokens")
+        self.assertGreaterEqual(ctx.exception.retry_after, 540)
+
+    def test_bucket_refills_over_time(self):
+        bucket = TokenBucket(rate=2, capacity=2)
+        bucket.consume(2)
+
+        self.assertAlmostEqual(bucket.wait_time(1, now=bucket.updated), 0.5)
+        self.assertEqual(bucket.wait_time(1, now=bucket.updated + 0.5), 0.0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,151 @@
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import API  # noqa: E402
+from helpers import EchoProvider  # noqa: E402
+from providers.base import StreamChunk, usage_to_dict  # noqa: E402
+
+
+class StreamingEchoProvider(EchoProvider):
+    async def astream_api(self, message, model, max_tokens, **kwargs):
+        for parte in message.split():
+            yield StreamChunk(delta=parte)
+        yield StreamChunk(done=True, model=model, usage={"input_tokens": 1, "output_tokens": 2})
+
+
+class SlowProvider(EchoProvider):
+    def __init__(self):
+        super().__init__()
+        self.ativos = 0
+        self.pico = 0
+
+    async def acall_api(self, message, model, max_tokens, **kwargs):
+        self.chamadas = getattr(self, "chamadas", 0) + 1
+        self.ativos += 1
+        self.pico = max(self.pico, self.ativos)
+        await asyncio.sleep(0.01)
+        self.ativos -= 1
+        return message
+
+
+class AsyncApiTests(unittest.TestCase):
+    def test_base_acall_api_falls_back_to_call_api(self):
+        resposta = asyncio.run(EchoProvider().acall_api("oi", "echo", 10))
+
+        self.assertEqual(resposta, "echo:oi")
+
+    def test_missing_groq_key_raises_instead_of_exiting_in_async_o_model_path(self):
+        from providers.groq_provider import GroqProvider
+
+        with patch.dict(os.environ, {"GROQ_API_KEY": ""}):
+            provider = GroqProvider()
+
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(Exception) as ctx:
+            asyncio.run(provider.acall_api("oi", "openai/gpt-oss-20b", 10, is_o_model=True))
+
+        self.assertNotIsInstance(ctx.exception, SystemExit)
+        self.assertIn("GROQ_API_KEY", str(ctx.exception))
+
+    def test_chat_completions_provider_must_define_async_client(self):
+        from providers.base import BaseProvider
+        from providers.openai_compat import ChatCompletionsAsyncMixin
+
+        class SemCliente(ChatCompletionsAsyncMixin, BaseProvider):
+            def call_api(self, message, model, max_tokens, **kwargs):
+                return ""
+
+        with self.assertRaises(TypeError) as ctx:
+            SemCliente()
+        self.assertIn("_create_async_client", str(ctx.exception))
+
+    def test_trata_mensagem_awaits_provider(self):
+        req = API.MessageRequest(texto="oi", provider="groq", capacidade="fast")
+
+        with patch.object(API.provider_pool, "get", return_value=EchoProvider()):
+            resposta = asyncio.run(API.trata_mensagem(req, token="anonymous"))
+
+        self.assertEqual(resposta.modelo, "llama-3.1-8b-instant")
+        self.assertEqual(resposta.resposta, "llama-3.1-8b-instant:oi")
+
+    def test_base_astream_api_yields_full_answer_then_done(self):
+        async def coleta():
+            return [chunk async for chunk in EchoProvider().astream_api("oi", "echo", 10)]
+
+        chunks = asyncio.run(coleta())
+
+        self.assertEqual(chunks[0].delta, "echo:oi")
+        self.assertTrue(chunks[-1].done)
+
+    def test_chat_stream_emits_sse_deltas_and_done(self):
+        client = TestClient(API.app)
+
+        with patch.object(API.provider_pool, "get", return_value=StreamingEchoProvider()):
+            resposta = client.post("/chat/stream", json={"texto": "a b", "capacidade": "fast"})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.headers["content-type"].startswith("text/event-stream"))
+        eventos = [linha for linha in resposta.text.splitlines() if linha.startswith("event:")]
+        self.assertEqual(eventos, ["event: delta", "event: delta", "event: done"])
+        self.assertIn('"output_tokens": 2', resposta.text)
+
+    def test_usage_to_dict_normalizes_sdk_field_names(self):
+        self.assertEqual(
+            usage_to_dict({"prompt_tokens": 3, "completion_tokens": 4}),
+            {"input_tokens": 3, "output_tokens": 4},
+        )
+
+    def test_chat_batch_keeps_order_and_reports_errors_inline(self):
+        provider = SlowProvider()
+        lote = API.BatchRequest(
+            itens=[
+                API.MessageRequest(texto="um"),
+                API.MessageRequest(texto="dois", provider="inexistente"),
+                API.MessageRequest(texto="tres"),
+                API.MessageRequest(texto="quatro"),
+            ],
+            max_concorrencia=2,
+        )
+
+        with patch.object(API.provider_pool, "get", return_value=provider):
+            resposta = asyncio.run(API.trata_lote(lote, token="anonymous"))
+
+        self.assertEqual([r.indice for r in resposta.resultados], [0, 1, 2, 3])
+        self.assertEqual(resposta.resultados[0].resposta, "um")
+        self.assertIsNotNone(resposta.resultados[1].erro)
+        self.assertEqual(resposta.resultados[3].resposta, "quatro")
+        self.assertLessEqual(provider.pico, 2)
+
+    def test_identical_concurrent_requests_share_one_upstream_call(self):
+        provider = SlowProvider()
+        antes = API.single_flight.coalesced
+
+        async def dispara():
+            reqs = [API.MessageRequest(texto="mesma  pergunta"), API.MessageRequest(texto="mesma pergunta "),
+                    API.MessageRequest(texto="mesma pergunta")]
+            return await asyncio.gather(*(API.trata_mensagem(r, token="anonymous") for r in reqs))
+
+        with patch.object(API.provider_pool, "get", return_value=provider):
+            respostas = asyncio.run(dispara())
+
+        self.assertEqual(provider.chamadas, 1)
+        self.assertEqual(len({r.resposta for r in respostas}), 1)
+        self.assertEqual(API.single_flight.coalesced - antes, 2)
+        self.assertEqual(API.single_flight.in_flight(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
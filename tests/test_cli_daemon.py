@@ -0,0 +1,104 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import cli_daemon  # noqa: E402
+from providers.pool import ProviderPool  # noqa: E402
+
+
+class FakeController:
+    def __init__(self):
+        self.execucoes = 0
+
+    def run(self, args):
+        self.execucoes += 1
+        print(f"cwd={os.getcwd()} msg={args.mensagem} provider={args.provider}")
+        print("diagnóstico", file=sys.stderr)
+        if args.mensagem == "falha":
+            sys.exit(3)
+
+
+class FakeFactory:
+    def __init__(self):
+        self.criados = []
+
+    def create_provider(self, provider_name):
+        self.criados.append(provider_name)
+        return object()
+
+    def get_available_providers(self):
+        return ["groq", "whisper"]
+
+
+class CLIDaemonTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "daemon.sock")
+        self.controller = FakeController()
+        self.servidor = cli_daemon.CLIDaemon(self.path, self.controller)
+        self.thread = threading.Thread(target=self.servidor.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        self.tmp.cleanup()
+
+    def executa(self, argv):
+        saida, erro = io.StringIO(), io.StringIO()
+        with patch.object(sys, "stdout", saida), patch.object(sys, "stderr", erro):
+            codigo = cli_daemon.run_remote(argv, self.path)
+        return codigo, saida.getvalue(), erro.getvalue()
+
+    def test_runs_cli_in_daemon_with_client_cwd_and_streams(self):
+        codigo, saida, erro = self.executa(["oi", "--provider", "claude"])
+
+        self.assertEqual(codigo, 0)
+        self.assertIn(f"cwd={os.getcwd()} msg=oi provider=claude", saida)
+        self.assertIn("diagnóstico", erro)
+        self.assertEqual(oct(os.stat(self.path).st_mode & 0o777), "0o600")
+
+    def test_exit_code_and_warm_controller_are_kept_between_calls(self):
+        self.assertEqual(self.executa(["falha"])[0], 3)
+        self.assertEqual(self.executa(["oi"])[0], 0)
+        self.assertEqual(self.controller.execucoes, 2)
+
+    def test_argument_errors_are_reported_to_client(self):
+        codigo, _, erro = self.executa(["oi", "--provider", "inexistente"])
+
+        self.assertEqual(codigo, 2)
+        self.assertIn("invalid choice", erro)
+
+    def test_stop_command_shuts_daemon_down(self):
+        self.assertEqual(cli_daemon.stop(self.path), 0)
+        self.thread.join(2)
+        self.assertFalse(self.thread.is_alive())
+
+
+class FallbackTests(unittest.TestCase):
+    def test_without_daemon_run_remote_returns_none(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(cli_daemon.run_remote(["oi"], os.path.join(tmp, "nada.sock")))
+
+    def test_pool_factory_reuses_chat_providers_only(self):
+        factory = FakeFactory()
+        pooled = cli_daemon._PoolFactory(ProviderPool(factory), factory)
+
+        self.assertIs(pooled.create_provider("groq"), pooled.create_provider("groq"))
+        self.assertIsNot(pooled.create_provider("whisper"), pooled.create_provider("whisper"))
+        self.assertEqual(factory.criados, ["groq", "whisper", "whisper"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -75,6 +75,15 @@ class ConfigManagerTests(unittest.TestCase):
         self.assertEqual(model, "gemini-2.5-flash")
         self.assertFalse(model.startswith("models/"))
 
+    def test_hedge_policy_and_target_follow_primary_tier(self):
+        policy = self.manager.get_hedge_policy("groq")
+
+        secondary, (model, _, _, _) = self.manager.get_hedge_target(policy, build_args(fast=True))
+
+        self.assertEqual(secondary, "gemini")
+        self.assertEqual(model, "gemini-2.5-flash-lite")
+        self.assertIsNone(self.manager.get_hedge_policy("deepseek"))
+
 
 if __name__ == "__main__":
     unittest.main()
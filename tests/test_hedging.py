@@ -0,0 +1,155 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import API  # noqa: E402
+from providers.base import BaseProvider, StreamChunk  # noqa: E402
+from utils.hedging import PRIMARY, SECONDARY, hedged_call, hedged_stream  # noqa: E402
+
+
+async def responde(valor, atraso=0.0, erro=None):
+    await asyncio.sleep(atraso)
+    if erro:
+        raise erro
+    return valor
+
+
+async def stream(partes, atraso=0.0, erro=None):
+    await asyncio.sleep(atraso)
+    if erro:
+        raise erro
+    for parte in partes:
+        yield StreamChunk(delta=parte)
+    yield StreamChunk(done=True)
+
+
+class DelayedProvider(BaseProvider):
+    def __init__(self, atraso):
+        super().__init__()
+        self.atraso = atraso
+        self.cancelado = False
+
+    def call_api(self, message, model, max_tokens, **kwargs):
+        return f"{model}:{message}"
+
+    async def acall_api(self, message, model, max_tokens, **kwargs):
+        try:
+            await asyncio.sleep(self.atraso)
+        except asyncio.CancelledError:
+            self.cancelado = True
+            raise
+        return f"{model}:{message}"
+
+    def get_available_models(self):
+        return ["delayed"]
+
+
+class HedgedCallTests(unittest.TestCase):
+    def run_hedge(self, primary, secondary, delay=0.05):
+        eventos = []
+        resultado = asyncio.run(hedged_call(primary, secondary, delay, eventos.append))
+        return resultado, eventos
+
+    def test_fast_primary_never_fires_secondary(self):
+        chamadas = []
+
+        async def secundaria():
+            chamadas.append(1)
+            return "b"
+
+        resultado, eventos = self.run_hedge(lambda: responde("a"), secundaria)
+
+        self.assertEqual(resultado, (PRIMARY, "a"))
+        self.assertEqual(eventos, [])
+        self.assertEqual(chamadas, [])
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        cancelada = []
+
+        async def lenta():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelada.append(True)
+                raise
+
+        resultado, eventos = self.run_hedge(lenta, lambda: responde("b"))
+
+        self.assertEqual(resultado, (SECONDARY, "b"))
+        self.assertEqual(eventos, ["hedge", "hedge_won"])
+        self.assertEqual(cancelada, [True])
+
+    def test_primary_error_fails_over(self):
+        resultado, eventos = self.run_hedge(lambda: responde("a", erro=ValueError("x")), lambda: responde("b"))
+
+        self.assertEqual(resultado, (SECONDARY, "b"))
+        self.assertEqual(eventos, ["failover"])
+
+    def test_primary_error_is_raised_when_both_fail(self):
+        with self.assertRaises(ValueError):
+            self.run_hedge(
+                lambda: responde("a", erro=ValueError("primaria")),
+                lambda: responde("b", erro=RuntimeError("secundaria")),
+            )
+
+
+class HedgedStreamTests(unittest.TestCase):
+    def coleta(self, primary, secondary, delay=0.05):
+        eventos = []
+
+        async def lê():
+            return [c.delta async for c in hedged_stream(primary, secondary, delay, eventos.append) if c.delta]
+
+        return asyncio.run(lê()), eventos
+
+    def test_first_token_decides_the_winner(self):
+        partes, eventos = self.coleta(lambda: stream(["a"], atraso=5), lambda: stream(["b", "c"]))
+
+        self.assertEqual(partes, ["b", "c"])
+        self.assertEqual(eventos, ["hedge", "hedge_won"])
+
+    def test_primary_keeps_stream_when_first_token_is_fast(self):
+        partes, eventos = self.coleta(lambda: stream(["a", "b"]), lambda: stream(["x"]))
+
+        self.assertEqual(partes, ["a", "b"])
+        self.assertEqual(eventos, [])
+
+    def test_error_before_first_token_fails_over(self):
+        partes, eventos = self.coleta(lambda: stream(["a"], erro=ValueError("x")), lambda: stream(["b"]))
+
+        self.assertEqual(partes, ["b"])
+        self.assertEqual(eventos, ["failover"])
+
+
+class ApiHedgeTests(unittest.TestCase):
+    def test_chat_hedges_to_secondary_from_models_json(self):
+        lento, rapido = DelayedProvider(5), DelayedProvider(0)
+        politica = {"secondary": "gemini", "capacidade": None, "delay": 0.05, "enabled": False}
+        req = API.MessageRequest(texto="oi", provider="groq", capacidade="fast", cache=False, hedge=True)
+
+        with patch.object(API.config_manager, "get_hedge_policy", return_value=politica), \
+                patch.object(API.provider_pool, "get", side_effect=lambda nome: lento if nome == "groq" else rapido):
+            resposta = asyncio.run(API.trata_mensagem(req, token="anonymous"))
+
+        self.assertEqual(resposta.modelo, "gemini-2.5-flash-lite")
+        self.assertTrue(lento.cancelado)
+
+    def test_hedge_is_off_unless_requested_or_enabled(self):
+        politica = {"secondary": "gemini", "capacidade": None, "delay": 0.05, "enabled": False}
+        req = API.MessageRequest(texto="oi", provider="groq")
+
+        with patch.object(API.config_manager, "get_hedge_policy", return_value=politica):
+            self.assertIsNone(API._politica_hedge(req, "groq"))
+            self.assertIsNotNone(API._politica_hedge(req.model_copy(update={"hedge": True}), "groq"))
+
+
+if __name__ == "__main__":
+    unittest.main()
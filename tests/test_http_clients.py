@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import httpx  # noqa: E402
+
+from config.manager import ConfigManager  # noqa: E402
+from constants import HTTP_DEFAULTS  # noqa: E402
+from utils import http_clients  # noqa: E402
+
+
+class HttpSettingsTests(unittest.TestCase):
+    def test_provider_block_overrides_defaults(self):
+        settings = ConfigManager().get_http_settings("groq")
+        self.assertEqual(settings["connect_timeout"], 3)
+        self.assertEqual(settings["read_timeout"], 60)
+        self.assertEqual(settings["max_connections"], HTTP_DEFAULTS["max_connections"])
+
+    def test_provider_without_block_uses_defaults(self):
+        self.assertEqual(ConfigManager().get_http_settings("moonshot"), HTTP_DEFAULTS)
+
+    def test_build_timeout(self):
+        timeout = http_clients.build_timeout({**HTTP_DEFAULTS, "connect_timeout": 2, "read_timeout": 9})
+        self.assertEqual((timeout.connect, timeout.read), (2, 9))
+        self.assertEqual(timeout.pool, HTTP_DEFAULTS["pool_timeout"])
+
+
+class TunedClientTests(unittest.TestCase):
+    def test_client_has_limits_and_timeouts(self):
+        with http_clients.http_client("groq") as client:
+            self.assertEqual(client.timeout.connect, 3)
+            self.assertEqual(client.timeout.read, 60)
+            pool = client._transport._pool
+            self.assertEqual(pool._max_connections, HTTP_DEFAULTS["max_connections"])
+            self.assertEqual(pool._keepalive_expiry, HTTP_DEFAULTS["keepalive_expiry"])
+
+    def test_http2_only_when_h2_is_installed(self):
+        with mock.patch.object(http_clients, "http2_available", return_value=False):
+            with http_clients.http_client("openai") as client:
+                self.assertFalse(client._transport._pool._http2)
+
+    def test_sdk_options_async(self):
+        opcoes = http_clients.sdk_options("claude", asynchronous=True)
+        self.assertIsInstance(opcoes["http_client"], httpx.AsyncClient)
+        self.assertEqual(opcoes["timeout"].read, 600)
+        asyncio.run(opcoes["http_client"].aclose())
+
+
+class ProviderWiringTests(unittest.TestCase):
+    def test_openai_provider_uses_tuned_client(self):
+        from providers.openai_provider import OpenAIProvider
+
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "sk-test"}):
+            provider = OpenAIProvider()
+        try:
+            self.assertEqual(provider.client.timeout.read, 600)
+            self.assertEqual(provider.client._client.timeout.read, 600)
+        finally:
+            provider.client.close()
+
+    def test_groq_async_client_uses_tuned_client(self):
+        from providers.groq_provider import GroqProvider
+
+        with mock.patch.dict(os.environ, {"GROQ_API_KEY": "gsk-test"}):
+            provider = GroqProvider()
+        client = provider._create_async_client()
+        try:
+            self.assertIsInstance(client._client, httpx.AsyncClient)
+            self.assertEqual(client._client.timeout.connect, 3)
+        finally:
+            provider.client.close()
+            asyncio.run(client.close())
+
+
+if __name__ == "__main__":
+    unittest.main()
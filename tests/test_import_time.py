@@ -0,0 +1,60 @@
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+# Orçamento do cold start de `chat "oi"`: importar main e o provider padrão (groq)
+CLI_IMPORT_BUDGET_SECONDS = 1.0
+
+# SDKs e módulos que uma pergunta ao groq pela CLI não deve carregar
+PESADOS = ("API", "fastapi", "uvicorn", "openai", "anthropic", "boto3", "botocore", "pydub",
+           "google.genai", "perplexipy", "xai_sdk", "pdfplumber")
+
+SCRIPT = """
+import json, sys, time
+inicio = time.perf_counter()
+import main
+from providers.factory import ProviderFactory
+ProviderFactory.get_provider_class("groq")
+print(json.dumps({"segundos": time.perf_counter() - inicio, "modulos": sorted(sys.modules)}))
+"""
+
+
+def _cold_start():
+    saida = subprocess.run([sys.executable, "-c", SCRIPT], cwd=SRC, capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+class ImportTimeTests(unittest.TestCase):
+    def test_cli_loads_only_the_selected_provider_sdk(self):
+        modulos = _cold_start()["modulos"]
+
+        carregados = [nome for nome in PESADOS if any(m == nome or m.startswith(nome + ".") for m in modulos)]
+        self.assertEqual(carregados, [])
+        self.assertIn("groq", modulos)
+
+    def test_cli_cold_start_within_budget(self):
+        # Melhor de três para não depender de ruído da máquina
+        melhor = min(_cold_start()["segundos"] for _ in range(3))
+
+        self.assertLess(melhor, CLI_IMPORT_BUDGET_SECONDS)
+
+    def test_registry_resolves_every_provider_lazily(self):
+        from providers.factory import ProviderFactory
+
+        for nome, caminho in ProviderFactory._providers.items():
+            self.assertRegex(caminho, r"^providers\.\w+:\w+$", nome)
+        self.assertEqual(ProviderFactory.get_provider_class("simulated").__name__, "SimulatedProvider")
+        with self.assertRaises(ValueError):
+            ProviderFactory.get_provider_class("desconhecido")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,252 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import API  # noqa: E402
+from helpers import EchoProvider  # noqa: E402
+from utils.jobs import FAILED, QUEUED, SUCCEEDED, JobManager, JobStore, webhook_error  # noqa: E402
+
+
+async def espera_status(store, job_id, esperado, limite=2.0):
+    inicio = time.monotonic()
+    while time.monotonic() - inicio < limite:
+        job = store.get(job_id)
+        if job["status"] == esperado:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} ficou em {store.get(job_id)['status']}")
+
+
+class JobManagerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = JobStore(str(Path(self.tmp.name) / "jobs.sqlite3"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_job_runs_and_stores_result(self):
+        async def run(pedido):
+            return {"resposta": pedido["texto"].upper(), "modelo": "m"}
+
+        async def cenario():
+            manager = JobManager(self.store, run, max_workers=1)
+            await manager.start()
+            job = await manager.submit({"texto": "oi"})
+            self.assertEqual(job["status"], QUEUED)
+            final = await espera_status(self.store, job["id"], SUCCEEDED)
+            await manager.stop()
+            return final
+
+        final = asyncio.run(cenario())
+
+        self.assertEqual(final["resposta"], "OI")
+        self.assertEqual(final["modelo"], "m")
+
+    def test_worker_pool_is_bounded(self):
+        estado = {"ativos": 0, "pico": 0}
+
+        async def run(pedido):
+            estado["ativos"] += 1
+            estado["pico"] = max(estado["pico"], estado["ativos"])
+            await asyncio.sleep(0.02)
+            estado["ativos"] -= 1
+            return {"resposta": "ok", "modelo": "m"}
+
+        async def cenario():
+            manager = JobManager(self.store, run, max_workers=2)
+            await manager.start()
+            jobs = [await manager.submit({"texto": str(i)}) for i in range(6)]
+            for job in jobs:
+                await espera_status(self.store, job["id"], SUCCEEDED)
+            await manager.stop()
+
+        asyncio.run(cenario())
+
+        self.assertEqual(estado["pico"], 2)
+
+    def test_failure_is_stored_with_generic_message(self):
+        async def run(pedido):
+            raise RuntimeError("segredo interno")
+
+        async def cenario():
+            manager = JobManager(self.store, run, max_workers=1)
+            await manager.start()
+            job = await manager.submit({"texto": "oi"})
+            final = await espera_status(self.store, job["id"], FAILED)
+            await manager.stop()
+            return final
+
+        final = asyncio.run(cenario())
+
+        self.assertNotIn("segredo", final["erro"])
+
+    def test_background_jobs_are_polled_without_a_worker(self):
+        consultas = []
+
+        async def run(pedido):
+            raise AssertionError("não deveria rodar localmente")
+
+        async def inicia(pedido):
+            return {"provider": "openai", "background_id": "resp_1", "modelo": "gpt"}
+
+        async def consulta(job):
+            consultas.append(job["background_id"])
+            return {"resposta": "pronto", "modelo": job["modelo"]} if len(consultas) > 1 else None
+
+        async def cenario():
+            manager = JobManager(self.store, run, inicia, consulta, max_workers=1, poll_interval=0.01)
+            await manager.start()
+            job = await manager.submit({"texto": "oi"})
+            final = await espera_status(self.store, job["id"], SUCCEEDED)
+            await manager.stop()
+            return final
+
+        final = asyncio.run(cenario())
+
+        self.assertEqual(final["resposta"], "pronto")
+        self.assertEqual(consultas, ["resp_1", "resp_1"])
+
+    def test_pending_jobs_survive_restart(self):
+        job = self.store.create({"texto": "antes do reinício"})
+
+        async def run(pedido):
+            return {"resposta": pedido["texto"], "modelo": "m"}
+
+        async def cenario():
+            manager = JobManager(self.store, run, max_workers=1)
+            await manager.start()
+            final = await espera_status(self.store, job["id"], SUCCEEDED)
+            await manager.stop()
+            return final
+
+        self.assertEqual(asyncio.run(cenario())["resposta"], "antes do reinício")
+
+    def test_stop_waits_for_running_jobs_and_keeps_queued_ones(self):
+        async def run(pedido):
+            await asyncio.sleep(0.05)
+            return {"resposta": pedido["texto"], "modelo": "m"}
+
+        async def cenario():
+            manager = JobManager(self.store, run, max_workers=1)
+            await manager.start()
+            primeiro = await manager.submit({"texto": "1"})
+            segundo = await manager.submit({"texto": "2"})
+            await asyncio.sleep(0.01)
+            await manager.stop(timeout=1)
+            return self.store.get(primeiro["id"]), self.store.get(segundo["id"])
+
+        primeiro, segundo = asyncio.run(cenario())
+
+        self.assertEqual(primeiro["status"], SUCCEEDED)
+        self.assertEqual(segundo["status"], QUEUED)
+
+    def test_jobs_of_live_process_are_not_claimed(self):
+        self.store.create({"texto": "x"}, worker_pid=os.getppid())
+
+        self.assertEqual(self.store.claim_orphans(os.getpid()), [])
+
+    def test_old_schema_moves_pid_to_worker_pid(self):
+        import sqlite3
+
+        caminho = str(Path(self.tmp.name) / "antigo.sqlite3")
+        conn = sqlite3.connect(caminho)
+        conn.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, pedido TEXT NOT NULL, "
+            "resposta TEXT, modelo TEXT, erro TEXT, webhook TEXT, provider TEXT, background_id TEXT, "
+            "dono INTEGER, criado_em REAL NOT NULL, atualizado_em REAL NOT NULL)"
+        )
+        conn.execute("INSERT INTO jobs VALUES ('j', 'queued', '{}', NULL, NULL, NULL, NULL, NULL, NULL, 42, 0, 0)")
+        conn.commit()
+        conn.close()
+        store = JobStore(caminho)
+        self.addCleanup(store.close)
+
+        job = store.get("j")
+
+        self.assertEqual((job["worker_pid"], job["dono"]), (42, None))
+
+
+class JobsEndpointTests(unittest.TestCase):
+    def test_post_returns_id_and_get_returns_result(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = JobManager(JobStore(str(Path(tmp) / "jobs.sqlite3")), API._executa_job,
+                                 start_background=API._inicia_job_background,
+                                 poll_background=API._consulta_job_background)
+            with patch.object(API, "job_manager", manager), \
+                    patch.object(API.provider_pool, "get", return_value=EchoProvider()), \
+                    patch.object(API.provider_pool, "warm", return_value=[]), \
+                    TestClient(API.app) as client:
+                criado = client.post("/jobs", json={"texto": "oi", "capacidade": "fast", "cache": False})
+                job_id = criado.json()["id"]
+                for _ in range(200):
+                    consulta = client.get(f"/jobs/{job_id}").json()
+                    if consulta["status"] == SUCCEEDED:
+                        break
+                    time.sleep(0.01)
+                ausente = client.get("/jobs/nao-existe")
+            manager.store.close()
+
+        self.assertEqual(criado.status_code, 202)
+        self.assertEqual(consulta["resposta"], "llama-3.1-8b-instant:oi")
+        self.assertEqual(ausente.status_code, 404)
+
+    def test_job_is_visible_only_to_its_owner(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = JobStore(str(Path(tmp) / "jobs.sqlite3"))
+            alheio = store.create({"texto": "x"}, dono=API._dono("outra-chave"))
+            proprio = store.create({"texto": "x"}, dono=API._dono("anonymous"))
+            with patch.object(API.job_manager, "store", store):
+                client = TestClient(API.app)
+                respostas = [client.get(f"/jobs/{job['id']}").status_code for job in (alheio, proprio)]
+            store.close()
+
+        self.assertEqual(respostas, [404, 200])
+
+    def test_webhook_must_be_http_url(self):
+        client = TestClient(API.app)
+
+        resposta = client.post("/jobs", json={"texto": "oi", "webhook": "file:///etc/passwd"})
+
+        self.assertEqual(resposta.status_code, 422)
+
+
+class WebhookTargetTests(unittest.TestCase):
+    def test_internal_targets_are_rejected(self):
+        for url in ("http://127.0.0.1:8000/x", "http://169.254.169.254/latest/meta-data/",
+                    "http://10.0.0.5/", "http://[::1]/", "http://[::ffff:192.168.0.1]/"):
+            with self.subTest(url=url):
+                self.assertIsNotNone(webhook_error(url))
+
+    def test_public_target_is_accepted(self):
+        self.assertIsNone(webhook_error("https://8.8.8.8/hook"))
+
+    def test_allowed_hosts_bypass_the_check(self):
+        with patch.dict(os.environ, {"MINHAIA_WEBHOOK_HOSTS": "localhost, hooks.interno"}):
+            self.assertIsNone(webhook_error("http://localhost:9000/hook"))
+            self.assertIsNotNone(webhook_error("http://127.0.0.1:9000/hook"))
+
+    def test_api_rejects_internal_webhook(self):
+        client = TestClient(API.app)
+
+        resposta = client.post("/jobs", json={"texto": "oi", "webhook": "http://169.254.169.254/"})
+
+        self.assertEqual(resposta.status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import API  # noqa: E402
+from utils.jobs import JobManager, JobStore  # noqa: E402
+
+
+class LifecycleTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = JobStore(str(Path(self.tmp.name) / "jobs.sqlite3"))
+        self.patches = [
+            patch.object(API, "job_manager", JobManager(self.store, API._executa_job)),
+            patch.object(API, "_providers_para_aquecer", return_value=["groq"]),
+        ]
+        for item in self.patches:
+            item.start()
+
+    def tearDown(self):
+        for item in self.patches:
+            item.stop()
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_ready_only_after_warmup(self):
+        liberado = threading.Event()
+
+        def aquece(nomes):
+            liberado.wait(2)
+            return nomes
+
+        async def conecta(nomes):
+            return nomes
+
+        with patch.object(API.provider_pool, "warm", side_effect=aquece), \
+                patch.object(API.provider_pool, "apreconnect", side_effect=conecta), \
+                TestClient(API.app) as client:
+            self.assertEqual(client.get("/health").status_code, 200)
+            inicial = client.get("/health/ready")
+            liberado.set()
+            for _ in range(100):
+                pronto = client.get("/health/ready")
+                if pronto.status_code == 200:
+                    break
+                threading.Event().wait(0.01)
+
+        self.assertEqual(inicial.status_code, 503)
+        self.assertEqual(inicial.json()["status"], "starting")
+        self.assertEqual(pronto.status_code, 200)
+        self.assertEqual(pronto.json()["conectados"], ["groq"])
+
+    def test_draining_server_is_not_ready(self):
+        async def conecta(nomes):
+            return []
+
+        with patch.object(API.provider_pool, "warm", return_value=[]), \
+                patch.object(API.provider_pool, "apreconnect", side_effect=conecta), \
+                TestClient(API.app) as client:
+            for _ in range(100):
+                if client.get("/health/ready").status_code == 200:
+                    break
+                threading.Event().wait(0.01)
+            API.prontidao["drenando"] = True
+            resposta = client.get("/health/ready")
+
+        self.assertEqual(resposta.status_code, 503)
+        self.assertEqual(resposta.json()["status"], "draining")
+
+    def test_server_options_set_graceful_shutdown_deadline(self):
+        with patch.dict("os.environ", {"MINHAIA_DRAIN_TIMEOUT": "12"}):
+            opcoes = API._server_options("info", API._drain_timeout())
+
+        self.assertEqual(opcoes["timeout_graceful_shutdown"], 12.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import httpx  # noqa: E402
+
+import API  # noqa: E402
+import loadtest  # noqa: E402
+from providers.simulated_provider import SimulatedError, SimulatedProvider  # noqa: E402
+
+RAPIDO = {"ttft_median_ms": 5, "ttft_sigma": 0, "tokens_per_second": 2000, "output_tokens": 4,
+          "error_rate": 0.0, "rate_limit_rate": 0.0, "retry_after": 2, "seed": 1}
+
+
+class SimulatedProviderTests(unittest.TestCase):
+    def test_stream_yields_configured_tokens_and_usage(self):
+        provider = SimulatedProvider(RAPIDO)
+
+        async def coleta():
+            return [chunk async for chunk in provider.astream_api("oi", "simulated-fast", 100)]
+
+        chunks = asyncio.run(coleta())
+
+        self.assertEqual(len([c for c in chunks if c.delta]), 4)
+        self.assertTrue(chunks[-1].done)
+        self.assertEqual(chunks[-1].usage["output_tokens"], 4)
+        self.assertEqual(provider.call_api("oi", "m", 2), "resposta simulada")
+
+    def test_rate_limit_raises_429_with_retry_after(self):
+        provider = SimulatedProvider({**RAPIDO, "rate_limit_rate": 1.0})
+
+        with self.assertRaises(SimulatedError) as ctx:
+            asyncio.run(provider.acall_api("oi", "m", 10))
+
+        self.assertEqual(ctx.exception.status_code, 429)
+        self.assertEqual(ctx.exception.headers, {"retry-after": "2"})
+
+    def test_error_rate_fails_after_first_token(self):
+        provider = SimulatedProvider({**RAPIDO, "error_rate": 1.0})
+        chunks = []
+
+        with self.assertRaises(SimulatedError) as ctx:
+            for chunk in provider.stream_api("oi", "m", 10):
+                chunks.append(chunk)
+
+        self.assertEqual(ctx.exception.status_code, 500)
+        self.assertEqual(len(chunks), 1)
+
+
+class LoadTestReportTests(unittest.TestCase):
+    def test_percentiles_use_nearest_rank(self):
+        resultado = loadtest.percentiles([float(v) for v in range(1, 101)])
+
+        self.assertEqual((resultado["p50"], resultado["p95"], resultado["p99"]), (50.0, 95.0, 99.0))
+        self.assertEqual(resultado["max"], 100.0)
+        self.assertIsNone(loadtest.percentiles([]))
+
+    def test_compare_flags_latency_and_throughput_regressions(self):
+        base = {"latencia_ms": {"p50": 100, "p95": 200, "p99": 300}, "vazao_rps": 50}
+        atual = {"latencia_ms": {"p50": 105, "p95": 260, "p99": 300}, "vazao_rps": 40}
+
+        regressoes = loadtest.compare(atual, base, tolerancia=0.1)
+
+        self.assertEqual(len(regressoes), 2)
+        self.assertTrue(regressoes[0].startswith("latencia_ms.p95"))
+        self.assertTrue(regressoes[1].startswith("vazao_rps"))
+
+    def test_run_load_against_app_with_simulated_provider(self):
+        provider = SimulatedProvider(RAPIDO)
+        relatorios = {}
+        with patch.object(API.provider_pool, "get", return_value=provider):
+            for endpoint in ("chat", "stream", "batch"):
+                args = loadtest.parse_args(["--url", "http://teste", "--endpoint", endpoint, "--rps", "50",
+                                            "--duration", "0.1", "--batch-size", "3"])
+                relatorios[endpoint] = asyncio.run(loadtest.run_load(args, httpx.ASGITransport(app=API.app)))
+
+        for endpoint, relatorio in relatorios.items():
+            self.assertEqual(relatorio["status"], {"200": 5}, endpoint)
+        self.assertLessEqual(relatorios["stream"]["ttft_ms"]["p50"], relatorios["stream"]["latencia_ms"]["p50"])
+        self.assertEqual(relatorios["batch"]["itens"], 15)
+
+
+if __name__ == "__main__":
+    unittest.main()
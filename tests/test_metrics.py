@@ -0,0 +1,104 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import API  # noqa: E402
+from helpers import EchoProvider  # noqa: E402
+from providers.base import capture_usage  # noqa: E402
+from utils import metrics  # noqa: E402
+from utils.metrics import MetricsRegistry  # noqa: E402
+
+
+class UsageProvider(EchoProvider):
+    def call_api(self, message, model, max_tokens, **kwargs):
+        self._report_usage({"prompt_tokens": 7, "completion_tokens": 3})
+        return message
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def test_counter_renders_labels_and_type(self):
+        registry = MetricsRegistry()
+        contador = registry.counter("x_total", "Teste", ("provider",))
+        contador.inc(provider="groq")
+        contador.inc(2, provider="groq")
+
+        texto = registry.render()
+
+        self.assertIn("# TYPE x_total counter", texto)
+        self.assertIn('x_total{provider="groq"} 3', texto)
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        hist = registry.histogram("lat_seconds", "Teste", buckets=(0.1, 1))
+        hist.observe(0.05)
+        hist.observe(0.5)
+        hist.observe(5)
+
+        texto = registry.render()
+
+        self.assertIn('lat_seconds_bucket{le="0.1"} 1', texto)
+        self.assertIn('lat_seconds_bucket{le="1"} 2', texto)
+        self.assertIn('lat_seconds_bucket{le="+Inf"} 3', texto)
+        self.assertIn("lat_seconds_count 3", texto)
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("y_total", "Teste", ("model",)).inc(model='a"b')
+
+        self.assertIn('y_total{model="a\\"b"} 1', registry.render())
+
+    def test_usage_reported_from_worker_thread_is_captured(self):
+        async def chama():
+            with capture_usage() as usage:
+                await UsageProvider().acall_api("oi", "usage", 10)
+            return usage
+
+        usage = asyncio.run(chama())
+
+        self.assertEqual(usage, {"input_tokens": 7, "output_tokens": 3})
+
+
+class MetricsEndpointTests(unittest.TestCase):
+    def test_chat_fills_token_counters_and_latency_phases(self):
+        labels = {"provider": "groq", "model": "llama-3.1-8b-instant", "capacidade": "fast"}
+        tokens_antes = metrics.INPUT_TOKENS.value(**labels)
+        upstream_antes = metrics.PHASE_SECONDS.count(phase="upstream", **labels)
+        client = TestClient(API.app)
+
+        with patch.object(API.provider_pool, "get", return_value=UsageProvider()):
+            resposta = client.post("/chat", json={"texto": "metricas", "capacidade": "fast", "cache": False})
+        texto = client.get("/metrics").text
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(metrics.INPUT_TOKENS.value(**labels), tokens_antes + 7)
+        self.assertEqual(metrics.PHASE_SECONDS.count(phase="upstream", **labels), upstream_antes + 1)
+        self.assertIn("minhaia_request_phase_seconds_bucket", texto)
+        self.assertIn('phase="queue"', texto)
+
+    def test_queue_full_counts_as_rate_limit_error(self):
+        antes = metrics.ERRORS.value(error_type="rate_limit", status=429)
+        client = TestClient(API.app)
+
+        async def lotado(*args, **kwargs):
+            raise API.QueueFullError("groq", 2)
+
+        with patch.object(API.provider_pool, "get", return_value=UsageProvider()), \
+                patch.object(API.admission, "acquire", side_effect=lotado):
+            resposta = client.post("/chat", json={"texto": "cheio", "capacidade": "fast", "cache": False})
+
+        self.assertEqual(resposta.status_code, 429)
+        self.assertEqual(metrics.ERRORS.value(error_type="rate_limit", status=429), antes + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
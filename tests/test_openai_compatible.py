@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from config.manager import ConfigManager  # noqa: E402
+from providers.factory import ProviderFactory  # noqa: E402
+from providers.openai_compatible_provider import OpenAICompatibleProvider  # noqa: E402
+
+
+class _ServidorLocal(BaseHTTPRequestHandler):
+    """Servidor mínimo com /v1/chat/completions, como llama.cpp ou vLLM"""
+
+    pedidos = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).pedidos.append(corpo)
+        base = {"id": "x", "created": 0, "model": corpo["model"]}
+        if corpo.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for parte in ("Olá", " local"):
+                chunk = {**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": parte}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+        resposta = json.dumps({
+            **base, "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "Olá local"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(resposta)))
+        self.end_headers()
+        self.wfile.write(resposta)
+
+
+class CompatibleConfigTests(unittest.TestCase):
+    def test_only_typed_entries_are_compatible(self):
+        compativeis = ConfigManager().get_compatible_providers()
+        self.assertIn("ollama", compativeis)
+        self.assertNotIn("deepseek", compativeis)
+        self.assertTrue(compativeis["ollama"]["stream_usage"])
+        self.assertIsNone(compativeis["ollama"]["api_key_env"])
+
+    def test_factory_registers_compatible_providers(self):
+        self.assertIn("ollama", ProviderFactory.get_available_providers())
+        self.assertIs(ProviderFactory.get_provider_class("ollama"), OpenAICompatibleProvider)
+        provider = ProviderFactory.create_provider("ollama")
+        try:
+            self.assertEqual(str(provider.client.base_url), "http://localhost:11434/v1/")
+            self.assertIn("llama3.2", provider.get_available_models())
+        finally:
+            provider.close()
+
+    def test_cli_accepts_compatible_provider(self):
+        from utils.argumentos import CLIArgumentParser
+
+        with mock.patch.object(sys, "argv", ["main.py", "--provider", "ollama", "oi"]):
+            self.assertEqual(CLIArgumentParser().parse_args().provider, "ollama")
+
+
+class CompatibleProviderTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _ServidorLocal)
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.servidor.server_address[1]}/v1"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+
+    def setUp(self):
+        _ServidorLocal.pedidos = []
+
+    def _provider(self, **settings):
+        provider = OpenAICompatibleProvider("local", {"base_url": self.base_url, "models": {}, **settings})
+        self.addCleanup(provider.close)
+        return provider
+
+    def test_call_api_without_api_key(self):
+        provider = self._provider()
+        resposta = provider.call_api("oi", "modelo-local", 16, history=[{"role": "user", "content": "antes"}])
+        self.assertEqual(resposta, "Olá local")
+        mensagens = _ServidorLocal.pedidos[0]["messages"]
+        self.assertEqual([m["role"] for m in mensagens], ["system", "user", "user"])
+
+    def test_stream_api_yields_deltas(self):
+        chunks = list(self._provider(stream_usage=False).stream_api("oi", "modelo-local", 16))
+        self.assertEqual([c.delta for c in chunks if c.delta], ["Olá", " local"])
+        self.assertTrue(chunks[-1].done)
+        self.assertNotIn("stream_options", _ServidorLocal.pedidos[0])
+
+    def test_streaming_disabled_sends_one_delta(self):
+        provider = self._provider(streaming=False)
+
+        async def coleta():
+            try:
+                return [c async for c in provider.astream_api("oi", "modelo-local", 16)]
+            finally:
+                await provider.aclose()
+
+        chunks = asyncio.run(coleta())
+        self.assertEqual([c.delta for c in chunks if c.delta], ["Olá local"])
+        self.assertFalse(_ServidorLocal.pedidos[0].get("stream"))
+
+    def test_declared_api_key_env_is_required(self):
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("LOCAL_TEST_KEY", None)
+            provider = self._provider(api_key_env="LOCAL_TEST_KEY")
+        self.assertIsNone(provider.client)
+        with mock.patch("utils.error_handler.SecureErrorHandler.handle_error"):
+            with self.assertRaises(Exception):
+                provider.call_api("oi", "modelo-local", 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import httpx  # noqa: E402
+
+from helpers import EchoProvider  # noqa: E402
+from providers.pool import ProviderPool  # noqa: E402
+
+
+class FakeProvider(EchoProvider):
+    def __init__(self):
+        super().__init__(api_key="x")
+        self.warmed = False
+        self.closed = False
+
+    def warmup(self):
+        self.warmed = True
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeFactory:
+    def __init__(self):
+        self.created = 0
+
+    def create_provider(self, provider_name):
+        self.created += 1
+        return FakeProvider()
+
+    def get_available_providers(self):
+        return ["fake", "whisper"]
+
+
+class ProviderPoolTests(unittest.TestCase):
+    def test_get_reuses_instance(self):
+        factory = FakeFactory()
+        pool = ProviderPool(factory)
+
+        self.assertIs(pool.get("fake"), pool.get("fake"))
+        self.assertEqual(factory.created, 1)
+
+    def test_warm_skips_non_chat_and_unknown_providers(self):
+        pool = ProviderPool(FakeFactory())
+
+        prontos = pool.warm(["fake", "whisper", "desconhecido"])
+
+        self.assertEqual(prontos, ["fake"])
+        self.assertTrue(pool.get("fake").warmed)
+
+    def test_apreconnect_opens_connection_of_warm_providers(self):
+        pedidos = []
+
+        def responde(request):
+            pedidos.append((request.method, str(request.url)))
+            return httpx.Response(404)
+
+        pool = ProviderPool(FakeFactory())
+        provider = pool.get("fake")
+        provider.async_client = SimpleNamespace(
+            _client=httpx.AsyncClient(transport=httpx.MockTransport(responde)),
+            base_url="https://api.exemplo.com/v1/",
+        )
+
+        conectados = asyncio.run(pool.apreconnect(["fake", "desconhecido"]))
+
+        self.assertEqual(conectados, ["fake"])
+        self.assertEqual(pedidos, [("HEAD", "https://api.exemplo.com/v1/")])
+
+    def test_apreconnect_ignores_providers_without_httpx_client(self):
+        pool = ProviderPool(FakeFactory())
+        pool.get("fake")
+
+        self.assertEqual(asyncio.run(pool.apreconnect(["fake"])), [])
+
+    def test_aclose_closes_and_forgets_instances(self):
+        pool = ProviderPool(FakeFactory())
+        provider = pool.get("fake")
+
+        asyncio.run(pool.aclose())
+
+        self.assertTrue(provider.closed)
+        self.assertEqual(pool.instances(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,340 @@
+import asyncio
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from email.utils import formatdate
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from config.manager import ConfigManager  # noqa: E402
+from providers.base import BaseProvider, StreamChunk  # noqa: E402
+from providers.factory import ProviderFactory  # noqa: E402
+from providers.simulated_provider import SimulatedError  # noqa: E402
+from utils import metrics, resilience  # noqa: E402
+from utils.resilience import CircuitBreakers, CircuitOpenError, ResilientProvider  # noqa: E402
+from utils.shared_state import SharedStateStore  # noqa: E402
+
+POLITICA = {"max_attempts": 3, "backoff_base": 0.5, "backoff_max": 8.0, "deadline": 30.0,
+            "failure_threshold": 0.5, "min_calls": 4, "window": 10, "open_seconds": 30.0}
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+class FlakyProvider(BaseProvider):
+    """Falha com os erros da lista, na ordem, e depois responde"""
+
+    def __init__(self, erros=(), erro_no_meio=None):
+        super().__init__(api_key="x")
+        self.erros = list(erros)
+        self.erro_no_meio = erro_no_meio
+        self.chamadas = 0
+
+    def _proximo(self):
+        self.chamadas += 1
+        if self.erros:
+            raise self.erros.pop(0)
+
+    def call_api(self, message, model, max_tokens, **kwargs):
+        self._proximo()
+        return "ok"
+
+    async def acall_api(self, message, model, max_tokens, **kwargs):
+        self._proximo()
+        return "ok"
+
+    def stream_api(self, message, model, max_tokens, **kwargs):
+        self._proximo()
+        yield StreamChunk(delta="o")
+        if self.erro_no_meio:
+            raise self.erro_no_meio
+        yield StreamChunk(delta="k")
+        yield StreamChunk(done=True, model=model)
+
+    def get_available_models(self):
+        return ["m"]
+
+
+class ErrorClassificationTests(unittest.TestCase):
+    def test_status_and_retry_after_from_sdk_style_errors(self):
+        erro = SimulatedError(429, "limite", retry_after=2)
+        self.assertEqual(resilience.status_code(erro), 429)
+        self.assertEqual(resilience.retry_after(erro), 2.0)
+        self.assertEqual(resilience.transient_reason(erro), "429")
+
+        resposta = SimpleNamespace(status_code=503, headers={"Retry-After-Ms": "1500"})
+        erro = type("APIStatusError", (Exception,), {})("x")
+        erro.response = resposta
+        self.assertEqual(resilience.status_code(erro), 503)
+        self.assertEqual(resilience.retry_after(erro), 1.5)
+
+    def test_retry_after_http_date(self):
+        erro = SimulatedError(503, "x")
+        erro.headers = {"retry-after": formatdate(timeval=None, usegmt=True)}
+        self.assertLessEqual(resilience.retry_after(erro), 1.0)
+
+    def test_definitive_and_connection_errors(self):
+        self.assertIsNone(resilience.transient_reason(SimulatedError(400, "requisição inválida")))
+        self.assertIsNone(resilience.transient_reason(ValueError("x")))
+        conexao = type("APIConnectionError", (Exception,), {})("x")
+        self.assertEqual(resilience.transient_reason(conexao), "connection")
+        self.assertEqual(resilience.transient_reason(TimeoutError()), "connection")
+
+
+class RetryTests(unittest.TestCase):
+    def setUp(self):
+        self.relogio = Relogio()
+        self.breakers = CircuitBreakers(clock=self.relogio)
+        patch = mock.patch.object(resilience, "breakers", self.breakers)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.sleep = mock.patch("utils.resilience.time.sleep").start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _provider(self, inner, **politica):
+        return ResilientProvider("flaky", inner, {**POLITICA, **politica})
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        inner = FlakyProvider([SimulatedError(503, "x"), SimulatedError(502, "x")])
+        antes = metrics.RETRIES.value(provider="flaky", model="m", motivo="503")
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(self._provider(inner).call_api("oi", "m", 10), "ok")
+        self.assertEqual(inner.chamadas, 3)
+        esperas = [c.args[0] for c in self.sleep.call_args_list]
+        self.assertTrue(0 <= esperas[0] <= 0.5 and 0 <= esperas[1] <= 1.0)
+        self.assertEqual(metrics.RETRIES.value(provider="flaky", model="m", motivo="503"), antes + 1)
+
+    def test_retry_after_is_honored(self):
+        inner = FlakyProvider([SimulatedError(429, "x", retry_after=4)])
+        with contextlib.redirect_stderr(io.StringIO()):
+            self._provider(inner).call_api("oi", "m", 10)
+        self.sleep.assert_called_once_with(4.0)
+
+    def test_definitive_error_is_not_retried(self):
+        inner = FlakyProvider([SimulatedError(400, "x")])
+        with self.assertRaises(SimulatedError):
+            self._provider(inner).call_api("oi", "m", 10)
+        self.assertEqual(inner.chamadas, 1)
+
+    def test_deadline_caps_total_retry_time(self):
+        inner = FlakyProvider([SimulatedError(429, "x", retry_after=60)])
+        with self.assertRaises(SimulatedError):
+            self._provider(inner, deadline=10).call_api("oi", "m", 10)
+        self.sleep.assert_not_called()
+
+    def test_attempts_are_limited(self):
+        inner = FlakyProvider([SimulatedError(503, "x")] * 5)
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SimulatedError):
+            self._provider(inner, min_calls=10).call_api("oi", "m", 10)
+        self.assertEqual(inner.chamadas, 3)
+
+    def test_stream_is_retried_only_before_the_first_chunk(self):
+        inner = FlakyProvider([SimulatedError(503, "x")])
+        with contextlib.redirect_stderr(io.StringIO()):
+            chunks = list(self._provider(inner, min_calls=10).stream_api("oi", "m", 10))
+        self.assertEqual("".join(c.delta for c in chunks), "ok")
+        self.assertEqual(inner.chamadas, 2)
+
+        inner = FlakyProvider(erro_no_meio=SimulatedError(500, "x"))
+        with self.assertRaises(SimulatedError):
+            list(self._provider(inner, min_calls=10).stream_api("oi", "m", 10))
+        self.assertEqual(inner.chamadas, 1)
+        self.assertEqual(self.breakers.states()["flaky:m"]["taxa_falhas"], 0.67)
+
+    def test_each_stream_counts_once_in_the_breaker(self):
+        provider = self._provider(FlakyProvider(), min_calls=10)
+        list(provider.stream_api("oi", "m", 10))
+        abandonado = provider.stream_api("oi", "m", 10)
+        next(abandonado)
+        abandonado.close()
+        with self.assertRaises(SimulatedError):
+            list(self._provider(FlakyProvider(erro_no_meio=SimulatedError(500, "x")), min_calls=10)
+                 .stream_api("oi", "m", 10))
+
+        self.assertEqual(self.breakers._estados["flaky:m"]["resultados"], [0, 0, 1])
+
+        async def consome():
+            async for _ in self._provider(FlakyProvider(), min_calls=10).astream_api("oi", "m", 10):
+                pass
+
+        asyncio.run(consome())
+        self.assertEqual(self.breakers._estados["flaky:m"]["resultados"], [0, 0, 1, 0])
+
+    def test_async_call_and_stream_are_retried(self):
+        inner = FlakyProvider([SimulatedError(503, "x"), SimulatedError(503, "x")])
+        provider = self._provider(inner)
+
+        async def executa():
+            with mock.patch("utils.resilience.asyncio.sleep", new=mock.AsyncMock()) as dorme:
+                resposta = await provider.acall_api("oi", "m", 10)
+                chunks = [c async for c in provider.astream_api("oi", "m", 10)]
+            return resposta, chunks, dorme.await_count
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            resposta, chunks, esperas = asyncio.run(executa())
+        self.assertEqual(resposta, "ok")
+        self.assertEqual("".join(c.delta for c in chunks), "ok")
+        self.assertEqual(esperas, 2)
+
+    def test_attributes_are_delegated(self):
+        inner = FlakyProvider()
+        provider = self._provider(inner)
+        provider.async_client = "cliente"
+        self.assertEqual(inner.async_client, "cliente")
+        self.assertEqual(provider.get_available_models(), ["m"])
+        self.assertIs(provider.wrapped, inner)
+
+
+class SdkErrorTests(unittest.TestCase):
+    """Erros reais do SDK da Anthropic, embrulhados pelo ClaudeProvider"""
+
+    def setUp(self):
+        patch = mock.patch.object(resilience, "breakers", CircuitBreakers(clock=Relogio()))
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.sleep = mock.patch("utils.resilience.time.sleep").start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _claude(self, erros):
+        from providers.claude_provider import ClaudeProvider
+
+        with mock.patch.dict("os.environ", {"ANTHROPIC_API_KEY": "sk-ant-test"}):
+            inner = ClaudeProvider()
+        self.addCleanup(inner.close)
+        respostas = [*erros, SimpleNamespace(content=[SimpleNamespace(text="ok")], usage=None)]
+
+        def create(**payload):
+            resposta = respostas.pop(0)
+            if isinstance(resposta, Exception):
+                raise resposta
+            return resposta
+
+        inner.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+        return ResilientProvider("claude", inner, POLITICA)
+
+    @staticmethod
+    def _resposta(status, headers=None):
+        import httpx
+
+        requisicao = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+        return httpx.Response(status, headers=headers or {}, request=requisicao)
+
+    def test_rate_limit_and_overloaded_are_retried(self):
+        import anthropic
+
+        erros = [
+            anthropic.RateLimitError("limite", response=self._resposta(429, {"retry-after": "2"}), body=None),
+            anthropic.InternalServerError("overloaded", response=self._resposta(529), body=None),
+        ]
+        provider = self._claude(erros)
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(provider.call_api("oi", "claude-3-haiku-20240307", 10, stream=False), "ok")
+        self.assertEqual(self.sleep.call_count, 2)
+        self.assertEqual(self.sleep.call_args_list[0].args[0], 2.0)
+
+    def test_bad_request_is_not_retried(self):
+        import anthropic
+
+        erro = anthropic.BadRequestError("inválida", response=self._resposta(400), body=None)
+        provider = self._claude([erro])
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(Exception) as contexto:
+            provider.call_api("oi", "claude-3-haiku-20240307", 10, stream=False)
+        self.assertIs(contexto.exception.__cause__, erro)
+        self.sleep.assert_not_called()
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def setUp(self):
+        self.relogio = Relogio()
+        self.breakers = CircuitBreakers(clock=self.relogio)
+
+    def _falhas(self, n, breakers=None):
+        with contextlib.redirect_stderr(io.StringIO()):
+            for _ in range(n):
+                (breakers or self.breakers).record("p", "m", POLITICA, falha=True)
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        self.breakers.record("p", "m", POLITICA, falha=False)
+        self._falhas(2)
+        self.breakers.allow("p", "m", POLITICA)
+        self._falhas(1)
+        with self.assertRaises(CircuitOpenError) as contexto:
+            self.breakers.allow("p", "m", POLITICA)
+        self.assertEqual(contexto.exception.retry_after, 30)
+        self.breakers.collect_metrics()
+        self.assertEqual(metrics.CIRCUIT_STATE.value(provider="p", model="m"), 2)
+
+    def test_half_open_probe_closes_or_reopens(self):
+        self._falhas(4)
+        self.relogio.agora += 31
+        self.assertEqual(self.breakers.states()["p:m"]["estado"], "half_open")
+        self.breakers.allow("p", "m", POLITICA)
+        with self.assertRaises(CircuitOpenError):
+            self.breakers.allow("p", "m", POLITICA)  # só uma sondagem por vez
+        self._falhas(1)
+        self.assertEqual(self.breakers.states()["p:m"]["estado"], "open")
+
+        self.relogio.agora += 31
+        self.breakers.allow("p", "m", POLITICA)
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.breakers.record("p", "m", POLITICA, falha=False)
+        self.assertEqual(self.breakers.states()["p:m"]["estado"], "closed")
+        self.breakers.allow("p", "m", POLITICA)
+
+    def test_state_is_shared_through_the_store(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            store = SharedStateStore(str(Path(pasta) / "estado.sqlite3"))
+            self.addCleanup(store.close)
+            self._falhas(4, CircuitBreakers(store=store, clock=self.relogio))
+            outro = CircuitBreakers(store=store, clock=self.relogio)
+            with self.assertRaises(CircuitOpenError):
+                outro.allow("p", "m", POLITICA)
+            self.assertEqual(outro.states()["p:m"]["reabre_em_s"], 30.0)
+
+    def test_list_models_shows_open_circuit(self):
+        self._falhas(4, self.breakers)
+        config = ConfigManager()
+        estados = {"simulated:simulated-default": self.breakers.states()["p:m"]}
+        saida = io.StringIO()
+        with contextlib.redirect_stdout(saida):
+            config.list_available_models(estados)
+        linha = next(l for l in saida.getvalue().splitlines() if "simulated-default" in l)
+        self.assertIn("circuito aberto", linha)
+        self.assertNotIn("circuito", next(l for l in saida.getvalue().splitlines() if "simulated-fast" in l))
+
+
+class WiringTests(unittest.TestCase):
+    def test_factory_wraps_chat_providers(self):
+        provider = ProviderFactory.create_provider("simulated")
+        self.assertIsInstance(provider, ResilientProvider)
+        self.assertIn("assistant", ProviderFactory._without_resilience)
+
+    def test_resilience_settings_merge(self):
+        self.assertEqual(ConfigManager().get_resilience_settings("groq")["max_attempts"], 3)
+
+    def test_api_maps_open_circuit_to_503(self):
+        import API
+
+        with contextlib.redirect_stderr(io.StringIO()), contextlib.redirect_stdout(io.StringIO()):
+            erro = API._erro_interno(CircuitOpenError("groq:m", 12))
+            limite = API._erro_interno(SimulatedError(429, "x", retry_after=3))
+        self.assertEqual((erro.status_code, erro.headers["Retry-After"]), (503, "12"))
+        self.assertEqual((limite.status_code, limite.headers["Retry-After"]), (429, "3"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from providers.base import StreamChunk  # noqa: E402
+from utils.cache import ResponseCache  # noqa: E402
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "cache.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_changes_with_generation_parameters(self):
+        base = ResponseCache.make_key("groq", "m", "p", 0, 100, "oi")
+
+        self.assertEqual(base, ResponseCache.make_key("groq", "m", "p", 0, 100, "oi"))
+        self.assertNotEqual(base, ResponseCache.make_key("groq", "m", "p", 0.7, 100, "oi"))
+        self.assertNotEqual(base, ResponseCache.make_key("groq", "m", "outra", 0, 100, "oi"))
+
+    def test_only_deterministic_settings_are_cached_by_default(self):
+        self.assertTrue(ResponseCache.is_cacheable(0))
+        self.assertFalse(ResponseCache.is_cacheable(0.7))
+        self.assertTrue(ResponseCache.is_cacheable(0.7, opt_in=True))
+        self.assertFalse(ResponseCache.is_cacheable(0, bypass=True))
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = ResponseCache(self.path, max_memory_entries=2, max_disk_entries=0)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+
+        self.assertEqual(cache.get("a"), "1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_disk_tier_survives_new_instance(self):
+        ResponseCache(self.path).set("chave", "resposta")
+
+        cache = ResponseCache(self.path)
+
+        self.assertEqual(cache.get("chave"), "resposta")
+        self.assertEqual(cache.stats()["disk_hits"], 1)
+
+    def test_async_access_runs_disk_tier_in_a_thread(self):
+        cache = ResponseCache(self.path)
+
+        async def cenario():
+            await cache.aset("chave", "resposta")
+            return await ResponseCache(self.path).aget("chave")
+
+        with patch("utils.cache.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+            self.assertEqual(asyncio.run(cenario()), "resposta")
+
+        self.assertEqual(to_thread.call_count, 2)
+
+    def test_expired_entries_are_misses(self):
+        cache = ResponseCache(self.path)
+        with patch("utils.cache.time.time", return_value=1000.0):
+            cache.set("chave", "resposta", ttl=10)
+        with patch("utils.cache.time.time", return_value=1011.0):
+            self.assertIsNone(cache.get("chave"))
+
+    def test_disk_tier_is_bounded(self):
+        cache = ResponseCache(self.path, max_memory_entries=1, max_disk_entries=2)
+        for chave in ("a", "b", "c"):
+            cache.set(chave, chave)
+
+        total = cache._connection().execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+
+        self.assertEqual(total, 2)
+
+    def test_wrap_stream_stores_full_text(self):
+        cache = ResponseCache(self.path)
+        chunks = [StreamChunk(delta="a"), StreamChunk(delta="b"), StreamChunk(done=True)]
+
+        list(cache.wrap_stream("chave", iter(chunks)))
+
+        self.assertEqual(cache.get("chave"), "ab")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from providers.base import StreamChunk  # noqa: E402
+from utils.handlers import ResponseHandler  # noqa: E402
+
+
+def build_args(**overrides):
+    base = {"voz": None, "polly": None, "t": False, "f": None, "p": False, "ouvir": False, "provider": "groq"}
+    base.update(overrides)
+    return SimpleNamespace(**base)
+
+
+def chunks():
+    yield StreamChunk(delta="Olá, ")
+    yield StreamChunk(delta="mundo")
+    yield StreamChunk(done=True, model="m", usage={"input_tokens": 1, "output_tokens": 2})
+
+
+class ResponseHandlerStreamingTests(unittest.TestCase):
+    def test_supports_streaming_only_for_plain_or_file_output(self):
+        self.assertTrue(ResponseHandler.supports_streaming(build_args()))
+        self.assertTrue(ResponseHandler.supports_streaming(build_args(f="saida.txt", p=True)))
+        self.assertFalse(ResponseHandler.supports_streaming(build_args(t=True)))
+        self.assertFalse(ResponseHandler.supports_streaming(build_args(p=True)))
+        self.assertFalse(ResponseHandler.supports_streaming(build_args(voz="voz.mp3")))
+
+    def test_process_response_prints_stream_incrementally(self):
+        saida = io.StringIO()
+
+        with patch.object(sys, "stdout", saida), patch.object(sys, "stderr", io.StringIO()):
+            ResponseHandler.process_response(chunks(), build_args())
+
+        self.assertEqual(saida.getvalue(), "Olá, mundo\n")
+
+    def test_process_stream_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            destino = Path(tmp) / "resposta.txt"
+
+            with patch.object(sys, "stderr", io.StringIO()):
+                texto = ResponseHandler.process_stream(chunks(), build_args(f=str(destino)))
+
+            self.assertEqual(texto, "Olá, mundo")
+            self.assertEqual(destino.read_text(encoding="utf-8"), "Olá, mundo")
+
+
+if __name__ == "__main__":
+    unittest.main()
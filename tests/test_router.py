@@ -0,0 +1,117 @@
+import asyncio
+import random
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import API  # noqa: E402
+from helpers import EchoProvider  # noqa: E402
+from providers.base import StreamChunk  # noqa: E402
+from utils.router import LatencyRouter  # noqa: E402
+from utils.shared_state import SharedStateStore  # noqa: E402
+
+
+CANDIDATOS = [("groq", "a"), ("gemini", "b")]
+
+
+class LatencyRouterTests(unittest.TestCase):
+    def setUp(self):
+        self.router = LatencyRouter(exploration=0.0)
+
+    def test_unmeasured_candidates_are_tried_first(self):
+        self.router.record("groq", "a", latency=0.1)
+
+        escolha, motivo = self.router.choose(CANDIDATOS)
+
+        self.assertEqual((escolha, motivo), (("gemini", "b"), "unmeasured"))
+
+    def test_fastest_healthy_candidate_wins(self):
+        self.router.record("groq", "a", latency=2.0)
+        self.router.record("gemini", "b", latency=0.5)
+
+        self.assertEqual(self.router.choose(CANDIDATOS), (("gemini", "b"), "best"))
+
+    def test_candidates_with_high_error_rate_are_skipped(self):
+        self.router.record("groq", "a", latency=2.0)
+        self.router.record("gemini", "b", latency=0.5)
+        for _ in range(5):
+            self.router.record("gemini", "b", error=True)
+
+        self.assertEqual(self.router.choose(CANDIDATOS)[0], ("groq", "a"))
+
+    def test_unhealthy_candidate_is_probed_and_recovers(self):
+        self.router.record("groq", "a", latency=0.1)
+        self.router.record("gemini", "b", latency=5.0)
+        for _ in range(4):
+            self.router.record("groq", "a", error=True)
+        self.assertEqual(self.router.choose(CANDIDATOS)[0], ("gemini", "b"))
+
+        with patch("utils.router.time.time", return_value=time.time() + 61):
+            self.assertEqual(self.router.choose(CANDIDATOS), (("groq", "a"), "probe"))
+        for _ in range(2):
+            self.router.record("groq", "a", latency=0.1)
+
+        self.assertEqual(self.router.choose(CANDIDATOS), (("groq", "a"), "best"))
+
+    def test_exploration_picks_random_healthy_candidate(self):
+        router = LatencyRouter(exploration=1.0, rng=random.Random(0))
+        router.record("groq", "a", latency=2.0)
+        router.record("gemini", "b", latency=0.5)
+
+        motivos = {router.choose(CANDIDATOS)[1] for _ in range(5)}
+
+        self.assertEqual(motivos, {"explore"})
+
+    def test_ewma_smooths_latency(self):
+        self.router.record("groq", "a", latency=1.0)
+        self.router.record("groq", "a", latency=2.0)
+
+        self.assertAlmostEqual(self.router.stats("groq:a").latency, 1.2)
+
+    def test_track_stream_records_ttft_and_latency(self):
+        chunks = [StreamChunk(delta="x"), StreamChunk(done=True)]
+
+        list(self.router.track_stream("groq", "a", iter(chunks)))
+
+        stats = self.router.stats("groq:a")
+        self.assertIsNotNone(stats.ttft)
+        self.assertIsNotNone(stats.latency)
+
+    def test_store_persists_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            caminho = str(Path(tmp) / "shared.sqlite3")
+            LatencyRouter(store=SharedStateStore(caminho)).record("groq", "a", latency=0.3)
+
+            stats = LatencyRouter(store=SharedStateStore(caminho)).stats("groq:a")
+
+        self.assertEqual(stats.samples, 1)
+        self.assertAlmostEqual(stats.latency, 0.3)
+
+
+class ApiAutoRoutingTests(unittest.TestCase):
+    def test_auto_provider_uses_router_choice(self):
+        router = LatencyRouter(exploration=0.0)
+        for provider, _, modelo in API.config_manager.get_auto_candidates("fast"):
+            router.record(provider, modelo, latency=5.0)
+        router.record("gemini", "gemini-2.5-flash-lite", latency=0.0)
+        req = API.MessageRequest(texto="oi", provider="auto", capacidade="fast", cache=False)
+
+        with patch.object(API, "router", router), \
+                patch.object(API.provider_pool, "get", return_value=EchoProvider()):
+            resposta = asyncio.run(API.trata_mensagem(req, token="anonymous"))
+
+        self.assertEqual(resposta.modelo, "gemini-2.5-flash-lite")
+        self.assertEqual(router.stats("gemini:gemini-2.5-flash-lite").samples, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
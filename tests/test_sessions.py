@@ -0,0 +1,150 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from starlette.websockets import WebSocketDisconnect  # noqa: E402
+
+import API  # noqa: E402
+from helpers import EchoProvider  # noqa: E402
+from providers.base import StreamChunk, flatten_history  # noqa: E402
+from utils.sessions import SessionStore  # noqa: E402
+
+
+class HistoryEchoProvider(EchoProvider):
+    supports_history = True
+
+    def __init__(self):
+        super().__init__()
+        self.historicos = []
+
+    async def astream_api(self, message, model, max_tokens, **kwargs):
+        self.historicos.append(kwargs.get("history"))
+        for parte in ("eco", ":", message):
+            yield StreamChunk(delta=parte)
+        yield StreamChunk(done=True, model=model, usage={"input_tokens": 1, "output_tokens": 3})
+
+
+class PlainProvider(HistoryEchoProvider):
+    supports_history = False
+
+    async def astream_api(self, message, model, max_tokens, **kwargs):
+        self.historicos.append(message)
+        yield StreamChunk(delta="ok")
+        yield StreamChunk(done=True, model=model)
+
+
+class SessionStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SessionStore(str(Path(self.tmp.name) / "sessions.sqlite3"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_history_returns_latest_messages_in_order(self):
+        sessao = self.store.create("groq", "fast", None, "dono")
+        for i in range(3):
+            self.store.append_turn(sessao["id"], f"p{i}", f"r{i}")
+
+        historico = self.store.history(sessao["id"], limite=4)
+
+        self.assertEqual([m["content"] for m in historico], ["p1", "r1", "p2", "r2"])
+        self.assertEqual(historico[0]["role"], "user")
+
+    def test_delete_removes_session_and_messages(self):
+        sessao = self.store.create()
+        self.store.append_turn(sessao["id"], "p", "r")
+
+        self.assertTrue(self.store.delete(sessao["id"]))
+        self.assertIsNone(self.store.get(sessao["id"]))
+        self.assertEqual(self.store.history(sessao["id"]), [])
+
+    def test_flatten_history_for_providers_without_messages(self):
+        texto = flatten_history([{"role": "user", "content": "oi"}, {"role": "assistant", "content": "olá"}], "e aí?")
+
+        self.assertIn("Usuário: oi", texto)
+        self.assertIn("Assistente: olá", texto)
+        self.assertTrue(texto.endswith("Usuário: e aí?"))
+        self.assertEqual(flatten_history([], "só"), "só")
+
+
+class SessionWebSocketTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SessionStore(str(Path(self.tmp.name) / "sessions.sqlite3"))
+        self.patch_store = patch.object(API, "session_store", self.store)
+        self.patch_store.start()
+        self.client = TestClient(API.app)
+
+    def tearDown(self):
+        self.patch_store.stop()
+        self.store.close()
+        self.tmp.cleanup()
+
+    def conversa(self, ws, texto):
+        ws.send_json({"texto": texto})
+        eventos = []
+        while True:
+            evento = ws.receive_json()
+            eventos.append(evento)
+            if evento["tipo"] in ("done", "erro"):
+                return eventos
+
+    def test_second_turn_receives_server_side_history(self):
+        provider = HistoryEchoProvider()
+        with patch.object(API.provider_pool, "get", return_value=provider), \
+                self.client.websocket_connect("/ws/session?capacidade=fast") as ws:
+            sessao_id = ws.receive_json()["id"]
+            primeiro = self.conversa(ws, "oi")
+            self.conversa(ws, "tudo bem?")
+
+        self.assertEqual([e["texto"] for e in primeiro if e["tipo"] == "delta"], ["eco", ":", "oi"])
+        self.assertEqual(primeiro[-1]["usage"]["output_tokens"], 3)
+        self.assertEqual(provider.historicos, [
+            [],
+            [{"role": "user", "content": "oi"}, {"role": "assistant", "content": "eco:oi"}],
+        ])
+        self.assertEqual(len(self.client.get(f"/sessions/{sessao_id}").json()["mensagens"]), 4)
+
+    def test_reconnect_continues_session_and_plain_providers_get_flattened_text(self):
+        sessao = self.store.create("groq", "fast", None, API._dono("anonymous"))
+        self.store.append_turn(sessao["id"], "meu nome é Ana", "prazer")
+        provider = PlainProvider()
+
+        with patch.object(API.provider_pool, "get", return_value=provider), \
+                self.client.websocket_connect(f"/ws/session?session_id={sessao['id']}") as ws:
+            self.assertEqual(ws.receive_json()["mensagens"], 2)
+            self.conversa(ws, "qual meu nome?")
+
+        self.assertIn("meu nome é Ana", provider.historicos[0])
+        self.assertTrue(provider.historicos[0].endswith("qual meu nome?"))
+
+    def test_session_of_another_key_is_refused(self):
+        sessao = self.store.create(dono="outro")
+
+        with self.assertRaises(WebSocketDisconnect):
+            with self.client.websocket_connect(f"/ws/session?session_id={sessao['id']}") as ws:
+                ws.receive_json()
+        self.assertEqual(self.client.get(f"/sessions/{sessao['id']}").status_code, 404)
+
+    def test_invalid_message_keeps_connection_open(self):
+        with patch.object(API.provider_pool, "get", return_value=HistoryEchoProvider()), \
+                self.client.websocket_connect("/ws/session") as ws:
+            ws.receive_json()
+            ws.send_text("não é json")
+            self.assertEqual(ws.receive_json()["tipo"], "erro")
+            self.assertEqual(self.conversa(ws, "oi")[-1]["tipo"], "done")
+
+
+if __name__ == "__main__":
+    unittest.main()
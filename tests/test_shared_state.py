@@ -0,0 +1,188 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import API  # noqa: E402
+from utils.metrics import MetricsRegistry  # noqa: E402
+from utils.router import LatencyRouter  # noqa: E402
+from utils.rate_limit import RateLimitExceeded, SharedKeyRateLimiter  # noqa: E402
+from utils.shared_state import SharedStateStore  # noqa: E402
+
+
+class SharedStateTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "shared.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rate_limit_buckets_are_shared_between_workers(self):
+        limites = {"rps": 0.001, "burst": 2, "tpm": 100000}
+        worker_a = SharedKeyRateLimiter(SharedStateStore(self.path), default_limits=limites)
+        worker_b = SharedKeyRateLimiter(SharedStateStore(self.path), default_limits=limites)
+
+        worker_a.check("chave")
+        worker_b.check("chave")
+
+        with self.assertRaises(RateLimitExceeded):
+            worker_a.check("chave")
+
+    def test_api_key_is_not_stored_in_plain_text(self):
+        store = SharedStateStore(self.path)
+        self.addCleanup(store.close)
+        SharedKeyRateLimiter(store).check("segredo-da-chave")
+
+        with store.transaction() as conn:
+            chaves = {linha[0] for linha in conn.execute("SELECT chave FROM baldes")}
+
+        self.assertEqual(len(chaves), 1)
+        self.assertNotIn("segredo-da-chave", chaves)
+
+    def test_rejected_request_does_not_consume_tokens(self):
+        limites = {"rps": 0.001, "burst": 2, "tpm": 60}
+        limiter = SharedKeyRateLimiter(SharedStateStore(self.path), default_limits=limites)
+        limiter.check("chave", tokens=50)
+
+        with self.assertRaises(RateLimitExceeded):
+            limiter.check("chave", tokens=50)
+        limiter.check("chave", tokens=5)
+
+    def test_locked_store_does_not_block_the_event_loop(self):
+        store = SharedStateStore(self.path)
+        self.addCleanup(store.close)
+        router = LatencyRouter(store=store)
+        limiter = SharedKeyRateLimiter(store, default_limits={"rps": 10, "burst": 10, "tpm": 100000})
+        router.record("groq", "a", latency=1.0)  # cria as tabelas antes de travar o banco
+
+        outro_worker = sqlite3.connect(self.path, isolation_level=None)
+        self.addCleanup(outro_worker.close)
+        outro_worker.execute("BEGIN IMMEDIATE")
+
+        async def cenario():
+            batidas = 0
+
+            async def coracao():
+                nonlocal batidas
+                while True:
+                    batidas += 1
+                    await asyncio.sleep(0.01)
+
+            pulso = asyncio.create_task(coracao())
+            gravacoes = asyncio.gather(router.arecord("groq", "a", latency=2.0), limiter.acheck("chave"))
+            await asyncio.sleep(0.2)
+            outro_worker.execute("COMMIT")
+            await gravacoes
+            pulso.cancel()
+            return batidas
+
+        self.assertGreater(asyncio.run(cenario()), 5)
+        self.assertAlmostEqual(router.stats("groq:a").latency, 1.2)
+
+    def test_metrics_endpoint_does_not_block_the_event_loop(self):
+        store = SharedStateStore(self.path)
+        self.addCleanup(store.close)
+        registry = MetricsRegistry()
+        registry.counter("req_total", "Teste").inc()
+        registry.attach_store(store)
+        registry.publish()
+
+        outro_worker = sqlite3.connect(self.path, isolation_level=None)
+        self.addCleanup(outro_worker.close)
+        outro_worker.execute("BEGIN IMMEDIATE")
+
+        async def cenario():
+            batidas = 0
+
+            async def coracao():
+                nonlocal batidas
+                while True:
+                    batidas += 1
+                    await asyncio.sleep(0.01)
+
+            pulso = asyncio.create_task(coracao())
+            resposta = asyncio.ensure_future(API.exporta_metricas())
+            await asyncio.sleep(0.2)
+            outro_worker.execute("COMMIT")
+            await resposta
+            pulso.cancel()
+            return batidas, resposta.result()
+
+        with patch.object(API, "shared_state", store), patch.object(API.metrics, "registry", registry):
+            batidas, resposta = asyncio.run(cenario())
+
+        self.assertGreater(batidas, 5)
+        self.assertIn(b"req_total 1", resposta.body)
+
+    def test_metrics_are_summed_across_workers(self):
+        registros = []
+        for pid in (101, 102):
+            registry = MetricsRegistry()
+            registry.counter("req_total", "Teste", ("provider",)).inc(3, provider="groq")
+            registry.histogram("lat_seconds", "Teste", buckets=(1,)).observe(0.5)
+            SharedStateStore(self.path).publish_metrics(registry.export(), pid)
+            registros.append(registry)
+
+        leitor = registros[0]
+        leitor.attach_store(SharedStateStore(self.path))
+        with patch("utils.metrics.os.getpid", return_value=101):
+            texto = leitor.render()
+
+        self.assertIn('req_total{provider="groq"} 6', texto)
+        self.assertIn('lat_seconds_bucket{le="1"} 2', texto)
+        self.assertIn("lat_seconds_count 2", texto)
+
+    def test_reset_discards_previous_run(self):
+        store = SharedStateStore(self.path)
+        store.publish_metrics({"x": []}, 1)
+
+        store.reset()
+
+        self.assertEqual(store.load_metrics(), [])
+
+
+class MultiWorkerStartupTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_auth = API.AUTH_ENABLED
+
+    def tearDown(self):
+        API.AUTH_ENABLED = self.original_auth
+        self.tmp.cleanup()
+
+    def test_workers_use_import_string_and_shared_state(self):
+        caminho = str(Path(self.tmp.name) / "shared.sqlite3")
+        with patch.dict(os.environ, {"MINHAIA_SHARED_STATE": caminho}), \
+                patch("uvicorn.run") as run:
+            API.start_text_api("127.0.0.1", 9000, secure=True, log_level="warning", workers=3)
+            ambiente = dict(os.environ)
+
+        args, kwargs = run.call_args
+        self.assertEqual(args[0], "API:app")
+        self.assertEqual(kwargs["workers"], 3)
+        self.assertEqual(kwargs["log_level"], "warning")
+        self.assertFalse(kwargs["access_log"])
+        self.assertEqual(ambiente["MINHAIA_API_SECURE"], "1")
+        self.assertEqual(ambiente["MINHAIA_SHARED_STATE"], caminho)
+
+    def test_single_worker_runs_app_object(self):
+        with patch("uvicorn.run") as run:
+            API.start_text_api("127.0.0.1", 9000)
+
+        self.assertIs(run.call_args[0][0], API.app)
+        self.assertEqual(run.call_args[1]["log_level"], "info")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import API  # noqa: E402
+from helpers import EchoProvider  # noqa: E402
+from providers.base import StreamChunk  # noqa: E402
+from utils import timing  # noqa: E402
+
+
+class TimingTests(unittest.TestCase):
+    def test_spans_are_noops_without_capture(self):
+        with timing.span("config"):
+            pass
+        timing.record("queue", 1.0)
+
+        self.assertIsNone(timing.current())
+
+    def test_spans_accumulate_by_name_in_start_order(self):
+        with timing.capture_timings() as timings:
+            with timing.span("upstream"):
+                with timing.span("provider_init"):
+                    pass
+            timing.record("upstream", 0.5)
+
+        self.assertEqual(list(timings.spans), ["upstream", "provider_init"])
+        self.assertEqual(timings.spans["upstream"][1], 2)
+        self.assertGreaterEqual(timings.as_dict()["upstream"], 500)
+
+    def test_spans_recorded_in_threads_reach_the_request(self):
+        async def trabalho():
+            await asyncio.to_thread(timing.record, "split", 0.25)
+
+        with timing.capture_timings() as timings:
+            asyncio.run(trabalho())
+
+        self.assertEqual(timings.as_dict(), {"split": 250.0})
+
+    def test_server_timing_and_table_formats(self):
+        timings = timing.Timings()
+        timings.add("config", 0.0012)
+
+        self.assertTrue(timings.server_timing().startswith("config;dur=1.2, total;dur="))
+        self.assertIn("config", timings.table())
+
+    def test_timed_stream_records_ttft_and_generation(self):
+        chunks = [StreamChunk(delta="a"), StreamChunk(delta="b"), StreamChunk(done=True)]
+
+        with timing.capture_timings() as timings:
+            self.assertEqual(len(list(timing.timed_stream(iter(chunks)))), 3)
+
+        self.assertEqual(list(timings.spans), ["ttft", "generation"])
+
+    def test_api_returns_server_timing_header(self):
+        client = TestClient(API.app)
+
+        with patch.object(API.provider_pool, "get", return_value=EchoProvider()):
+            resposta = client.post("/chat", json={"texto": "oi", "capacidade": "fast"})
+
+        self.assertEqual(resposta.status_code, 200)
+        etapas = [parte.split(";")[0] for parte in resposta.headers["server-timing"].split(", ")]
+        self.assertEqual(etapas[0], "config")
+        self.assertIn("upstream", etapas)
+        self.assertEqual(etapas[-1], "total")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import API  # noqa: E402
+from utils.jobs import JobManager, JobStore  # noqa: E402
+from utils.uploads import UploadError, UploadTooLarge, receive_upload  # noqa: E402
+
+BOUNDARY = "XyZ123"
+
+
+def multipart(audio: bytes, nome="fala.mp3", campos=None) -> bytes:
+    partes = []
+    for chave, valor in (campos or {}).items():
+        partes.append(
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{chave}"\r\n\r\n{valor}\r\n'.encode()
+        )
+    partes.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="arquivo"; filename="{nome}"\r\n'
+        f"Content-Type: audio/mpeg\r\n\r\n".encode() + audio + b"\r\n"
+    )
+    partes.append(f"--{BOUNDARY}--\r\n".encode())
+    return b"".join(partes)
+
+
+async def em_pedacos(dados: bytes, tamanho: int):
+    for i in range(0, len(dados), tamanho):
+        yield dados[i:i + tamanho]
+
+
+class FakeWhisper:
+    def __init__(self):
+        self.chamadas = []
+
+    def transcribe_segments(self, segments, audio_file_path, mensagem, modelo):
+        with open(audio_file_path, "rb") as f:
+            conteudo = f.read()
+        self.chamadas.append((segments, mensagem, modelo))
+        return f"{len(conteudo)} bytes"
+
+
+class FailingWhisper:
+    def transcribe_segments(self, segments, audio_file_path, mensagem, modelo):
+        raise Exception("falha no segmento 1")
+
+
+class FakeTranscriptions:
+    def __init__(self, falha_em):
+        self.falha_em = falha_em
+        self.enviados = 0
+
+    def create(self, **kwargs):
+        self.enviados += 1
+        if self.enviados == self.falha_em:
+            raise Exception("erro da API")
+        return "trecho"
+
+
+class UploadParsingTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def receber(self, corpo, content_type, tamanho=7, max_bytes=10_000, nome=None):
+        return asyncio.run(receive_upload(em_pedacos(corpo, tamanho), content_type, self.tmp.name, max_bytes, nome))
+
+    def test_multipart_file_is_written_even_when_delimiter_spans_chunks(self):
+        audio = b"\x00\r\n--XyZ12\xff" * 50
+        corpo = multipart(audio, campos={"idioma": "en-US"})
+
+        upload = self.receber(corpo, f"multipart/form-data; boundary={BOUNDARY}")
+
+        self.assertEqual(Path(upload.caminho).read_bytes(), audio)
+        self.assertEqual(upload.nome, "fala.mp3")
+        self.assertTrue(upload.caminho.endswith(".mp3"))
+        self.assertEqual(upload.campos, {"idioma": "en-US"})
+
+    def test_raw_body_uses_given_name(self):
+        upload = self.receber(b"RIFF....", "audio/wav", nome="x.wav")
+
+        self.assertEqual(Path(upload.caminho).read_bytes(), b"RIFF....")
+        self.assertTrue(upload.caminho.endswith(".wav"))
+
+    def test_too_large_upload_is_removed(self):
+        with self.assertRaises(UploadTooLarge):
+            self.receber(multipart(b"a" * 200), f"multipart/form-data; boundary={BOUNDARY}", max_bytes=100)
+
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_truncated_multipart_is_rejected(self):
+        corpo = multipart(b"abc")[:-12]
+
+        with self.assertRaises(UploadError):
+            self.receber(corpo, f"multipart/form-data; boundary={BOUNDARY}")
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+class TranscribeApiTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"MINHAIA_CACHE_DIR": self.tmp.name})
+        self.env.start()
+        self.whisper = FakeWhisper()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    async def divide(self, caminho):
+        return [caminho]
+
+    def test_transcribes_multipart_upload_and_removes_it(self):
+        client = TestClient(API.app)
+        with patch.object(API, "_divide_audio", self.divide), \
+                patch.object(API.provider_pool, "get", return_value=self.whisper):
+            resposta = client.post(
+                "/transcribe?capacidade=fast&prompt=aula",
+                content=multipart(b"a" * 1000),
+                headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+            )
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json(), {"transcricao": "1000 bytes", "modelo": "gpt-4o-mini-transcribe",
+                                           "backend": "whisper"})
+        self.assertEqual(self.whisper.chamadas[0][1:], ("aula", "gpt-4o-mini-transcribe"))
+        self.assertEqual(os.listdir(Path(self.tmp.name) / "uploads"), [])
+
+    def segmentos(self, quantidade):
+        caminhos = []
+        for i in range(quantidade):
+            caminho = Path(self.tmp.name) / f"chunk_{i}.wav"
+            caminho.write_bytes(b"RIFF")
+            caminhos.append(str(caminho))
+        return caminhos
+
+    def test_whisper_removes_every_segment_when_one_fails(self):
+        from providers.openaiWhisper_provider import WhisperProvider
+
+        segmentos = self.segmentos(3)
+        provider = WhisperProvider()
+        provider.client = type("Client", (), {})()
+        provider.client.audio = type("Audio", (), {})()
+        provider.client.audio.transcriptions = FakeTranscriptions(falha_em=2)
+
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(Exception):
+            provider.transcribe_segments(segmentos, "original.mp3", None, "whisper-1")
+
+        self.assertEqual(provider.client.audio.transcriptions.enviados, 2)
+        self.assertFalse(any(os.path.exists(segmento) for segmento in segmentos))
+
+    def test_api_removes_segments_the_provider_did_not(self):
+        segmentos = self.segmentos(2)
+        upload = Path(self.tmp.name) / "fala.mp3"
+        upload.write_bytes(b"abc")
+
+        async def divide(caminho):
+            return segmentos
+
+        pedido = {"arquivo": str(upload), "backend": "whisper", "modelo": "whisper-1"}
+        with patch.object(API, "_divide_audio", divide), \
+                patch.object(API.provider_pool, "get", return_value=FailingWhisper()), \
+                self.assertRaises(Exception):
+            asyncio.run(API._transcreve(pedido))
+
+        self.assertFalse(any(os.path.exists(segmento) for segmento in segmentos))
+        self.assertFalse(upload.exists())
+
+    def test_empty_body_is_bad_request(self):
+        resposta = TestClient(API.app).post("/transcribe", content=b"", headers={"Content-Type": "audio/mpeg"})
+
+        self.assertEqual(resposta.status_code, 400)
+
+    def test_async_mode_returns_job_with_transcript(self):
+        manager = JobManager(JobStore(str(Path(self.tmp.name) / "jobs.sqlite3")), API._executa_job,
+                             start_background=API._inicia_job_background,
+                             poll_background=API._consulta_job_background)
+        with patch.object(API, "job_manager", manager), \
+                patch.object(API, "_divide_audio", self.divide), \
+                patch.object(API.provider_pool, "get", return_value=self.whisper), \
+                patch.object(API.provider_pool, "warm", return_value=[]), \
+                TestClient(API.app) as client:
+            resposta = client.post("/transcribe?assincrono=true&nome=a.mp3", content=b"abc",
+                                   headers={"Content-Type": "audio/mpeg"})
+            self.assertEqual(resposta.status_code, 202)
+            job_id = resposta.json()["id"]
+            for _ in range(50):
+                job = client.get(f"/jobs/{job_id}").json()
+                if job["status"] == "succeeded":
+                    break
+                time.sleep(0.05)
+
+        self.assertEqual(job["resposta"], "3 bytes")
+        self.assertEqual(job["modelo"], "whisper-1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import API  # noqa: E402
+from utils.audio_stream import transmitir_partes  # noqa: E402
+from utils.text_utils import dividir_para_streaming  # noqa: E402
+
+
+class FakeTTS:
+    def __init__(self):
+        self.chamadas = []
+
+    def stream_audio(self, texto, **opcoes):
+        self.chamadas.append(opcoes)
+        partes = dividir_para_streaming(texto, 20, 5)
+        return transmitir_partes(partes, lambda parte: [parte.encode("utf-8"), b"|"])
+
+
+class FailingTTS:
+    def stream_audio(self, texto, **opcoes):
+        raise Exception("sem credenciais")
+
+
+class StreamingSplitTests(unittest.TestCase):
+    def test_first_part_is_short_and_nothing_is_lost(self):
+        texto = "Primeira frase. " + "Outra frase um pouco maior. " * 10
+        partes = dividir_para_streaming(texto.strip(), 100, 20)
+
+        self.assertLessEqual(len(partes[0]), 20)
+        self.assertTrue(all(len(parte) <= 100 for parte in partes))
+        self.assertEqual(" ".join(partes), texto.strip())
+
+    def test_leading_whitespace_does_not_duplicate_text(self):
+        texto = "  Olá mundo. Resto do texto aqui."
+        partes = dividir_para_streaming(texto, 100, 15)
+
+        self.assertEqual(partes[0], "Olá mundo.")
+        self.assertEqual(" ".join(partes), texto.strip())
+
+    def test_parts_are_emitted_in_order_while_next_ones_are_prefetched(self):
+        iniciadas = []
+        segunda_iniciada = threading.Event()
+
+        def sintetizar(parte):
+            iniciadas.append(parte)
+            if parte == "b":
+                segunda_iniciada.set()
+            if parte == "a":
+                # A primeira parte só termina depois que a seguinte já começou
+                self.assertTrue(segunda_iniciada.wait(2))
+            return [parte.encode()]
+
+        blocos = list(transmitir_partes(["a", "b", "c"], sintetizar, antecipar=2))
+
+        self.assertEqual(blocos, [b"a", b"b", b"c"])
+        self.assertEqual(sorted(iniciadas), ["a", "b", "c"])
+
+
+class TTSApiTests(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(API.app)
+
+    def test_streams_mpeg_audio_of_every_part(self):
+        tts = FakeTTS()
+        with patch.dict(API.tts_providers, {"groq": tts}):
+            resposta = self.client.post(
+                "/tts", json={"texto": "Oi. Tudo bem com você hoje?", "engine": "groq", "voz": "Celeste"}
+            )
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.headers["content-type"], "audio/mpeg")
+        self.assertEqual(resposta.content, b"Oi.|Tudo bem com voc\xc3\xaa|hoje?|")
+        self.assertEqual(tts.chamadas, [{"voz": "Celeste"}])
+
+    def test_polly_options_map_to_voice_id_and_engine(self):
+        tts = FakeTTS()
+        with patch.dict(API.tts_providers, {"polly": tts}):
+            self.client.post("/tts", json={"texto": "Oi.", "engine": "polly", "voz": "Camila", "modelo": "standard"})
+
+        self.assertEqual(tts.chamadas, [{"voice_id": "Camila", "engine": "standard"}])
+
+    def test_unknown_engine_is_rejected(self):
+        resposta = self.client.post("/tts", json={"texto": "Oi.", "engine": "festival"})
+
+        self.assertEqual(resposta.status_code, 422)
+
+    def test_failure_before_first_byte_returns_500(self):
+        with patch.dict(API.tts_providers, {"openai": FailingTTS()}):
+            resposta = self.client.post("/tts", json={"texto": "Oi."})
+
+        self.assertEqual(resposta.status_code, 500)
+
+
+if __name__ == "__main__":
+    unittest.main()